@@ -0,0 +1,67 @@
+"""Benchmarks fixtures."""
+
+import os
+
+import pytest
+
+from riotgen.api import GENERATORS
+from riotgen.common import check_all_params, init_params, read_config_file
+
+TEST_DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "riotgen",
+    "tests",
+    "test_data",
+)
+
+CONFIGS = {
+    "application": "application.cfg",
+    "board": "board.cfg",
+    "driver": "driver.yml",
+    "example": "example.yml",
+    "module": "module.yml",
+    "pkg": "pkg.cfg",
+    "test": "test.yml",
+}
+
+
+def pytest_sessionstart(session):
+    """Only run the benchmarks when there's no baseline to compare with.
+
+    pytest-benchmark already warns that there's nothing to compare with, but
+    --benchmark-compare-fail would fail the run.
+    """
+    benchmark_session = getattr(session.config, "_benchmarksession", None)
+    if benchmark_session is None or benchmark_session.compared_mapping:
+        return
+    benchmark_session.compare_fail = None
+
+
+def load_params(command, riotbase, config_name=None):
+    """Load and check the parameters of a command from the test data."""
+    generator = GENERATORS[command]
+    group = generator["group"]
+    if config_name is None:
+        config_name = CONFIGS[command]
+    with open(os.path.join(TEST_DATA_DIR, config_name)) as config:
+        params = read_config_file(config, group)
+    init_params(params, group, riotbase, generator["in_riot_dir"])
+    check_all_params(params, generator["params"], group)
+    return params
+
+
+@pytest.fixture
+def riotbase(tmpdir):
+    """A fixture returning an empty RIOTBASE directory."""
+    return tmpdir.mkdir("riotbase").strpath
+
+
+@pytest.fixture
+def fresh_dir(tmpdir):
+    """A fixture returning a function creating a new directory per call."""
+    counter = iter(range(1_000_000))
+
+    def _fresh_dir():
+        return tmpdir.mkdir(f"run{next(counter)}").strpath
+
+    return _fresh_dir
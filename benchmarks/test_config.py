@@ -0,0 +1,50 @@
+"""Configuration parsing benchmarks."""
+
+import io
+import os
+
+import pytest
+from conftest import TEST_DATA_DIR
+
+from riotgen.common import read_config_file
+
+LARGE_YAML_DRIVERS = 500
+
+
+def _large_yaml():
+    lines = [
+        "global:",
+        "  author_name: test_name",
+        "  author_email: test_email",
+        "driver:",
+    ]
+    for index in range(LARGE_YAML_DRIVERS):
+        lines += [
+            f"  - name: driver{index}",
+            f"    displayed_name: Driver {index}",
+            "    brief: test brief description",
+            "    ingroup: sensors",
+            "    modules: [ztimer, periph_i2c]",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+@pytest.mark.parametrize("config_name", ["driver.yml", "board.cfg"])
+def test_read_config_file(benchmark, config_name):
+    """Benchmark reading the YAML and INI test configuration files."""
+    with open(os.path.join(TEST_DATA_DIR, config_name)) as f_config:
+        content = f_config.read()
+    group = os.path.splitext(config_name)[0]
+
+    def _read():
+        return read_config_file(io.StringIO(content), group)
+
+    params = benchmark(_read)
+    assert group in params
+
+
+def test_read_large_config_file(benchmark):
+    """Benchmark reading a large batch configuration file."""
+    content = _large_yaml()
+    params = benchmark(lambda: read_config_file(io.StringIO(content)))
+    assert len(params["driver"]) == LARGE_YAML_DRIVERS
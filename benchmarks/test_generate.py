@@ -0,0 +1,68 @@
+"""Rendering and generation benchmarks."""
+
+import copy
+import io
+import os
+
+import pytest
+from conftest import CONFIGS, TEST_DATA_DIR, load_params
+
+from riotgen.api import GENERATORS
+from riotgen.board import generate_board
+from riotgen.common import reset_environments
+from riotgen.driver import generate_driver
+from riotgen.plan import RenderPlan
+
+
+def _render_command(command):
+    """Return a function rendering and writing the files of a generator."""
+    render = GENERATORS[command]["render"]
+
+    def _render(params, riotbase, output_dir):
+        plan = RenderPlan()
+        render(params, riotbase, output_dir, plan)
+        plan.write()
+
+    return _render
+
+
+@pytest.mark.parametrize("command", sorted(CONFIGS))
+def test_render(benchmark, command, riotbase, fresh_dir):
+    """Benchmark rendering all the files of a generator (warm templates)."""
+    params = load_params(command, riotbase)
+    render = _render_command(command)
+
+    def _setup():
+        return (copy.deepcopy(params), riotbase, fresh_dir()), {}
+
+    benchmark.pedantic(render, setup=_setup, rounds=20, warmup_rounds=1)
+
+
+def test_render_netdev_driver_cold(benchmark, riotbase, fresh_dir):
+    """Benchmark rendering a netdev driver with empty template caches."""
+    params = load_params("driver", riotbase, "driver_netdev.yml")
+    render = _render_command("driver")
+
+    def _setup():
+        reset_environments()
+        return (copy.deepcopy(params), riotbase, fresh_dir()), {}
+
+    benchmark.pedantic(render, setup=_setup, rounds=20)
+
+
+@pytest.mark.parametrize(
+    "generate,config_name",
+    [(generate_driver, "driver.yml"), (generate_board, "board.cfg")],
+    ids=["driver", "board"],
+)
+def test_generate(benchmark, generate, config_name, fresh_dir):
+    """Benchmark a complete generation in a new RIOTBASE."""
+    with open(os.path.join(TEST_DATA_DIR, config_name)) as f_config:
+        content = f_config.read()
+
+    def _setup():
+        config = io.StringIO(content)
+        config.name = config_name
+        return (False, config, fresh_dir()), {}
+
+    benchmark.pedantic(generate, setup=_setup, rounds=20, warmup_rounds=1)
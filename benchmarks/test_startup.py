@@ -0,0 +1,33 @@
+"""CLI startup benchmarks."""
+
+import subprocess
+import sys
+
+import pytest
+
+
+def _run(*args):
+    code = "from riotgen.main import riotgen; riotgen()"
+    subprocess.run(
+        [sys.executable, "-c", code, *args],
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+@pytest.mark.parametrize(
+    "args", [["--version"], ["--help"], ["driver", "--help"]]
+)
+def test_cli_cold_start(benchmark, args):
+    """Benchmark a full interpreter start running the CLI."""
+    benchmark.pedantic(_run, args=args, rounds=10, warmup_rounds=1)
+
+
+def _import(module):
+    subprocess.run([sys.executable, "-c", f"import {module}"], check=True)
+
+
+@pytest.mark.parametrize("module", ["riotgen.main", "riotgen.batch"])
+def test_import_time(benchmark, module):
+    """Benchmark the import time of the riotgen modules."""
+    benchmark.pedantic(_import, args=[module], rounds=10, warmup_rounds=1)
@@ -0,0 +1,251 @@
+"""Programmatic generation API.
+
+This is the entry point for embedding riotgen in Python programs: nothing is
+prompted or printed, errors are raised as RiotgenError exceptions and the
+result of a generation is returned as a dict. The command line, the batch
+command and the daemon are built on this module.
+
+    >>> import tempfile
+    >>> from riotgen.api import generate
+    >>> riotbase = tempfile.mkdtemp()
+    >>> result = generate(
+    ...     "driver",
+    ...     {
+    ...         "name": "foo",
+    ...         "displayed_name": "Foo",
+    ...         "brief": "Foo driver",
+    ...         "ingroup": "sensors",
+    ...     },
+    ...     riotbase,
+    ...     global_params={
+    ...         "author_name": "Name",
+    ...         "author_email": "name@mail",
+    ...         "organization": "Organization",
+    ...     },
+    ...     dry_run=True,
+    ... )
+    >>> os.path.relpath(result["output_dir"], riotbase)
+    'drivers/foo'
+"""
+
+import os
+
+from riotgen.application import (
+    APPLICATION_PARAMS,
+    APPLICATION_PARAMS_LIST,
+    TESTRUNNER_PARAMS,
+    get_output_dir,
+    render_application,
+)
+from riotgen.board import BOARD_PARAMS, BOARD_PARAMS_LIST, render_board
+from riotgen.common import (
+    check_all_params,
+    check_riotbase,
+    init_params,
+    parse_list_params,
+)
+from riotgen.deps import resolve_application_dependencies
+from riotgen.driver import DRIVER_PARAMS, DRIVER_PARAMS_LIST, render_driver
+from riotgen.errors import (
+    MissingParameterError,
+    OutputExistsError,
+    ParameterError,
+    RiotgenError,
+)
+from riotgen.example import render_example
+from riotgen.manifest import add_manifest
+from riotgen.module import MODULE_PARAMS, render_module
+from riotgen.params import freeze_params, replace_params
+from riotgen.pkg import PKG_PARAMS, PKG_PARAMS_LIST, render_pkg
+from riotgen.plan import WRITER_THREADS, RenderPlan
+from riotgen.riotbase import check_riotbase_params
+from riotgen.test import render_test
+
+__all__ = [
+    "GENERATORS",
+    "MissingParameterError",
+    "OutputExistsError",
+    "ParameterError",
+    "RiotgenError",
+    "generate",
+    "load_job",
+    "render_job",
+]
+
+GENERATORS = {
+    "application": {
+        "group": "application",
+        "params": APPLICATION_PARAMS,
+        "params_list": APPLICATION_PARAMS_LIST,
+        "in_riot_dir": None,
+        "render": render_application,
+        "label": "Application",
+    },
+    "board": {
+        "group": "board",
+        "params": BOARD_PARAMS,
+        "params_list": BOARD_PARAMS_LIST,
+        "in_riot_dir": "boards",
+        "render": render_board,
+        "label": "Support for board",
+    },
+    "driver": {
+        "group": "driver",
+        "params": DRIVER_PARAMS,
+        "params_list": DRIVER_PARAMS_LIST,
+        "in_riot_dir": "drivers",
+        "render": render_driver,
+        "label": "Driver",
+    },
+    "example": {
+        "group": "application",
+        "params": APPLICATION_PARAMS,
+        "params_list": APPLICATION_PARAMS_LIST,
+        "in_riot_dir": "examples",
+        "render": render_example,
+        "label": "Example",
+    },
+    "module": {
+        "group": "module",
+        "params": MODULE_PARAMS,
+        "params_list": [],
+        "in_riot_dir": "sys",
+        "render": render_module,
+        "label": "Module",
+    },
+    "pkg": {
+        "group": "pkg",
+        "params": PKG_PARAMS,
+        "params_list": PKG_PARAMS_LIST,
+        "in_riot_dir": "pkg",
+        "render": render_pkg,
+        "label": "Package",
+    },
+    "test": {
+        "group": "application",
+        "params": {**APPLICATION_PARAMS, **TESTRUNNER_PARAMS},
+        "params_list": APPLICATION_PARAMS_LIST,
+        "in_riot_dir": "tests",
+        "render": render_test,
+        "label": "Test",
+    },
+}
+
+COMMANDS = tuple(GENERATORS)
+
+
+def load_job(
+    command,
+    params,
+    riotbase,
+    global_params=None,
+    output_dir=None,
+    resolve_deps=False,
+):
+    """Check the parameters of an entity and return its generation job.
+
+    params are the parameters of the entity group, like in a batch config
+    file. Applications are generated in output_dir, or in the output_dir
+    parameter, other entities in RIOTBASE. With resolve_deps, the
+    dependencies of applications are resolved against RIOTBASE.
+
+    Return the job as a (command, params, output_dir) tuple, with the
+    parameters frozen in a record.
+    """
+    if command not in GENERATORS:
+        raise ParameterError(f"Unknown command '{command}'")
+    if not isinstance(params, dict):
+        raise ParameterError("params must be a mapping")
+    generator = GENERATORS[command]
+    group = generator["group"]
+    in_riot_dir = generator["in_riot_dir"]
+    check_riotbase(riotbase)
+    riotbase = os.path.abspath(os.path.expanduser(riotbase))
+
+    entity = dict(params)
+    entity_output_dir = entity.pop("output_dir", None)
+    parse_list_params(entity)
+    params = {group: entity, "global": dict(global_params or {})}
+    init_params(params, group, riotbase, in_riot_dir)
+    check_all_params(params, generator["params"], group)
+
+    if in_riot_dir is not None:
+        output_dir = get_output_dir(params, group, riotbase, in_riot_dir)
+    else:
+        output_dir = output_dir or entity_output_dir
+        if not output_dir:
+            raise MissingParameterError("output dir")
+        output_dir = os.path.abspath(os.path.expanduser(output_dir))
+
+    params = freeze_params(params)
+    if resolve_deps and group == "application":
+        dependencies = resolve_application_dependencies(
+            params, group, riotbase
+        )
+        params = replace_params(params, group, dependencies=dependencies)
+    return command, params, output_dir
+
+
+def render_job(job, riotbase, plan=None):
+    """Render the code of a job, with its manifest, in a render plan."""
+    if plan is None:
+        plan = RenderPlan()
+    command, params, output_dir = job
+    GENERATORS[command]["render"](params, riotbase, output_dir, plan)
+    add_manifest(plan, command, params, riotbase, output_dir)
+    return plan
+
+
+def generate(
+    command,
+    params,
+    riotbase,
+    global_params=None,
+    output_dir=None,
+    dry_run=False,
+    force=False,
+    resolve_deps=False,
+):
+    """Generate the code of an entity.
+
+    params are the parameters of the entity group and global_params the
+    global parameters, like in a batch config file. Applications are
+    generated in output_dir, or in their output_dir parameter, other entities
+    in RIOTBASE. An existing output directory is only overwritten with force,
+    except the output_dir argument, and nothing is written in dry run mode.
+
+    Return a dict with the output directory, the rendered files by path, the
+    written and unchanged paths and the warnings about RIOTBASE.
+    """
+    job = load_job(
+        command, params, riotbase, global_params, output_dir, resolve_deps
+    )
+    riotbase = os.path.abspath(os.path.expanduser(riotbase))
+    _, frozen_params, job_output_dir = job
+    # Like with the command line, an application output_dir may exist
+    explicit_output_dir = (
+        output_dir is not None and GENERATORS[command]["in_riot_dir"] is None
+    )
+    if not (dry_run or force or explicit_output_dir) and os.path.exists(
+        job_output_dir
+    ):
+        raise OutputExistsError(f"{job_output_dir} directory already exists")
+
+    group = GENERATORS[command]["group"]
+    warnings = check_riotbase_params(frozen_params, group, riotbase)
+    plan = RenderPlan(writers=0 if dry_run else WRITER_THREADS)
+    try:
+        render_job(job, riotbase, plan)
+        if not dry_run:
+            plan.write()
+    except BaseException:
+        plan.abort()
+        raise
+    return {
+        "command": command,
+        "output_dir": job_output_dir,
+        "files": dict(plan.items()),
+        "written": plan.written,
+        "unchanged": plan.unchanged,
+        "warnings": warnings,
+    }
@@ -4,7 +4,9 @@ import os
 
 import click
 
-from riotgen.common import load_and_check_params, render_source
+from riotgen.common import generate_entity, render_source
+from riotgen.metrics import measure_command
+from riotgen.params import make_params_model
 
 APPLICATION_PARAMS = {
     "name": {"args": ["Application name"], "kwargs": {}},
@@ -19,6 +21,14 @@ TESTRUNNER_PARAMS = {
     },
 }
 
+Application = make_params_model(
+    "Application",
+    "application",
+    {**APPLICATION_PARAMS, **TESTRUNNER_PARAMS},
+    extras=["riotbase", "type", "dependencies"],
+    module=__name__,
+)
+
 APPLICATION_PARAMS_LIST = ["modules", "packages", "features_required"]
 
 APPLICATION_FILES = {
@@ -31,44 +41,38 @@ def get_output_dir(params, group, riotbase, in_riot_dir):
     return os.path.join(riotbase, in_riot_dir, params[group]["name"])
 
 
-def load_and_check_application_params(
-    group, interactive, config, riotbase, in_riot_dir=None, testrunner=False
-):
-    """Load, prompt and check application configuration parameters."""
-    params = APPLICATION_PARAMS.copy()
-    if testrunner is True:
-        params.update(TESTRUNNER_PARAMS)
-
-    return load_and_check_params(
-        group,
-        params,
-        APPLICATION_PARAMS_LIST,
-        interactive,
-        config,
-        riotbase,
-        in_riot_dir,
-    )
+def render_application_source(params, group, output_dir, plan=None):
+    """Render an application source code."""
+    render_source(params, group, APPLICATION_FILES, output_dir, plan)
 
 
-def render_application_source(params, group, output_dir):
-    """Render an application source code."""
-    render_source(params, group, APPLICATION_FILES, output_dir)
+def render_application(params, riotbase, output_dir, plan):
+    """Render the code of an application."""
+    render_application_source(params, "application", output_dir, plan)
 
 
-def generate_application(output_dir, interactive, config, riotbase):
+@measure_command("application")
+def generate_application(
+    output_dir,
+    interactive,
+    config,
+    riotbase,
+    dry_run=False,
+    output_archive=None,
+    resolve_deps=False,
+):
     """Generate the code of an application."""
-    group = "application"
-    params = load_and_check_application_params(
-        group, interactive, config, riotbase
-    )
-    render_application_source(params, group, output_dir)
-
-    click.echo(
-        click.style(
-            f"Application '{params['application']['name']}' generated "
-            f"in {output_dir} with success!",
-            bold=True,
-        )
-    )
+    if not generate_entity(
+        "application",
+        interactive,
+        config,
+        riotbase,
+        output_dir,
+        dry_run=dry_run,
+        output_archive=output_archive,
+        resolve_deps=resolve_deps,
+    ):
+        return
+
     click.echo("\nTo build the application, use")
     click.echo(f"\n     make -C {output_dir}\n")
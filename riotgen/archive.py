@@ -0,0 +1,101 @@
+"""Archive output module."""
+
+import io
+import os
+import sys
+import tarfile
+import time
+import zipfile
+
+from riotgen.errors import ParameterError
+from riotgen.metrics import record_write
+from riotgen.timing import timed
+
+ZIP_EXTENSIONS = (".zip",)
+TAR_EXTENSIONS = (".tar.gz", ".tgz")
+DEFAULT_MODE = 0o644
+
+
+def get_archive_format(archive):
+    """Return the format of an archive from its file name."""
+    if archive == "-":
+        return "tar"
+    if archive.endswith(ZIP_EXTENSIONS):
+        return "zip"
+    if archive.endswith(TAR_EXTENSIONS):
+        return "tar"
+    raise ParameterError(
+        f"Unsupported archive '{archive}', use one of "
+        f"{', '.join(TAR_EXTENSIONS + ZIP_EXTENSIONS)}"
+    )
+
+
+def get_archive_root(paths, riotbase=None):
+    """Return the directory archive members are relative to.
+
+    It's the RIOT base directory when all files are in it, otherwise the
+    common directory of all files.
+    """
+    directories = [os.path.dirname(path) for path in paths]
+    if riotbase is not None:
+        riotbase = os.path.abspath(os.path.expanduser(riotbase))
+        if all(
+            os.path.commonpath([riotbase, directory]) == riotbase
+            for directory in directories
+        ):
+            return riotbase
+    return os.path.commonpath(directories)
+
+
+def _archive_members(plans, root):
+    for plan in plans:
+        for path, content in plan.items():
+            name = os.path.relpath(path, root).replace(os.sep, "/")
+            mode = plan.modes.get(path, DEFAULT_MODE)
+            yield name, content.encode(), mode
+
+
+def _write_tar(stream, members):
+    mtime = time.time()
+    with tarfile.open(fileobj=stream, mode="w|gz") as archive:
+        for name, data, mode in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mode = mode
+            info.mtime = mtime
+            archive.addfile(info, io.BytesIO(data))
+
+
+def _write_zip(stream, members):
+    date_time = time.localtime()[:6]
+    with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data, mode in members:
+            info = zipfile.ZipInfo(name, date_time)
+            info.external_attr = (0o100000 | mode) << 16
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, data)
+
+
+@timed("write")
+def write_archive(plans, archive, riotbase=None):
+    """Write the files of render plans in a tar.gz or zip archive.
+
+    The files are streamed to the archive without being written on disk,
+    an archive named '-' is written to the standard output. Return the number
+    of archived files.
+    """
+    archive_format = get_archive_format(archive)
+    paths = [path for plan in plans for path in plan]
+    if not paths:
+        return 0
+    members = _archive_members(plans, get_archive_root(paths, riotbase))
+    writer = _write_zip if archive_format == "zip" else _write_tar
+    if archive == "-":
+        sys.stdout.flush()
+        writer(sys.stdout.buffer, members)
+        sys.stdout.buffer.flush()
+    else:
+        with open(archive, "wb") as stream:
+            writer(stream, members)
+        record_write(1, os.path.getsize(archive))
+    return len(paths)
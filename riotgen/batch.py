@@ -0,0 +1,199 @@
+"""RIOT batch generator module."""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+
+from riotgen.api import GENERATORS, load_job, render_job
+from riotgen.archive import write_archive
+from riotgen.common import (
+    check_global_params,
+    check_riotbase,
+    preload_templates,
+    read_config_file,
+)
+from riotgen.errors import ParameterError, RiotgenError
+from riotgen.metrics import measure_command
+from riotgen.plan import WRITER_THREADS, RenderPlan, commit_plan
+from riotgen.riotbase import check_riotbase_params
+
+
+def load_batch(config, riotbase, force=False):
+    """Load and check all the entities described in a batch config file.
+
+    Return the list of jobs as (command, params, output_dir) tuples, in the
+    order of the config file. All errors are reported at once.
+    """
+    batch = read_config_file(config)
+    if not isinstance(batch, dict):
+        raise ParameterError(f"Invalid batch config file '{config.name}'")
+
+    unknown = [key for key in batch if key not in GENERATORS]
+    unknown = [key for key in unknown if key != "global"]
+    if unknown:
+        raise ParameterError(f"Unknown batch entities: {', '.join(unknown)}")
+
+    # Global parameters are shared by all entities: resolve them only once
+    global_params = {"global": batch.get("global") or {}}
+    check_global_params(global_params)
+    global_params = global_params["global"]
+
+    jobs = []
+    errors = []
+    output_dirs = set()
+    for command in batch:
+        if command == "global":
+            continue
+        entities = batch[command] or []
+        if not isinstance(entities, list):
+            errors.append(f"{command}: a list of entities is expected")
+            continue
+        for index, entity in enumerate(entities):
+            if not isinstance(entity, dict):
+                errors.append(
+                    f"{command}[{index}]: entity parameters must be a mapping"
+                )
+                continue
+            try:
+                job = load_job(command, entity, riotbase, global_params)
+            except RiotgenError as exc:
+                errors.append(f"{command}[{index}]: {exc}")
+                continue
+            output_dir = job[2]
+            if output_dir in output_dirs:
+                errors.append(
+                    f"{command}[{index}]: {output_dir} is generated twice"
+                )
+                continue
+            if not force and os.path.exists(output_dir):
+                errors.append(
+                    f"{command}[{index}]: {output_dir} directory already "
+                    "exists, use --force to overwrite"
+                )
+                continue
+            output_dirs.add(output_dir)
+            jobs.append(job)
+            group = GENERATORS[command]["group"]
+            for warning in check_riotbase_params(job[1], group, riotbase):
+                click.echo(
+                    click.style(
+                        f"Warning: {command}[{index}]: {warning}", fg="yellow"
+                    ),
+                    err=True,
+                )
+
+    if errors:
+        raise RiotgenError(
+            "Invalid batch configuration:\n"
+            + "\n".join(f"  {error}" for error in errors)
+        )
+
+    return jobs
+
+
+def _run_batch_job(job, riotbase, dry_run=False):
+    # Files are staged by writer threads while the next ones are rendered
+    plan = RenderPlan(writers=0 if dry_run else WRITER_THREADS)
+    try:
+        render_job(job, riotbase, plan)
+        if not dry_run:
+            plan.write()
+    except BaseException as exc:  # pylint:disable=broad-except
+        # Staged files are also removed on KeyboardInterrupt or SystemExit
+        plan.abort()
+        if not isinstance(exc, Exception):
+            raise
+        return None, f"{type(exc).__name__}: {exc}"
+    return plan, None
+
+
+def run_batch_jobs(jobs_list, riotbase, jobs=1, dry_run=False):
+    """Render a list of batch jobs, using a pool of processes if jobs > 1.
+
+    Return one (plan, error) tuple per batch job, in the order of the batch
+    jobs: error is None on success and a failing job doesn't stop the others.
+    In dry run mode, the files are only rendered in the plans.
+    """
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(jobs_list))
+    if jobs <= 1:
+        return [_run_batch_job(job, riotbase, dry_run) for job in jobs_list]
+
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=preload_templates
+    ) as executor:
+        futures = [
+            executor.submit(_run_batch_job, job, riotbase, dry_run)
+            for job in jobs_list
+        ]
+        return [future.result() for future in futures]
+
+
+def get_batch_job_summary(job, plan=None, error=None):
+    """Return the summary message of a batch job."""
+    command, params, output_dir = job
+    generator = GENERATORS[command]
+    name = params[generator["group"]]["name"]
+    if error is not None:
+        return f"{generator['label']} '{name}' failed: {error}"
+    summary = f"{generator['label']} '{name}' generated in {output_dir}"
+    if plan is not None:
+        summary += f" ({plan.summary()})"
+    return summary
+
+
+@measure_command("batch")
+def generate_batch(
+    config, riotbase, force=False, jobs=1, dry_run=False, output_archive=None
+):
+    """Generate the code of all the entities of a batch config file.
+
+    When an output archive is given, the code of all entities is written in
+    this archive instead.
+    """
+    check_riotbase(riotbase)
+    riotbase = os.path.abspath(os.path.expanduser(riotbase))
+    # Nothing is overwritten in dry run mode or when writing an archive
+    no_write = dry_run or output_archive is not None
+    jobs_list = load_batch(config, riotbase, force or no_write)
+    results = run_batch_jobs(jobs_list, riotbase, jobs, no_write)
+
+    failures = 0
+    for job, (plan, error) in zip(jobs_list, results):
+        if error is not None:
+            failures += 1
+            click.echo(
+                click.style(get_batch_job_summary(job, error=error), fg="red"),
+                err=True,
+            )
+        elif dry_run:
+            commit_plan(plan, dry_run)
+        elif output_archive is None:
+            click.echo(get_batch_job_summary(job, plan))
+
+    if failures:
+        raise RiotgenError(
+            f"{failures} of {len(jobs_list)} entities failed to generate"
+        )
+
+    if dry_run:
+        return
+
+    if output_archive is not None:
+        plans = [plan for plan, _ in results]
+        count = write_archive(plans, output_archive, riotbase)
+        click.echo(
+            f"{len(jobs_list)} entities ({count} files) archived "
+            f"in {output_archive}",
+            err=True,
+        )
+        return
+
+    click.echo(
+        click.style(
+            f"{len(jobs_list)} entities generated with success!",
+            bold=True,
+        )
+    )
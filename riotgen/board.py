@@ -2,14 +2,9 @@
 
 import os
 
-import click
-
-from riotgen.common import (
-    check_overwrite,
-    load_and_check_params,
-    load_license,
-    render_source,
-)
+from riotgen.common import generate_entity, load_license, render_source
+from riotgen.metrics import measure_command
+from riotgen.params import make_params_model
 
 BOARD_PARAMS = {
     "name": {"args": ["Board name"], "kwargs": {}},
@@ -23,6 +18,8 @@ BOARD_PARAMS = {
 
 BOARD_PARAMS_LIST = ["features_provided"]
 
+Board = make_params_model("Board", "board", BOARD_PARAMS, module=__name__)
+
 BOARD_FILES = {
     filename: None
     for filename in [
@@ -39,38 +36,34 @@ BOARD_INCLUDE_FILES = {
 }
 
 
-def generate_board(interactive, config, riotbase):
-    """Generate the code for a board support."""
+def render_board(params, riotbase, output_dir, plan):
+    """Render the code of a board support."""
     group = "board"
-    params = load_and_check_params(
-        group,
-        BOARD_PARAMS,
-        BOARD_PARAMS_LIST,
-        interactive,
-        config,
-        riotbase,
-        "boards",
-    )
-
-    output_dir = os.path.join(riotbase, "boards", params[group]["name"])
-    check_overwrite(output_dir)
-
-    render_source(params, group, BOARD_FILES, output_dir)
+    render_source(params, group, BOARD_FILES, output_dir, plan)
     render_source(
         params,
         group,
         BOARD_INCLUDE_FILES,
         os.path.join(output_dir, "include"),
+        plan,
     )
 
     # Generate the Kconfig file separately because of the different license
     # format
-    load_license(params, "# ")
-    render_source(params, group, {"Kconfig": None}, output_dir)
+    params = load_license(params, "# ")
+    render_source(params, group, {"Kconfig": None}, output_dir, plan)
 
-    click.echo(
-        click.style(
-            f"Support for {group} '{params[group]['name']}' generated in {output_dir} with success!",
-            bold=True,
-        )
+
+@measure_command("board")
+def generate_board(
+    interactive, config, riotbase, dry_run=False, output_archive=None
+):
+    """Generate the code for a board support."""
+    generate_entity(
+        "board",
+        interactive,
+        config,
+        riotbase,
+        dry_run=dry_run,
+        output_archive=output_archive,
     )
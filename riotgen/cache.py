@@ -0,0 +1,288 @@
+"""Persistent cache module."""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+
+from jinja2 import FileSystemBytecodeCache
+
+from riotgen import __version__
+from riotgen.metrics import record_cache
+
+CACHE_DIR_ENV = "RIOTGEN_CACHE_DIR"
+BYTECODE_CACHE_ENV = "RIOTGEN_BYTECODE_CACHE"
+BYTECODE_CACHE_MAX_SIZE = 16 * 1024 * 1024
+BYTECODE_CACHE_PATTERN = "__riotgen_%s.cache"
+CONFIG_CACHE_ENV = "RIOTGEN_CONFIG_CACHE"
+CONFIG_CACHE_SUFFIX = ".config.json"
+CONFIG_CACHE_STATS = "stats.json"
+
+# Subdirectories of a version cache directory
+CACHE_NAMES = ("templates", "configs", "riotbase")
+VERSION_DIR_NAME = re.compile(r"^\d+\.\d+")
+
+TRUE_VALUES = ("1", "y", "yes", "true")
+
+
+def get_cache_dir():
+    """Return the riotgen user cache directory."""
+    cache_dir = os.getenv(CACHE_DIR_ENV)
+    if cache_dir:
+        return os.path.abspath(os.path.expanduser(cache_dir))
+    base_dir = os.getenv("XDG_CACHE_HOME") or os.getenv("LOCALAPPDATA")
+    if not base_dir:
+        base_dir = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base_dir, "riotgen")
+
+
+def bytecode_cache_enabled():
+    """Return True if the persistent bytecode cache was enabled."""
+    return os.getenv(BYTECODE_CACHE_ENV, "").lower() in TRUE_VALUES
+
+
+def config_cache_enabled():
+    """Return True if the persistent config cache was enabled."""
+    return os.getenv(CONFIG_CACHE_ENV, "").lower() in TRUE_VALUES
+
+
+def get_version_cache_dir(name):
+    """Return a cache subdirectory specific to the riotgen version."""
+    return os.path.join(get_cache_dir(), __version__, name)
+
+
+class BoundedBytecodeCache(FileSystemBytecodeCache):
+    """Jinja2 bytecode cache evicting least recently used entries.
+
+    Entries are stored in a directory specific to the riotgen version. Jinja2
+    itself invalidates an entry when the checksum of the template source
+    changes.
+    """
+
+    def __init__(self, directory, max_size=BYTECODE_CACHE_MAX_SIZE):
+        super().__init__(directory, pattern=BYTECODE_CACHE_PATTERN)
+        self.max_size = max_size
+
+    def _entries(self):
+        prefix, suffix = BYTECODE_CACHE_PATTERN.split("%s")
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.startswith(prefix):
+                continue
+            if not entry.name.endswith(suffix):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def load_bytecode(self, bucket):
+        super().load_bytecode(bucket)
+        record_cache("templates", bucket.code is not None)
+        if bucket.code is not None:
+            try:
+                os.utime(self._get_cache_filename(bucket))
+            except OSError:
+                pass
+
+    def dump_bytecode(self, bucket):
+        super().dump_bytecode(bucket)
+        self.evict()
+
+    def evict(self):
+        """Remove the oldest entries until the cache fits in max_size."""
+        entries = sorted(self._entries())
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
+
+
+def evict_cache_files(directory, max_entries):
+    """Remove the oldest files of a cache directory beyond max_entries."""
+    entries = []
+    try:
+        scanned = list(os.scandir(directory))
+    except OSError:
+        return
+    for entry in scanned:
+        try:
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                entries.append((entry.stat().st_mtime, entry.path))
+        except OSError:
+            continue
+    entries.sort(reverse=True)
+    for _, path in entries[max_entries:]:
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+
+
+def get_bytecode_cache():
+    """Return the persistent bytecode cache, or None when disabled.
+
+    The cache is disabled unless the RIOTGEN_BYTECODE_CACHE environment
+    variable is set, or when the cache directory cannot be created.
+    """
+    if not bytecode_cache_enabled():
+        return None
+    directory = get_version_cache_dir("templates")
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError:
+        return None
+    if not os.access(directory, os.W_OK):
+        return None
+    return BoundedBytecodeCache(directory)
+
+
+def get_config_cache_key(content, command_args=()):
+    """Return the cache key of a config content parsed for some commands."""
+    digest = hashlib.sha256(content.encode())
+    for command in command_args:
+        digest.update(b"\0" + command.encode())
+    return digest.hexdigest()
+
+
+def _read_config_cache_stats(directory):
+    stats = {"hits": 0, "misses": 0}
+    try:
+        with open(os.path.join(directory, CONFIG_CACHE_STATS)) as f_stats:
+            stats.update(json.load(f_stats))
+    except (OSError, ValueError):
+        pass
+    return stats
+
+
+def _update_config_cache_stats(directory, counter):
+    path = os.path.join(directory, CONFIG_CACHE_STATS)
+    stats = _read_config_cache_stats(directory)
+    stats[counter] += 1
+    try:
+        with open(path, "w") as f_stats:
+            json.dump(stats, f_stats)
+    except OSError:
+        pass
+
+
+def _owned_by_user(f_cache):
+    if not hasattr(os, "getuid"):
+        return True
+    return os.fstat(f_cache.fileno()).st_uid == os.getuid()
+
+
+def load_cached_config(key):
+    """Return the cached params of a config, None on cache miss.
+
+    The cache directory can be shared, entries written by other users are
+    ignored.
+    """
+    directory = get_version_cache_dir("configs")
+    path = os.path.join(directory, key + CONFIG_CACHE_SUFFIX)
+    try:
+        with open(path) as f_cache:
+            params = json.load(f_cache) if _owned_by_user(f_cache) else None
+    except (OSError, ValueError):
+        params = None
+    if params is None:
+        record_cache("configs", False)
+        return None
+    record_cache("configs", True)
+    _update_config_cache_stats(directory, "hits")
+    return params
+
+
+def store_cached_config(key, params):
+    """Store the params of a config after a cache miss.
+
+    The cache is best effort, errors are ignored. Params which can't be
+    stored as JSON without changes, e.g. with YAML dates, aren't cached.
+    """
+    try:
+        content = json.dumps(params)
+    except (TypeError, ValueError):
+        return
+    if json.loads(content) != params:
+        return
+    directory = get_version_cache_dir("configs")
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f_cache:
+            f_cache.write(content)
+        os.replace(path, os.path.join(directory, key + CONFIG_CACHE_SUFFIX))
+    except OSError:
+        return
+    _update_config_cache_stats(directory, "misses")
+
+
+def _get_entries_stats(directory, suffix):
+    count = 0
+    size = 0
+    if os.path.isdir(directory):
+        for entry in os.scandir(directory):
+            if entry.name.endswith(suffix):
+                count += 1
+                size += entry.stat().st_size
+    return count, size
+
+
+def get_cache_stats():
+    """Return the statistics of the caches of the current version."""
+    templates_dir = get_version_cache_dir("templates")
+    configs_dir = get_version_cache_dir("configs")
+    _, suffix = BYTECODE_CACHE_PATTERN.split("%s")
+    templates_count, templates_size = _get_entries_stats(templates_dir, suffix)
+    configs_count, configs_size = _get_entries_stats(
+        configs_dir, CONFIG_CACHE_SUFFIX
+    )
+    return {
+        "directory": get_cache_dir(),
+        "templates": {
+            "enabled": bytecode_cache_enabled(),
+            "entries": templates_count,
+            "size": templates_size,
+        },
+        "configs": {
+            "enabled": config_cache_enabled(),
+            "entries": configs_count,
+            "size": configs_size,
+            **_read_config_cache_stats(configs_dir),
+        },
+    }
+
+
+def _is_version_cache_dir(entry):
+    if not VERSION_DIR_NAME.match(entry.name):
+        return False
+    if not entry.is_dir(follow_symlinks=False):
+        return False
+    try:
+        return set(os.listdir(entry.path)) <= set(CACHE_NAMES)
+    except OSError:
+        return False
+
+
+def clear_cache():
+    """Remove the cached data of all riotgen versions.
+
+    The cache directory can be shared with other tools, only the version
+    subdirectories created by riotgen are removed.
+    """
+    try:
+        entries = list(os.scandir(get_cache_dir()))
+    except OSError:
+        return
+    for entry in entries:
+        if _is_version_cache_dir(entry):
+            shutil.rmtree(entry.path, ignore_errors=True)
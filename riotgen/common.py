@@ -1,67 +1,181 @@
-"""Common generator module."""
+"""Common generator module.
+
+yaml and jinja2 are only imported on first use to keep the startup time low.
+"""
+
+# pylint:disable=import-outside-toplevel
 
 import datetime
+import hashlib
 import os
+import re
 import textwrap
-from configparser import ConfigParser, ParsingError
+from configparser import ConfigParser
+from configparser import Error as ConfigParserError
 
-import yaml
-from click import Abort, BadParameter, Choice, MissingParameter, prompt
-from jinja2 import Environment, FileSystemLoader
+from click import Abort, Choice, echo, prompt, style
 
+from riotgen import __version__
+from riotgen.errors import MissingParameterError, ParameterError
+from riotgen.metrics import measure_render
+from riotgen.params import PARAMS_LIST_AVAILABLE, replace_params
+from riotgen.plan import write_file
+from riotgen.timing import phase, timed
 from riotgen.utils import get_usermail, get_username, parse_list_option
 
 TEMPLATE_BASE_DIR = os.path.join(
     os.path.dirname(os.path.abspath(__file__)), "templates"
 )
 
-PARAMS_LIST_AVAILABLE = [
-    "modules",
-    "packages",
-    "features_required",
-    "features_provided",
-]
+PRECOMPILED_TEMPLATE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "templates_compiled"
+)
+
+PRECOMPILED_STAMP = "VERSION"
 
 LICENSES = ["LGPL21", "BSD", "MIT", "MPL2", "Apache2", "AGPL3"]
 
+LICENSES_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "licenses"
+)
+
+LICENSE_PREFIXES = (" * ", "# ")
+
+TEMPLATE_ENV_OPTIONS = {
+    "trim_blocks": True,
+    "lstrip_blocks": True,
+    "keep_trailing_newline": True,
+}
+
+INI_SECTION = re.compile(r"^\[[^\[\],:]+\]$")
+
+TEMPLATE_REFERENCE = re.compile(
+    r"""{%-?\s*(?:include|import|extends|from)\s+["']([^"']+)["']"""
+)
+
+_ENVIRONMENTS = {}
+_TEMPLATE_HASHES = {}
+_LICENSE_FILES = {}
+_LICENSE_TEXTS = {}
+_LICENSE_HEADERS = {}
+
+
+def _get_yaml_loader():
+    import yaml
+
+    # The libyaml based loader is much faster, when available
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def is_ini_config(content):
+    """Return True if a configuration content looks like an INI file."""
+    for line in content.splitlines():
+        line = line.strip()
+        if not line or line.startswith(("#", ";")):
+            continue
+        return INI_SECTION.match(line) is not None
+    return False
+
+
+def _merge_documents(documents):
+    """Merge the documents of a multi-document YAML configuration.
+
+    Lists are concatenated and mappings are merged, so that the entities of a
+    batch configuration can be split in several documents.
+    """
+    params = None
+    for document in documents:
+        if document is None:
+            continue
+        if params is None:
+            params = document
+            continue
+        if not isinstance(params, dict) or not isinstance(document, dict):
+            raise ParameterError("Configuration documents must be mappings")
+        for key, value in document.items():
+            previous = params.get(key)
+            if isinstance(previous, list) and isinstance(value, list):
+                params[key] = previous + value
+            elif isinstance(previous, dict) and isinstance(value, dict):
+                params[key] = {**previous, **value}
+            else:
+                params[key] = value
+    return params
+
 
+@timed("config")
 def read_config_file(config_file, *command_args):
-    """Read a configuration file and return the content as a dict."""
-    try:
-        params = yaml.load(config_file, Loader=yaml.FullLoader)
-    except yaml.parser.ParserError:
+    """Read a configuration file and return the content as a dict.
+
+    The format, YAML or INI, is detected from the first lines of the file.
+    When the config cache is enabled, the parsed params are cached by content
+    hash.
+    """
+    from riotgen.cache import (
+        config_cache_enabled,
+        get_config_cache_key,
+        load_cached_config,
+        store_cached_config,
+    )
+
+    content = config_file.read()
+    cache_key = None
+    if config_cache_enabled():
+        cache_key = get_config_cache_key(content, command_args)
+        params = load_cached_config(cache_key)
+        if params is not None:
+            return params
+
+    if is_ini_config(content):
         try:
-            config_file.seek(0)
             parser = ConfigParser()
-            parser.read_file(config_file)
-            params = parser._sections  # pylint:disable=protected-access
-        except ParsingError:
-            # pylint: disable=raise-missing-from
-            raise BadParameter(
-                "Cannot parse config file '{config_file.filename}'"
-            )
+            parser.read_string(content)
+        except ConfigParserError as exc:
+            raise ParameterError(
+                f"Cannot parse config file '{config_file.name}'"
+            ) from exc
+        params = parser._sections  # pylint:disable=protected-access
+    else:
+        import yaml
 
-    for command in command_args:
-        if command not in params:
-            continue
-        _params = params[command]
-        for param in PARAMS_LIST_AVAILABLE:
-            if param not in _params:
-                _params[param] = []
-            else:
-                _params[param] = parse_list_option(_params[param])
+        try:
+            params = _merge_documents(
+                yaml.load_all(content, Loader=_get_yaml_loader())
+            )
+        except yaml.YAMLError as exc:
+            raise ParameterError(
+                f"Cannot parse config file '{config_file.name}'"
+            ) from exc
+
+    if isinstance(params, dict):
+        for command in command_args:
+            if command not in params:
+                continue
+            parse_list_params(params[command])
+
+    if cache_key is not None and params is not None:
+        store_cached_config(cache_key, params)
     return params
 
 
+def parse_list_params(params):
+    """Parse the list parameters of a group of parameters."""
+    for param in PARAMS_LIST_AVAILABLE:
+        if param not in params:
+            params[param] = []
+        else:
+            params[param] = parse_list_option(params[param])
+
+
 def check_riotbase(riotbase):
     """Check the given path is a valid RIOTBASE directory."""
     if riotbase is None or not riotbase:
-        raise MissingParameter(param_type="riotbase directory")
+        raise MissingParameterError("riotbase directory")
 
 
 def _check_param(params, param):
     if param not in params or params[param] == "":
-        raise MissingParameter(param_type=param.replace("_", " "))
+        raise MissingParameterError(param.replace("_", " "))
 
 
 def check_global_params(params):
@@ -84,7 +198,7 @@ def check_global_params(params):
 def check_params(params, params_descriptor, group):
     """Check a list of parameters."""
     if group not in params:
-        raise BadParameter(f"'{group}' group not in parameters.")
+        raise ParameterError(f"'{group}' group not in parameters.")
     for param_name, param_values in params_descriptor.items():
         if param_name not in params[group] or params[group][param_name] == "":
             if (
@@ -93,7 +207,7 @@ def check_params(params, params_descriptor, group):
             ):
                 params[group][param_name] = param_values["kwargs"]["default"]
             else:
-                raise MissingParameter(param_type=param_name.replace("_", " "))
+                raise MissingParameterError(param_name.replace("_", " "))
         if param_name == "name":
             param = params[group][param_name]
             params[group][param_name] = param.replace(" ", "_")
@@ -161,29 +275,146 @@ def prompt_global_params(params):
     )
 
 
-def render_file(context, group, source, dest):
-    """Generate a file from an input template and a dict of parameters."""
-    loader = FileSystemLoader(searchpath=TEMPLATE_BASE_DIR)
+def get_templates_sources_hash():
+    """Return a hash of the sources of all the bundled templates."""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(TEMPLATE_BASE_DIR):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.endswith(".j2"):
+                continue
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, TEMPLATE_BASE_DIR).encode())
+            with open(path, "rb") as f_template:
+                digest.update(hashlib.sha256(f_template.read()).digest())
+    return digest.hexdigest()
+
+
+def _get_precompiled_stamp():
+    return f"{__version__}\n{get_templates_sources_hash()}\n"
+
+
+def precompiled_templates_available():
+    """Return True if templates precompiled from the sources are available.
+
+    The precompiled modules are stamped with the version and a hash of the
+    template sources, so that they are ignored once a template is edited.
+    """
+    stamp = os.path.join(PRECOMPILED_TEMPLATE_DIR, PRECOMPILED_STAMP)
+    try:
+        with open(stamp) as f_stamp:
+            return f_stamp.read() == _get_precompiled_stamp()
+    except OSError:
+        return False
+
+
+def _get_loader(searchpath):
+    from jinja2 import ChoiceLoader, FileSystemLoader, ModuleLoader
+
+    loader = FileSystemLoader(searchpath=searchpath)
+    if searchpath == TEMPLATE_BASE_DIR and precompiled_templates_available():
+        return ChoiceLoader([ModuleLoader(PRECOMPILED_TEMPLATE_DIR), loader])
+    return loader
+
+
+def compile_templates(target=None):
+    """Precompile the bundled templates into importable Python modules."""
+    from jinja2 import Environment, FileSystemLoader
+
+    if target is None:
+        target = PRECOMPILED_TEMPLATE_DIR
     env = Environment(
-        loader=loader,
-        trim_blocks=True,
-        lstrip_blocks=True,
-        keep_trailing_newline=True,
+        loader=FileSystemLoader(searchpath=TEMPLATE_BASE_DIR),
+        **TEMPLATE_ENV_OPTIONS,
+    )
+    env.compile_templates(
+        target, extensions=["j2"], zip=None, ignore_errors=False
     )
+    with open(os.path.join(target, PRECOMPILED_STAMP), "w") as f_stamp:
+        f_stamp.write(_get_precompiled_stamp())
+
+
+def get_environment(searchpath=None, **options):
+    """Return the shared Jinja2 environment for a template directory.
+
+    Environments are created on first use and kept for the whole process,
+    keyed by search path and options, so that compiled templates are reused
+    across all rendered files. The bundled templates are loaded from their
+    precompiled modules when available, a custom search path always uses the
+    template sources. The persistent bytecode cache is attached when enabled.
+    """
+    if searchpath is None:
+        searchpath = TEMPLATE_BASE_DIR
+    options = {**TEMPLATE_ENV_OPTIONS, **options}
+    key = (searchpath, tuple(sorted(options.items())))
+    if key not in _ENVIRONMENTS:
+        from jinja2 import Environment
+
+        from riotgen.cache import get_bytecode_cache
+
+        env = Environment(
+            loader=_get_loader(searchpath),
+            bytecode_cache=get_bytecode_cache(),
+            **options,
+        )
+        env.globals.update(zip=zip)
+        _ENVIRONMENTS[key] = env
+    return _ENVIRONMENTS[key]
+
+
+def reset_environments():
+    """Drop all the cached Jinja2 environments."""
+    _ENVIRONMENTS.clear()
+    _TEMPLATE_HASHES.clear()
+
+
+def preload_templates():
+    """Load and compile all the bundled templates in the shared environment."""
+    from jinja2 import FileSystemLoader
+
+    env = get_environment()
+    for name in FileSystemLoader(TEMPLATE_BASE_DIR).list_templates():
+        env.get_template(name)
+
+
+def get_template_hash(name):
+    """Return a hash of a bundled template and of the templates it includes."""
+    key = (TEMPLATE_BASE_DIR, name)
+    if key not in _TEMPLATE_HASHES:
+        with open(os.path.join(TEMPLATE_BASE_DIR, name)) as f_template:
+            source = f_template.read()
+        digest = hashlib.sha256(source.encode())
+        for reference in sorted(set(TEMPLATE_REFERENCE.findall(source))):
+            digest.update(get_template_hash(reference).encode())
+        _TEMPLATE_HASHES[key] = digest.hexdigest()
+    return _TEMPLATE_HASHES[key]
+
+
+def render_template(context, group, source):
+    """Render an input template with a dict of parameters."""
     source_file = group + "/" + source
-    env.globals.update(zip=zip)
-    template = env.get_template(source_file)
-    render = template.render(**context)
-    with open(dest, "w") as f_dest:
-        f_dest.write(render)
+    with phase("templates"):
+        template = get_environment().get_template(source_file)
+    with phase("render"), measure_render(source_file):
+        return template.render(**context)
+
+
+def render_file(context, group, source, dest):
+    """Generate a file from an input template and a dict of parameters."""
+    write_file(dest, render_template(context, group, source))
+
 
+def render_source(context, group, input_files, output_dir, plan=None):
+    """Generate a list of files given from an input template directory.
 
-def render_source(context, group, input_files, output_dir):
-    """Generate a list of files given from an input template directory."""
+    When a render plan is given, the rendered files are added to it instead
+    of being written, except those of the templates skipped by the plan.
+    """
     output_dir = os.path.abspath(os.path.expanduser(output_dir))
 
-    if not os.path.isdir(output_dir):
-        os.makedirs(output_dir)
+    if plan is None:
+        # Several generators running in parallel may share output directories
+        os.makedirs(output_dir, exist_ok=True)
 
     for source, dest in input_files.items():
         if dest is None:
@@ -191,24 +422,74 @@ def render_source(context, group, input_files, output_dir):
         else:
             dest = dest.format(name=context[group]["name"])
         dest = os.path.join(output_dir, dest)
-        render_file(context, group, source + ".j2", dest)
+        if plan is None:
+            render_file(context, group, source + ".j2", dest)
+            continue
+        template = group + "/" + source + ".j2"
+        if template in plan.skipped_templates:
+            continue
+        plan.add(
+            dest,
+            render_template(context, group, source + ".j2"),
+            template=template,
+        )
 
 
+def register_license(name, filename):
+    """Register a custom license file, usable like the bundled licenses."""
+    if name not in LICENSES:
+        LICENSES.append(name)
+    _LICENSE_FILES[name] = os.path.abspath(os.path.expanduser(filename))
+    _LICENSE_TEXTS.pop(name, None)
+    for key in [key for key in _LICENSE_HEADERS if key[0] == name]:
+        del _LICENSE_HEADERS[key]
+
+
+def _get_license_text(name):
+    if name not in _LICENSE_TEXTS:
+        if name not in LICENSES:
+            raise ParameterError(f"Unknown license '{name}'")
+        filename = _LICENSE_FILES.get(name)
+        if filename is None:
+            filename = os.path.join(LICENSES_DIR, name + ".txt")
+        with open(filename) as f_license:
+            text = f_license.read()
+        _LICENSE_TEXTS[name] = text
+        for prefix in LICENSE_PREFIXES:
+            _LICENSE_HEADERS[(name, prefix)] = textwrap.indent(text, prefix)
+    return _LICENSE_TEXTS[name]
+
+
+def get_license_header(name, prefix):
+    """Return a license text with each line prefixed by a comment prefix.
+
+    License files are only read once per process, the headers with the
+    usual comment prefixes are computed at the same time.
+    """
+    key = (name, prefix)
+    if key not in _LICENSE_HEADERS:
+        text = _get_license_text(name)
+        _LICENSE_HEADERS.setdefault(key, textwrap.indent(text, prefix))
+    return _LICENSE_HEADERS[key]
+
+
+@timed("license")
 def load_license(params, prefix):
-    """Load the license_header in params from the data."""
-    licences_dir = os.path.join(
-        os.path.dirname(os.path.abspath(__file__)), "data", "licenses"
-    )
+    """Load the license_header in params from the data.
 
+    Return the params, dicts are updated in place and records are copied.
+    """
     if "global" in params and "license" in params["global"]:
-        with open(
-            os.path.join(licences_dir, params["global"]["license"] + ".txt")
-        ) as f_license:
-            license_header = textwrap.indent(f_license.read(), prefix)
-            params["global"]["license_header"] = license_header
+        license_header = get_license_header(
+            params["global"]["license"], prefix
+        )
+        params = replace_params(
+            params, "global", license_header=license_header
+        )
+    return params
 
 
-def load_and_check_params(
+def load_params(
     group,
     params_descriptor,
     params_as_list,
@@ -217,11 +498,12 @@ def load_and_check_params(
     riotbase,
     in_riot_dir=None,
 ):
-    """Load, prompt and check configuration parameters."""
+    """Load and prompt configuration parameters.
+
+    Return the parameters as a dict, they are checked when the job is loaded.
+    """
     if not interactive and config is None:
-        raise MissingParameter(
-            param_type="--interactive and/or --config options"
-        )
+        raise MissingParameterError("--interactive and/or --config options")
 
     check_riotbase(riotbase)
     riotbase = os.path.abspath(os.path.expanduser(riotbase))
@@ -229,25 +511,108 @@ def load_and_check_params(
     params = {group: {}, "global": {}}
     if config is not None:
         params = read_config_file(config, group)
+    if not isinstance(params, dict):
+        raise ParameterError(f"Invalid config file '{config.name}'")
+    if interactive:
+        params.setdefault(group, {})
+        params.setdefault("global", {})
+    elif group not in params:
+        raise ParameterError(f"'{group}' group not in parameters.")
+
+    init_params(params, group, riotbase, in_riot_dir)
+
+    if interactive:
+        with phase("prompt"):
+            prompt_params(params, params_descriptor, group)
+            prompt_params_list(params, group, *params_as_list)
+            prompt_global_params(params)
+
+    return params
+
+
+def generate_entity(
+    command,
+    interactive,
+    config,
+    riotbase,
+    output_dir=None,
+    dry_run=False,
+    output_archive=None,
+    resolve_deps=False,
+):
+    """Generate the code of an entity from the command line.
+
+    The parameters are loaded from the config file and prompted, the job is
+    then loaded and rendered by the API. Return True when the files were
+    written.
+    """
+    from riotgen.api import GENERATORS, load_job, render_job
+    from riotgen.plan import RenderPlan, commit_plan
+    from riotgen.riotbase import check_riotbase_params
+
+    generator = GENERATORS[command]
+    group = generator["group"]
+    params = load_params(
+        group,
+        generator["params"],
+        generator["params_list"],
+        interactive,
+        config,
+        riotbase,
+        generator["in_riot_dir"],
+    )
+    riotbase = os.path.abspath(os.path.expanduser(riotbase))
+    job = load_job(
+        command,
+        params[group],
+        riotbase,
+        params.get("global"),
+        output_dir,
+        resolve_deps,
+    )
+    _, params, output_dir = job
+
+    for warning in check_riotbase_params(params, group, riotbase):
+        echo(style(f"Warning: {warning}", fg="yellow"), err=True)
+
+    if (
+        generator["in_riot_dir"] is not None
+        and not dry_run
+        and output_archive is None
+    ):
+        check_overwrite(output_dir)
+
+    plan = render_job(job, riotbase, RenderPlan())
+    if not commit_plan(plan, dry_run, output_archive, riotbase):
+        return False
+
+    echo(
+        style(
+            f"{generator['label']} '{params[group]['name']}' generated "
+            f"in {output_dir} with success!",
+            bold=True,
+        )
+    )
+    return True
+
 
+def init_params(params, group, riotbase, in_riot_dir=None):
+    """Set the parameters depending on the RIOTBASE directory."""
     if in_riot_dir is None:
         params[group]["riotbase"] = riotbase
     elif "global" in params:
         params["global"]["license"] = "LGPL21"
 
-    if interactive:
-        prompt_params(params, params_descriptor, group)
-        prompt_params_list(params, group, *params_as_list)
-        prompt_global_params(params)
 
+@timed("check")
+def check_all_params(params, params_descriptor, group):
+    """Load the license header and check group and global parameters."""
     load_license(params, " * ")
 
     check_params(params, params_descriptor, group)
     if "global" in params:
         check_global_params(params)
 
-    return params
-
 
 def check_overwrite(output_dir):
     """Check if output directory exists and prompt for overwrite."""
@@ -0,0 +1,285 @@
+"""RIOT dependency resolver module.
+
+The Makefile.dep files of a RIOT checkout are parsed into a graph of the
+modules and features each module depends on, stored in the cache per git
+commit. The features provided by a board are read from the Makefile.features
+files of the board and of its CPU.
+
+Only the common forms of dependencies are understood: unconditional
+dependencies of a module in its own Makefile.dep, and dependencies under a
+single ``ifneq (,$(filter <modules>,$(USEMODULE)))`` condition. Other
+conditions may depend on the board, so they are ignored.
+"""
+
+import json
+import os
+import re
+
+from riotgen.cache import evict_cache_files, get_version_cache_dir
+from riotgen.errors import ParameterError
+from riotgen.riotbase import (
+    BOARD_ALIASES,
+    INDEX_CACHE_MAX_ENTRIES,
+    get_riotbase_commit,
+)
+from riotgen.timing import timed
+
+DEPS_DIRS = ("sys", "drivers", "pkg")
+
+USED_CONDITION = re.compile(
+    r"^ifneq\s*\(\s*,\s*\$\(filter\s+([^,]+),\s*"
+    r"\$\((?:USEMODULE|USEPKG)\)\s*\)\s*\)$"
+)
+DEPENDENCY = re.compile(r"^(USEMODULE|USEPKG|FEATURES_REQUIRED)\s*\+=\s*(.*)$")
+ASSIGNMENT = re.compile(r"^([A-Z_]+)\s*[:?]?=\s*(\S+)$")
+FEATURES_PROVIDED = re.compile(r"^FEATURES_PROVIDED\s*[:+?]?=\s*(.*)$")
+INCLUDE = re.compile(r"^-?include\s+(\S+)$")
+VARIABLE = re.compile(r"\$\(([A-Z_]+)\)")
+
+_GRAPHS = {}
+_BOARD_FEATURES = {}
+
+
+def _read_lines(path):
+    try:
+        with open(path, errors="replace") as f_make:
+            content = f_make.read()
+    except OSError:
+        return []
+    lines = []
+    for line in content.replace("\\\n", " ").splitlines():
+        line = line.split("#")[0].strip()
+        if line:
+            lines.append(line)
+    return lines
+
+
+def _split_values(values):
+    return [value for value in values.split() if not set(value) & set("$%")]
+
+
+def parse_dep_file(path, graph, owner=None):
+    """Add the dependencies of a Makefile.dep file to a graph.
+
+    owner is the module of the directory containing the file, unconditional
+    dependencies are its dependencies.
+    """
+    conditions = []
+    for line in _read_lines(path):
+        if line.startswith("if"):
+            used = USED_CONDITION.match(line)
+            conditions.append(
+                _split_values(used.group(1)) if used is not None else None
+            )
+            continue
+        if line.startswith("else"):
+            if conditions:
+                conditions[-1] = None
+            continue
+        if line.startswith("endif"):
+            if conditions:
+                conditions.pop()
+            continue
+
+        dependency = DEPENDENCY.match(line)
+        if dependency is None:
+            continue
+        if not conditions:
+            modules = [owner] if owner is not None else []
+        elif len(conditions) == 1 and conditions[0] is not None:
+            modules = conditions[0]
+        else:
+            continue
+        key = "modules"
+        if dependency.group(1) == "FEATURES_REQUIRED":
+            key = "features"
+        for module in modules:
+            entry = graph.setdefault(module, {"modules": [], "features": []})
+            for value in _split_values(dependency.group(2)):
+                if value not in entry[key] and value != module:
+                    entry[key].append(value)
+    return graph
+
+
+def build_dependency_graph(riotbase):
+    """Return the dependency graph of a RIOT checkout.
+
+    The graph maps each module to the modules and features it depends on.
+    """
+    graph = {}
+    parse_dep_file(os.path.join(riotbase, "Makefile.dep"), graph)
+    for base in DEPS_DIRS:
+        base_dir = os.path.join(riotbase, base)
+        for root, dirs, files in os.walk(base_dir):
+            dirs[:] = sorted(name for name in dirs if name[0] != ".")
+            if "Makefile.dep" not in files:
+                continue
+            owner = None if root == base_dir else os.path.basename(root)
+            parse_dep_file(os.path.join(root, "Makefile.dep"), graph, owner)
+    for entry in graph.values():
+        entry["modules"].sort()
+        entry["features"].sort()
+    return graph
+
+
+def get_dependency_graph(riotbase):
+    """Return the dependency graph of a RIOT checkout, from the cache.
+
+    The graph of a git checkout is only built once per commit.
+    """
+    riotbase = os.path.abspath(os.path.expanduser(riotbase))
+    commit = get_riotbase_commit(riotbase)
+    key = (riotbase, commit)
+    if key in _GRAPHS:
+        return _GRAPHS[key]
+
+    graph = None
+    graph_path = None
+    if commit is not None:
+        graph_path = os.path.join(
+            get_version_cache_dir("riotbase"), f"{commit}.deps.json"
+        )
+        try:
+            with open(graph_path) as f_graph:
+                graph = json.load(f_graph)
+        except (OSError, ValueError):
+            graph = None
+    if graph is None:
+        graph = build_dependency_graph(riotbase)
+        # Graphs of directories without any dependency aren't stored
+        if graph_path is not None and graph:
+            try:
+                os.makedirs(os.path.dirname(graph_path), exist_ok=True)
+                tmp_path = f"{graph_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w") as f_graph:
+                    json.dump(graph, f_graph)
+                os.replace(tmp_path, graph_path)
+            except OSError:
+                pass
+            evict_cache_files(
+                os.path.dirname(graph_path), INDEX_CACHE_MAX_ENTRIES
+            )
+
+    _GRAPHS[key] = graph
+    return graph
+
+
+def _parse_features_file(path, variables, features, seen):
+    if path in seen:
+        return
+    seen.add(path)
+    for line in _read_lines(path):
+        provided = FEATURES_PROVIDED.match(line)
+        if provided is not None:
+            features.update(_split_values(provided.group(1)))
+            continue
+        include = INCLUDE.match(line)
+        if include is not None:
+            included = VARIABLE.sub(
+                lambda match: variables.get(match.group(1), "$"),
+                include.group(1),
+            )
+            if "$" not in included:
+                _parse_features_file(included, variables, features, seen)
+            continue
+        assignment = ASSIGNMENT.match(line)
+        if assignment is not None and "$" not in assignment.group(2):
+            variables.setdefault(assignment.group(1), assignment.group(2))
+
+
+def get_board_features(riotbase, board):
+    """Return the features provided by a board, None if it's unknown."""
+    riotbase = os.path.abspath(os.path.expanduser(riotbase))
+    key = (riotbase, board)
+    if key in _BOARD_FEATURES:
+        return _BOARD_FEATURES[key]
+
+    features = None
+    for name in (board, *BOARD_ALIASES.get(board, ())):
+        board_dir = os.path.join(riotbase, "boards", name)
+        if not os.path.isdir(board_dir):
+            continue
+        features = set()
+        seen = set()
+        variables = {
+            "RIOTBASE": riotbase,
+            "RIOTBOARD": os.path.join(riotbase, "boards"),
+            "RIOTCPU": os.path.join(riotbase, "cpu"),
+            "BOARD": name,
+        }
+        _parse_features_file(
+            os.path.join(board_dir, "Makefile.features"),
+            variables,
+            features,
+            seen,
+        )
+        if "CPU" in variables:
+            cpu_dir = os.path.join(riotbase, "cpu", variables["CPU"])
+            _parse_features_file(
+                os.path.join(cpu_dir, "Makefile.features"),
+                variables,
+                features,
+                seen,
+            )
+        break
+
+    _BOARD_FEATURES[key] = features
+    return features
+
+
+def resolve_dependencies(graph, modules):
+    """Return the transitive closure of the dependencies of modules.
+
+    Return the sorted lists of the required modules and features, and the
+    first module requiring each feature.
+    """
+    resolved = {}
+    required_by = {}
+    pending = list(modules)
+    while pending:
+        module = pending.pop(0)
+        if module in resolved:
+            continue
+        entry = graph.get(module, {})
+        resolved[module] = entry
+        for feature in entry.get("features", ()):
+            required_by.setdefault(feature, module)
+        pending.extend(entry.get("modules", ()))
+    return sorted(resolved), sorted(required_by), required_by
+
+
+@timed("riotbase")
+def resolve_application_dependencies(params, group, riotbase):
+    """Resolve the dependencies of an application.
+
+    Return the resolved modules and features. Raise ParameterError when the
+    target board doesn't provide all required features.
+    """
+    application = params[group]
+    requested = [
+        *application.get("modules", ()),
+        *application.get("packages", ()),
+    ]
+    graph = get_dependency_graph(riotbase)
+    modules, features, required_by = resolve_dependencies(graph, requested)
+    features = sorted({*features, *application.get("features_required", ())})
+
+    board = application.get("board")
+    provided = get_board_features(riotbase, board) if board else None
+    if provided is not None:
+        missing = [
+            (
+                f"{feature} (required by {required_by[feature]})"
+                if feature in required_by
+                else feature
+            )
+            for feature in features
+            if feature not in provided
+        ]
+        if missing:
+            raise ParameterError(
+                f"Board '{board}' doesn't provide the required features: "
+                f"{', '.join(missing)}"
+            )
+
+    return {"modules": modules, "features": features}
@@ -4,12 +4,9 @@ import os
 
 import click
 
-from riotgen.common import (
-    check_overwrite,
-    load_and_check_params,
-    load_license,
-    render_source,
-)
+from riotgen.common import generate_entity, load_license, render_source
+from riotgen.metrics import measure_command
+from riotgen.params import make_params_model
 
 DRIVER_PARENTS = [
     "actuators",
@@ -39,6 +36,8 @@ DRIVER_PARAMS = {
     },
 }
 
+Driver = make_params_model("Driver", "driver", DRIVER_PARAMS, module=__name__)
+
 DRIVER_FILES = {
     "driver.c": "{name}.c",
     "Makefile": None,
@@ -64,50 +63,49 @@ DRIVER_NETDEV_INCLUDE_FILES = {
 }
 
 
-def generate_driver(interactive, config, riotbase):
-    """Generate the code for a driver module."""
+def render_driver(params, riotbase, output_dir, plan):
+    """Render the code of a driver module."""
     group = "driver"
-    params = load_and_check_params(
-        group,
-        DRIVER_PARAMS,
-        DRIVER_PARAMS_LIST,
-        interactive,
-        config,
-        riotbase,
-        "drivers",
-    )
-
-    drivers_dir = os.path.join(riotbase, "drivers")
-    drivers_include_dir = os.path.join(drivers_dir, "include")
-    output_dir = os.path.join(drivers_dir, params[group]["name"])
+    drivers_include_dir = os.path.join(riotbase, "drivers", "include")
     drivers_internal_include_dir = os.path.join(output_dir, "include")
-    check_overwrite(output_dir)
-    render_source(params, group, DRIVER_FILES, output_dir)
-    render_source(params, group, DRIVER_INCLUDE_FILES, drivers_include_dir)
+    render_source(params, group, DRIVER_FILES, output_dir, plan)
+    render_source(
+        params, group, DRIVER_INCLUDE_FILES, drivers_include_dir, plan
+    )
     render_source(
         params,
         group,
         DRIVER_INTERNAL_INCLUDE_FILES,
         drivers_internal_include_dir,
+        plan,
     )
 
     if params[group]["ingroup"] == "netdev":
-        render_source(params, group, DRIVER_NETDEV_FILES, output_dir)
+        render_source(params, group, DRIVER_NETDEV_FILES, output_dir, plan)
         render_source(
             params,
             group,
             DRIVER_NETDEV_INCLUDE_FILES,
             drivers_internal_include_dir,
+            plan,
         )
 
     # Generate the Kconfig file separately because of the different license
     # format
-    load_license(params, "# ")
-    render_source(params, group, {"Kconfig": None}, output_dir)
+    params = load_license(params, "# ")
+    render_source(params, group, {"Kconfig": None}, output_dir, plan)
 
-    click.echo(
-        click.style(
-            f"Driver '{params[group]['name']}' generated in {output_dir} with success!",
-            bold=True,
-        )
+
+@measure_command("driver")
+def generate_driver(
+    interactive, config, riotbase, dry_run=False, output_archive=None
+):
+    """Generate the code for a driver module."""
+    generate_entity(
+        "driver",
+        interactive,
+        config,
+        riotbase,
+        dry_run=dry_run,
+        output_archive=output_archive,
     )
@@ -0,0 +1,28 @@
+"""Errors module.
+
+The generators raise these exceptions, the command line converts them to
+click exceptions.
+"""
+
+
+class RiotgenError(Exception):
+    """Base class of the riotgen errors."""
+
+
+class ParameterError(RiotgenError, ValueError):
+    """Invalid parameter."""
+
+
+class MissingParameterError(ParameterError):
+    """Missing parameter, param_type is the name of the parameter."""
+
+    def __init__(self, param_type):
+        super().__init__(f"Missing {param_type}.")
+        self.param_type = param_type
+
+    def __reduce__(self):
+        return type(self), (self.param_type,)
+
+
+class OutputExistsError(RiotgenError, FileExistsError):
+    """The output directory already exists."""
@@ -1,33 +1,34 @@
 """RIOT example application generator module."""
 
-import click
+from riotgen.application import render_application_source
+from riotgen.common import generate_entity
+from riotgen.metrics import measure_command
+from riotgen.params import replace_params
 
-from riotgen.application import (
-    get_output_dir,
-    load_and_check_application_params,
-    render_application_source,
-)
-from riotgen.common import check_overwrite
 
-
-def generate_example(interactive, config, riotbase):
-    """Generate the code of an example application."""
+def render_example(params, riotbase, output_dir, plan):
+    """Render the code of an example application."""
     group = "application"
-    params = load_and_check_application_params(
-        group, interactive, config, riotbase, in_riot_dir="examples"
-    )
-
-    params["application"]["type"] = "example"
-
-    output_dir = get_output_dir(params, group, riotbase, "examples")
-    check_overwrite(output_dir)
-
-    render_application_source(params, group, output_dir)
-
-    click.echo(
-        click.style(
-            f"Example '{params[group]['name']}' generated "
-            f"in {output_dir} with success!",
-            bold=True,
-        )
+    params = replace_params(params, group, type="example")
+    render_application_source(params, group, output_dir, plan)
+
+
+@measure_command("example")
+def generate_example(
+    interactive,
+    config,
+    riotbase,
+    dry_run=False,
+    output_archive=None,
+    resolve_deps=False,
+):
+    """Generate the code of an example application."""
+    generate_entity(
+        "example",
+        interactive,
+        config,
+        riotbase,
+        dry_run=dry_run,
+        output_archive=output_archive,
+        resolve_deps=resolve_deps,
     )
@@ -1,17 +1,55 @@
-"""riotgen main module."""
+"""riotgen main module.
+
+Generator modules are only imported when their subcommand is invoked, this
+keeps the startup time of the CLI low, e.g. for --help, --version or shell
+completion.
+"""
+
+# pylint:disable=import-outside-toplevel
 
 import os
 
 import click
 
 from riotgen import __version__
-from riotgen.application import generate_application
-from riotgen.board import generate_board
-from riotgen.driver import generate_driver
-from riotgen.example import generate_example
-from riotgen.module import generate_module
-from riotgen.pkg import generate_pkg
-from riotgen.test import generate_test
+from riotgen.errors import MissingParameterError, ParameterError, RiotgenError
+
+
+def check_output_archive(ctx, param, value):  # pylint:disable=unused-argument
+    """Check the format of the output archive option."""
+    if value is not None:
+        from riotgen.archive import get_archive_format
+
+        try:
+            get_archive_format(value)
+        except ParameterError as exc:
+            raise click.BadParameter(str(exc)) from exc
+    return value
+
+
+RESOLVE_DEPS_HELP = (
+    "Resolve the module dependencies against RIOTBASE and fail if the board "
+    "doesn't provide the required features"
+)
+
+OUTPUT_ARCHIVE_HELP = (
+    "Write the generated files in a tar.gz or zip archive, '-' writes a "
+    "tar.gz archive to stdout"
+)
+
+
+class RiotgenGroup(click.Group):
+    """Group converting the riotgen errors to click exceptions."""
+
+    def invoke(self, ctx):
+        try:
+            return super().invoke(ctx)
+        except MissingParameterError as exc:
+            raise click.MissingParameter(param_type=exc.param_type) from exc
+        except ParameterError as exc:
+            raise click.BadParameter(str(exc)) from exc
+        except RiotgenError as exc:
+            raise click.ClickException(str(exc)) from exc
 
 
 class SharedCommand(click.core.Command):
@@ -41,14 +79,54 @@ class SharedCommand(click.core.Command):
                 type=click.Path(exists=True),
                 default=os.getenv("RIOTBASE"),
             ),
+            click.core.Option(
+                ("-n", "--dry-run"),
+                is_flag=True,
+                help="Print the generated files instead of writing them",
+            ),
+            click.core.Option(
+                ("-o", "--output-archive"),
+                type=click.Path(dir_okay=False, allow_dash=True),
+                callback=check_output_archive,
+                help=OUTPUT_ARCHIVE_HELP,
+            ),
         ]
         self.params += options
 
 
-@click.group()
+@click.group(cls=RiotgenGroup)
 @click.version_option(version=__version__)
-def riotgen():  # pylint:disable=missing-function-docstring
-    pass
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Print the time spent in each phase of the run",
+)
+@click.option(
+    "--profile-output",
+    type=click.Path(dir_okay=False),
+    help="Also write cProfile statistics to a file",
+)
+@click.option(
+    "--metrics-output",
+    type=click.Path(dir_okay=False),
+    envvar="RIOTGEN_METRICS",
+    help="Write the run metrics to a JSON lines or a .prom file",
+)
+@click.pass_context
+def riotgen(  # pylint:disable=missing-function-docstring
+    ctx, profile, profile_output, metrics_output
+):
+    if profile or profile_output is not None:
+        from riotgen.timing import start_profiling
+
+        ctx.call_on_close(start_profiling(profile_output))
+    if metrics_output is not None:
+        from riotgen.metrics import start_metrics, stop_metrics, write_metrics
+
+        start_metrics(ctx.invoked_subcommand)
+        ctx.call_on_close(
+            lambda: write_metrics(stop_metrics(), metrics_output)
+        )
 
 
 @riotgen.command(cls=SharedCommand, help="Bootstrap a RIOT application")
@@ -59,44 +137,281 @@ def riotgen():  # pylint:disable=missing-function-docstring
     default=os.getcwd(),
     show_default="current directory",
 )
-def application(output_dir, interactive, config, riotbase):
+@click.option("--resolve-deps", is_flag=True, help=RESOLVE_DEPS_HELP)
+def application(
+    output_dir,
+    interactive,
+    config,
+    riotbase,
+    dry_run,
+    output_archive,
+    resolve_deps,
+):
     """Entry point for application subcommand."""
-    generate_application(output_dir, interactive, config, riotbase)
+    from riotgen.application import generate_application
+
+    generate_application(
+        output_dir,
+        interactive,
+        config,
+        riotbase,
+        dry_run=dry_run,
+        output_archive=output_archive,
+        resolve_deps=resolve_deps,
+    )
+
+
+@riotgen.command(help="Bootstrap RIOT code from a batch configuration file")
+@click.option(
+    "-c",
+    "--config",
+    type=click.File(mode="r"),
+    required=True,
+    help="Use a batch configuration file",
+)
+@click.option(
+    "-r",
+    "--riotbase",
+    type=click.Path(exists=True),
+    default=os.getenv("RIOTBASE"),
+)
+@click.option(
+    "-f", "--force", is_flag=True, help="Overwrite existing directories"
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    help="Number of parallel jobs, 0 uses all available CPUs",
+)
+@click.option(
+    "-n",
+    "--dry-run",
+    is_flag=True,
+    help="Print the generated files instead of writing them",
+)
+@click.option(
+    "-o",
+    "--output-archive",
+    type=click.Path(dir_okay=False, allow_dash=True),
+    callback=check_output_archive,
+    help=OUTPUT_ARCHIVE_HELP,
+)
+def batch(config, riotbase, force, jobs, dry_run, output_archive):
+    """Entry point for batch subcommand."""
+    from riotgen.batch import generate_batch
+
+    generate_batch(config, riotbase, force, jobs, dry_run, output_archive)
+
+
+@riotgen.group(help="Manage the riotgen persistent cache")
+def cache():  # pylint:disable=missing-function-docstring
+    pass
+
+
+@cache.command(help="Remove all the cached data")
+def clear():
+    """Entry point for cache clear subcommand."""
+    from riotgen.cache import clear_cache, get_cache_dir
+
+    clear_cache()
+    click.echo(f"Cache directory {get_cache_dir()} cleared")
+
+
+@cache.command(help="Show the cache statistics")
+def stats():
+    """Entry point for cache stats subcommand."""
+    from riotgen.cache import get_cache_stats
+
+    cache_stats = get_cache_stats()
+    click.echo(f"Cache directory: {cache_stats['directory']}")
+    for name in ("templates", "configs"):
+        entry = cache_stats[name]
+        status = "enabled" if entry["enabled"] else "disabled"
+        line = (
+            f"{name.capitalize()}: {status}, {entry['entries']} entries, "
+            f"{entry['size'] / 1024:.1f} KiB"
+        )
+        if "hits" in entry:
+            line += f", {entry['hits']} hits, {entry['misses']} misses"
+        click.echo(line)
+
+
+@riotgen.command(
+    help="Bootstrap RIOT code with the riotgen daemon, when it's running",
+    short_help="Bootstrap RIOT code with the riotgen daemon",
+)
+@click.argument(
+    "command",
+    type=click.Choice(
+        ["application", "board", "driver", "example", "module", "pkg", "test"]
+    ),
+)
+@click.option(
+    "-c",
+    "--config",
+    type=click.Path(exists=True, dir_okay=False),
+    required=True,
+    help="Use a configuration file",
+)
+@click.option(
+    "-r",
+    "--riotbase",
+    type=click.Path(exists=True),
+    default=os.getenv("RIOTBASE"),
+)
+@click.option(
+    "-d",
+    "--output-dir",
+    type=click.Path(file_okay=False),
+    help="Output directory of an application",
+)
+@click.option(
+    "-f", "--force", is_flag=True, help="Overwrite an existing directory"
+)
+@click.option(
+    "-n",
+    "--dry-run",
+    is_flag=True,
+    help="Print the generated files instead of writing them",
+)
+def client(command, config, riotbase, output_dir, force, dry_run):
+    """Entry point for client subcommand."""
+    from riotgen.serve import generate_client
+
+    generate_client(command, config, riotbase, output_dir, force, dry_run)
 
 
 @riotgen.command(cls=SharedCommand, help="Bootstrap a RIOT board support")
-def board(interactive, config, riotbase):
+def board(interactive, config, riotbase, dry_run, output_archive):
     """Entry point for board subcommand."""
-    generate_board(interactive, config, riotbase)
+    from riotgen.board import generate_board
+
+    generate_board(
+        interactive,
+        config,
+        riotbase,
+        dry_run=dry_run,
+        output_archive=output_archive,
+    )
 
 
 @riotgen.command(cls=SharedCommand, help="Bootstrap a RIOT driver module")
-def driver(interactive, config, riotbase):
+def driver(interactive, config, riotbase, dry_run, output_archive):
     """Entry point for driver subcommand."""
-    generate_driver(interactive, config, riotbase)
+    from riotgen.driver import generate_driver
+
+    generate_driver(
+        interactive,
+        config,
+        riotbase,
+        dry_run=dry_run,
+        output_archive=output_archive,
+    )
 
 
 @riotgen.command(
     cls=SharedCommand, help="Bootstrap a RIOT example application"
 )
-def example(interactive, config, riotbase):
+@click.option("--resolve-deps", is_flag=True, help=RESOLVE_DEPS_HELP)
+def example(
+    interactive, config, riotbase, dry_run, output_archive, resolve_deps
+):
     """Entry point for example application subcommand."""
-    generate_example(interactive, config, riotbase)
+    from riotgen.example import generate_example
+
+    generate_example(
+        interactive,
+        config,
+        riotbase,
+        dry_run=dry_run,
+        output_archive=output_archive,
+        resolve_deps=resolve_deps,
+    )
 
 
 @riotgen.command(cls=SharedCommand, help="Bootstrap a RIOT system module")
-def module(interactive, config, riotbase):
+def module(interactive, config, riotbase, dry_run, output_archive):
     """Entry point for module subcommand."""
-    generate_module(interactive, config, riotbase)
+    from riotgen.module import generate_module
+
+    generate_module(
+        interactive,
+        config,
+        riotbase,
+        dry_run=dry_run,
+        output_archive=output_archive,
+    )
 
 
 @riotgen.command(cls=SharedCommand, help="Bootstrap a RIOT external package")
-def pkg(interactive, config, riotbase):
+def pkg(interactive, config, riotbase, dry_run, output_archive):
     """Entry point for pkg subcommand."""
-    generate_pkg(interactive, config, riotbase)
+    from riotgen.pkg import generate_pkg
+
+    generate_pkg(
+        interactive,
+        config,
+        riotbase,
+        dry_run=dry_run,
+        output_archive=output_archive,
+    )
+
+
+@riotgen.command(
+    help="Regenerate RIOT code whose templates or parameters changed"
+)
+@click.argument(
+    "directories",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, file_okay=False),
+)
+@click.option(
+    "-f", "--force", is_flag=True, help="Overwrite files modified by users"
+)
+@click.option(
+    "-n",
+    "--dry-run",
+    is_flag=True,
+    help="Print the generated files instead of writing them",
+)
+def regen(directories, force, dry_run):
+    """Entry point for regen subcommand."""
+    from riotgen.regen import generate_regen
+
+    generate_regen(directories, force, dry_run)
+
+
+@riotgen.command(help="Run a riotgen daemon with warm caches")
+@click.option(
+    "-s",
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    help="Path of the Unix socket, default to $RIOTGEN_SERVE_SOCKET or "
+    "riotgen-<uid>.sock in the runtime directory",
+)
+def serve(socket_path):
+    """Entry point for serve subcommand."""
+    from riotgen.serve import serve as serve_daemon
+
+    serve_daemon(socket_path)
 
 
 @riotgen.command(cls=SharedCommand, help="Bootstrap a RIOT test application")
-def test(interactive, config, riotbase):
+@click.option("--resolve-deps", is_flag=True, help=RESOLVE_DEPS_HELP)
+def test(interactive, config, riotbase, dry_run, output_archive, resolve_deps):
     """Entry point for test subcommand."""
-    generate_test(interactive, config, riotbase)
+    from riotgen.test import generate_test
+
+    generate_test(
+        interactive,
+        config,
+        riotbase,
+        dry_run=dry_run,
+        output_archive=output_archive,
+        resolve_deps=resolve_deps,
+    )
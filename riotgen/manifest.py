@@ -0,0 +1,96 @@
+"""Generation manifest module.
+
+Each generated directory contains a manifest recording the parameters, the
+templates and the hashes of the generated files. It's used by regen to only
+render again what changed and to keep the files edited by users.
+"""
+
+import hashlib
+import json
+import os
+
+from riotgen import __version__
+from riotgen.common import get_template_hash
+from riotgen.errors import ParameterError
+from riotgen.params import thaw_params
+from riotgen.plan import content_hash
+
+MANIFEST_FILE = ".riotgen-manifest.json"
+MANIFEST_VERSION = 1
+
+
+def get_manifest_params(params):
+    """Return a copy of params without the derived values."""
+    params = thaw_params(params)
+    if "global" in params:
+        params["global"].pop("license_header", None)
+    return params
+
+
+def get_params_hash(params):
+    """Return a hash of the input parameters of a generator."""
+    return hashlib.sha256(
+        json.dumps(params, sort_keys=True).encode()
+    ).hexdigest()
+
+
+def build_manifest(plan, command, params, riotbase, output_dir, files=None):
+    """Return the manifest of the files of a render plan.
+
+    The files entries of a previous manifest can be given to keep the ones
+    which were not rendered again.
+    """
+    output_dir = os.path.abspath(output_dir)
+    if riotbase is not None:
+        riotbase = os.path.relpath(os.path.abspath(riotbase), output_dir)
+    params = get_manifest_params(params)
+    files = dict(files or {})
+    for path, content in plan.items():
+        if path not in plan.templates:
+            continue
+        template = plan.templates[path]
+        files[os.path.relpath(path, output_dir)] = {
+            "template": template,
+            "template_hash": get_template_hash(template),
+            "hash": content_hash(content),
+        }
+    return {
+        "version": MANIFEST_VERSION,
+        "riotgen_version": __version__,
+        "command": command,
+        "riotbase": riotbase,
+        "params_hash": get_params_hash(params),
+        "params": params,
+        "files": dict(sorted(files.items())),
+    }
+
+
+def add_manifest(plan, command, params, riotbase, output_dir, files=None):
+    """Add the manifest of the files of a render plan to the plan."""
+    manifest = build_manifest(
+        plan, command, params, riotbase, output_dir, files
+    )
+    plan.add(
+        os.path.join(output_dir, MANIFEST_FILE),
+        json.dumps(manifest, indent=2) + "\n",
+    )
+    return manifest
+
+
+def read_manifest(output_dir):
+    """Read the manifest of a generated directory."""
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    try:
+        with open(path) as f_manifest:
+            manifest = json.load(f_manifest)
+    except FileNotFoundError as exc:
+        raise ParameterError(
+            f"No riotgen manifest found in {output_dir}"
+        ) from exc
+    except (OSError, ValueError) as exc:
+        raise ParameterError(f"Cannot read manifest {path}: {exc}") from exc
+    if not isinstance(manifest, dict) or manifest.get("version") != (
+        MANIFEST_VERSION
+    ):
+        raise ParameterError(f"Unsupported manifest format in {path}")
+    return manifest
@@ -0,0 +1,211 @@
+"""Run metrics module.
+
+The metrics of a run are collected between start_metrics and stop_metrics:
+the outcome of the generation commands, the number of rendered files and
+the render time per template, the number of written files and bytes and the
+cache hits and misses. Collection is disabled unless started, the hooks of a
+disabled collection only cost a global lookup.
+
+Metrics are written as a JSON line appended to a file, or as a Prometheus
+textfile collector file replaced at each run when its name ends with .prom.
+Templates rendered in batch worker processes aren't counted.
+"""
+
+import contextlib
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+
+from riotgen import __version__
+
+PROMETHEUS_SUFFIX = ".prom"
+
+_METRICS = None
+_LOCK = threading.Lock()
+
+
+def metrics_enabled():
+    """Return True if metrics are being collected."""
+    return _METRICS is not None
+
+
+def start_metrics(command=None):
+    """Start collecting the metrics of a run of a command."""
+    global _METRICS  # pylint:disable=global-statement
+    _METRICS = {
+        "timestamp": time.time(),
+        "start": time.perf_counter(),
+        "version": __version__,
+        "command": command,
+        "status": "ok",
+        "files_rendered": 0,
+        "files_written": 0,
+        "bytes_written": 0,
+        "templates": {},
+        "caches": {},
+    }
+
+
+def stop_metrics():
+    """Stop collecting metrics and return the metrics of the run."""
+    global _METRICS  # pylint:disable=global-statement
+    metrics, _METRICS = _METRICS, None
+    if metrics is None:
+        return None
+    metrics["duration_seconds"] = time.perf_counter() - metrics.pop("start")
+    return metrics
+
+
+@contextlib.contextmanager
+def _measured_render(template):
+    start = time.perf_counter()
+    yield
+    duration = time.perf_counter() - start
+    with _LOCK:
+        if _METRICS is not None:
+            _METRICS["files_rendered"] += 1
+            entry = _METRICS["templates"].setdefault(
+                template, {"renders": 0, "seconds": 0.0}
+            )
+            entry["renders"] += 1
+            entry["seconds"] += duration
+
+
+_DISABLED = contextlib.nullcontext()
+
+
+def measure_render(template):
+    """Return a context manager measuring the render of a template."""
+    if _METRICS is None:
+        return _DISABLED
+    return _measured_render(template)
+
+
+def record_write(files, size):
+    """Count written files and bytes."""
+    if _METRICS is None:
+        return
+    with _LOCK:
+        _METRICS["files_written"] += files
+        _METRICS["bytes_written"] += size
+
+
+def record_cache(cache, hit):
+    """Count a hit or a miss of a cache."""
+    if _METRICS is None:
+        return
+    with _LOCK:
+        entry = _METRICS["caches"].setdefault(cache, {"hits": 0, "misses": 0})
+        entry["hits" if hit else "misses"] += 1
+
+
+def measure_command(command):
+    """Decorate a generation entry point to record its command and outcome."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _METRICS is None:
+                return func(*args, **kwargs)
+            _METRICS["command"] = command
+            try:
+                return func(*args, **kwargs)
+            except BaseException as exc:
+                _METRICS["status"] = type(exc).__name__
+                raise
+
+        return wrapper
+
+    return decorator
+
+
+def _escape_label(value):
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def format_prometheus(metrics):
+    """Return the metrics of a run in the Prometheus text format."""
+    run_labels = (
+        f'command="{_escape_label(metrics["command"] or "")}",'
+        f'status="{_escape_label(metrics["status"])}",'
+        f'version="{_escape_label(metrics["version"])}"'
+    )
+    lines = []
+
+    def add(name, help_text, samples):
+        lines.append(f"# HELP riotgen_{name} {help_text}")
+        lines.append(f"# TYPE riotgen_{name} gauge")
+        for labels, value in samples:
+            lines.append(f"riotgen_{name}{{{labels}}} {value}")
+
+    add(
+        "last_run_timestamp_seconds",
+        "Start time of the last run.",
+        [(run_labels, metrics["timestamp"])],
+    )
+    add(
+        "run_duration_seconds",
+        "Duration of the last run.",
+        [(run_labels, metrics["duration_seconds"])],
+    )
+    for name in ("files_rendered", "files_written", "bytes_written"):
+        add(
+            name,
+            f"Number of {name.replace('_', ' ')} by the last run.",
+            [(run_labels, metrics[name])],
+        )
+    templates = sorted(metrics["templates"].items())
+    add(
+        "template_renders",
+        "Number of renders of each template by the last run.",
+        [
+            (f'template="{_escape_label(name)}"', entry["renders"])
+            for name, entry in templates
+        ],
+    )
+    add(
+        "template_render_seconds",
+        "Render time of each template in the last run.",
+        [
+            (f'template="{_escape_label(name)}"', entry["seconds"])
+            for name, entry in templates
+        ],
+    )
+    caches = sorted(metrics["caches"].items())
+    for counter in ("hits", "misses"):
+        add(
+            f"cache_{counter}",
+            f"Number of cache {counter} in the last run.",
+            [
+                (f'cache="{_escape_label(name)}"', entry[counter])
+                for name, entry in caches
+            ],
+        )
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(metrics, path):
+    """Write the metrics of a run to a file.
+
+    A Prometheus textfile is atomically replaced so that the collector never
+    reads a partial file, other files get a JSON line appended.
+    """
+    path = os.path.abspath(os.path.expanduser(path))
+    if path.endswith(PROMETHEUS_SUFFIX):
+        directory = os.path.dirname(path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f_metrics:
+            f_metrics.write(format_prometheus(metrics))
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+        return
+    with open(path, "a") as f_metrics:
+        f_metrics.write(json.dumps(metrics, sort_keys=True) + "\n")
@@ -2,13 +2,9 @@
 
 import os
 
-import click
-
-from riotgen.common import (
-    check_overwrite,
-    load_and_check_params,
-    render_source,
-)
+from riotgen.common import generate_entity, render_source
+from riotgen.metrics import measure_command
+from riotgen.params import make_params_model
 
 MODULE_PARAMS = {
     "name": {"args": ["Module name"], "kwargs": {}},
@@ -19,6 +15,8 @@ MODULE_PARAMS = {
     "brief": {"args": ["Brief doxygen description"], "kwargs": {}},
 }
 
+Module = make_params_model("Module", "module", MODULE_PARAMS, module=__name__)
+
 MODULE_FILES = {
     "module.c": "{name}.c",
     "Makefile": None,
@@ -27,23 +25,26 @@ MODULE_FILES = {
 MODULE_INCLUDE_FILES = {"module.h": "{name}.h"}
 
 
-def generate_module(interactive, config, riotbase):
-    """Generate the code of a module."""
+def render_module(params, riotbase, output_dir, plan):
+    """Render the code of a module."""
     group = "module"
-    params = load_and_check_params(
-        group, MODULE_PARAMS, [], interactive, config, riotbase, "sys"
+    output_include_dir = os.path.join(riotbase, "sys", "include")
+    render_source(params, group, MODULE_FILES, output_dir, plan)
+    render_source(
+        params, group, MODULE_INCLUDE_FILES, output_include_dir, plan
     )
 
-    sys_dir = os.path.join(riotbase, "sys")
-    output_dir = os.path.join(sys_dir, params[group]["name"])
-    output_include_dir = os.path.join(sys_dir, "include")
-    check_overwrite(output_dir)
-    render_source(params, group, MODULE_FILES, output_dir)
-    render_source(params, group, MODULE_INCLUDE_FILES, output_include_dir)
-
-    click.echo(
-        click.style(
-            f"Module '{params[group]['name']}' generated in {output_dir} with success!",
-            bold=True,
-        )
+
+@measure_command("module")
+def generate_module(
+    interactive, config, riotbase, dry_run=False, output_archive=None
+):
+    """Generate the code of a module."""
+    generate_entity(
+        "module",
+        interactive,
+        config,
+        riotbase,
+        dry_run=dry_run,
+        output_archive=output_archive,
     )
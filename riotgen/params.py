@@ -0,0 +1,193 @@
+"""Parameters model module.
+
+Checked parameters are frozen into immutable records, with one record class
+per group of parameters generated from the parameters descriptors of the
+generators. Records are read-only mappings, so generators and templates use
+them like the nested dicts of parameters they are built from.
+"""
+
+import importlib
+from collections.abc import Mapping
+from types import MappingProxyType
+
+PARAMS_LIST_AVAILABLE = [
+    "modules",
+    "packages",
+    "features_required",
+    "features_provided",
+]
+
+GLOBAL_PARAMS_FIELDS = [
+    "license",
+    "license_header",
+    "year",
+    "author_name",
+    "author_email",
+    "organization",
+]
+
+PARAMS_MODELS = {}
+
+# Modules defining the record class of each group of parameters
+PARAMS_MODELS_MODULES = {
+    "application": "riotgen.application",
+    "board": "riotgen.board",
+    "driver": "riotgen.driver",
+    "module": "riotgen.module",
+    "pkg": "riotgen.pkg",
+}
+
+
+def _freeze_value(value):
+    """Return a value with nested lists as tuples and dicts as read-only."""
+    if isinstance(value, ParamsModel):
+        return value
+    if isinstance(value, Mapping):
+        return MappingProxyType(
+            {name: _freeze_value(item) for name, item in value.items()}
+        )
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze_value(item) for item in value)
+    return value
+
+
+def _pickle_value(value):
+    """Return a frozen value without read-only dicts, they can't be pickled."""
+    if isinstance(value, MappingProxyType):
+        return {name: _pickle_value(item) for name, item in value.items()}
+    if isinstance(value, tuple):
+        return tuple(_pickle_value(item) for item in value)
+    return value
+
+
+class ParamsModel(Mapping):
+    """Immutable record of parameters.
+
+    Unknown parameters are dropped, lists are stored as tuples and dicts as
+    read-only mappings, at any depth. Missing parameters are not in the
+    mapping, so they are undefined in templates.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, values=(), **kwargs):
+        for name, value in dict(values, **kwargs).items():
+            if name not in self.__slots__:
+                continue
+            object.__setattr__(self, name, _freeze_value(value))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __getitem__(self, name):
+        if name in self.__slots__:
+            try:
+                return getattr(self, name)
+            except AttributeError:
+                pass
+        raise KeyError(name)
+
+    def __iter__(self):
+        return (name for name in self.__slots__ if hasattr(self, name))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __reduce__(self):
+        values = {name: _pickle_value(value) for name, value in self.items()}
+        return type(self), (values,)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+    def replace(self, **values):
+        """Return a copy of the record with some values replaced."""
+        return type(self)({**self, **values})
+
+
+class Global(ParamsModel):
+    """Global parameters, shared by all generators."""
+
+    __slots__ = tuple(GLOBAL_PARAMS_FIELDS)
+
+
+class Params(ParamsModel):
+    """Parameters of a generator, one record per group."""
+
+    __slots__ = ("global", "application", "board", "driver", "module", "pkg")
+
+
+PARAMS_MODELS["global"] = Global
+
+
+def make_params_model(name, group, params_descriptor, extras=(), module=None):
+    """Create and register the record class of a group of parameters.
+
+    The fields are the parameters of the descriptor, the list parameters
+    and the extra fields. Give the module defining the class as module so
+    that records can be pickled.
+    """
+    fields = [*params_descriptor, *PARAMS_LIST_AVAILABLE, *extras]
+    model = type(
+        name,
+        (ParamsModel,),
+        {
+            "__slots__": tuple(dict.fromkeys(fields)),
+            "__doc__": f"Parameters of the {group} group.",
+        },
+    )
+    if module is not None:
+        model.__module__ = module
+    PARAMS_MODELS[group] = model
+    return model
+
+
+def get_params_model(group):
+    """Return the record class of a group of parameters.
+
+    The module defining the class is imported if needed. Raise KeyError for
+    an unknown group.
+    """
+    if group not in PARAMS_MODELS and group in PARAMS_MODELS_MODULES:
+        importlib.import_module(PARAMS_MODELS_MODULES[group])
+    return PARAMS_MODELS[group]
+
+
+def freeze_params(params):
+    """Return the immutable record of a dict of parameters.
+
+    Groups other than the ones of Params, e.g. other sections of a config
+    file, are dropped.
+    """
+    if isinstance(params, Params):
+        return params
+    return Params(
+        {
+            group: get_params_model(group)(values)
+            for group, values in params.items()
+            if group in Params.__slots__ and values is not None
+        }
+    )
+
+
+def thaw_params(params):
+    """Return a nested dict copy of parameters, with lists instead of tuples."""
+    if isinstance(params, Mapping):
+        return {name: thaw_params(value) for name, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [thaw_params(value) for value in params]
+    return params
+
+
+def replace_params(params, group, **values):
+    """Return parameters with some values of a group replaced.
+
+    Dicts of parameters are updated in place, records are copied.
+    """
+    if isinstance(params, ParamsModel):
+        return params.replace(**{group: params[group].replace(**values)})
+    params.setdefault(group, {}).update(values)
+    return params
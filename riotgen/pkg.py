@@ -1,15 +1,8 @@
 """RIOT pkg generator module."""
 
-import os
-
-import click
-
-from riotgen.common import (
-    check_overwrite,
-    load_and_check_params,
-    load_license,
-    render_source,
-)
+from riotgen.common import generate_entity, load_license, render_source
+from riotgen.metrics import measure_command
+from riotgen.params import make_params_model
 
 PKG_PARAMS = {
     "name": {"args": ["Package name"], "kwargs": {}},
@@ -25,6 +18,8 @@ PKG_PARAMS = {
 
 PKG_PARAMS_LIST = ["modules", "packages", "features_required"]
 
+Pkg = make_params_model("Pkg", "pkg", PKG_PARAMS, module=__name__)
+
 PKG_FILES = {
     filename: None
     for filename in ["doc.md", "Makefile", "Makefile.dep", "Makefile.include"]
@@ -33,32 +28,28 @@ PKG_FILES = {
 PKG_RENAMED_FILES = {"pkg.mk": "{name}.mk"}
 
 
-def generate_pkg(interactive, config, riotbase):
-    """Generate the code of a package."""
+def render_pkg(params, riotbase, output_dir, plan):
+    """Render the code of a package."""
     group = "pkg"
-    params = load_and_check_params(
-        group,
-        PKG_PARAMS,
-        PKG_PARAMS_LIST,
-        interactive,
-        config,
-        riotbase,
-        "pkg",
-    )
-
-    output_dir = os.path.join(riotbase, "pkg", params[group]["name"])
-    check_overwrite(output_dir)
-    render_source(params, group, PKG_FILES, output_dir)
-    render_source(params, group, PKG_RENAMED_FILES, output_dir)
+    render_source(params, group, PKG_FILES, output_dir, plan)
+    render_source(params, group, PKG_RENAMED_FILES, output_dir, plan)
 
     # Generate the Kconfig file separately because of the different license
     # format
-    load_license(params, "# ")
-    render_source(params, group, {"Kconfig": None}, output_dir)
+    params = load_license(params, "# ")
+    render_source(params, group, {"Kconfig": None}, output_dir, plan)
 
-    click.echo(
-        click.style(
-            f"Package '{params[group]['name']}' generated in {output_dir} with success!",
-            bold=True,
-        )
+
+@measure_command("pkg")
+def generate_pkg(
+    interactive, config, riotbase, dry_run=False, output_archive=None
+):
+    """Generate the code of a package."""
+    generate_entity(
+        "pkg",
+        interactive,
+        config,
+        riotbase,
+        dry_run=dry_run,
+        output_archive=output_archive,
     )
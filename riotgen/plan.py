@@ -0,0 +1,364 @@
+"""Render plan module."""
+
+import functools
+import hashlib
+import os
+import queue
+import stat
+import tempfile
+import threading
+
+import click
+
+from riotgen.archive import write_archive
+from riotgen.metrics import metrics_enabled, record_write
+from riotgen.timing import timed
+
+WRITER_THREADS = 4
+PIPELINE_QUEUE_SIZE = 16
+
+
+def _read_file(path):
+    try:
+        with open(path) as f_dest:
+            return f_dest.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def content_hash(content):
+    """Return the sha256 hex digest of a text content."""
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def file_hash(path):
+    """Return the sha256 hex digest of a text file, None if it can't be read."""
+    content = _read_file(path)
+    if content is None:
+        return None
+    return content_hash(content)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _stage_file(path, content, mode=None):
+    """Write content to a temporary file next to path and return its path.
+
+    The temporary file gets the given mode, or the mode of the file it
+    replaces.
+    """
+    directory = os.path.dirname(path) or os.curdir
+    os.makedirs(directory, exist_ok=True)
+    fd, staged_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(path)}.", suffix=".riotgen", dir=directory
+    )
+    try:
+        with os.fdopen(fd, "w") as f_staged:
+            f_staged.write(content)
+            f_staged.flush()
+            os.fsync(f_staged.fileno())
+        if mode is None:
+            try:
+                mode = stat.S_IMODE(os.stat(path).st_mode)
+            except FileNotFoundError:
+                mode = 0o666 & ~_get_umask()
+        os.chmod(staged_path, mode)
+    except BaseException:
+        _remove(staged_path)
+        raise
+    return staged_path
+
+
+def _fsync_directory(directory):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        # Directories can't be opened on Windows
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@timed("write")
+def write_files(files, modes=None):
+    """Write the files which content changed, atomically.
+
+    All the changed files are first staged in temporary files on the same
+    filesystem, then renamed over their destination and each destination
+    directory is synced once. An interrupted write leaves the previous files
+    untouched. Return the list of written paths.
+    """
+    modes = modes or {}
+    staged = {}
+    try:
+        for path, content in files.items():
+            if _read_file(path) != content:
+                staged[path] = _stage_file(path, content, modes.get(path))
+    except BaseException:
+        for staged_path in staged.values():
+            _remove(staged_path)
+        raise
+    return _commit_staged(staged, files, modes)
+
+
+def _commit_staged(staged, files, modes):
+    """Rename staged files over their destination and fix the file modes."""
+    for path, staged_path in staged.items():
+        os.replace(staged_path, path)
+    for directory in {os.path.dirname(path) or os.curdir for path in staged}:
+        _fsync_directory(directory)
+
+    for path, mode in modes.items():
+        if path in staged or path not in files or mode is None:
+            continue
+        if stat.S_IMODE(os.stat(path).st_mode) != mode:
+            os.chmod(path, mode)
+    if metrics_enabled():
+        size = sum(len(files[path].encode()) for path in staged)
+        record_write(len(staged), size)
+    return list(staged)
+
+
+def write_file(path, content, mode=None):
+    """Write a file only if its content changed.
+
+    Unchanged files are not touched, so their modification time is kept and
+    make doesn't rebuild what depends on them. Return True if the file was
+    written.
+    """
+    return bool(write_files({path: content}, {path: mode}))
+
+
+class StagingPipeline:
+    """Pool of writer threads staging files while the next ones render.
+
+    Files are submitted through a bounded queue, so rendering blocks when
+    the writers are behind. Nothing is renamed over its destination until
+    the plan is written.
+    """
+
+    def __init__(self, writers, queue_size=PIPELINE_QUEUE_SIZE):
+        # The umask can only be read by changing it, do it before the threads
+        _get_umask()
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.sequence = 0
+        self.results = {}
+        self.lock = threading.Lock()
+        self.threads = [
+            threading.Thread(target=self._run, daemon=True)
+            for _ in range(writers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            sequence, path, content, mode = item
+            staged_path = None
+            error = None
+            try:
+                if _read_file(path) != content:
+                    staged_path = _stage_file(path, content, mode)
+            except Exception as exc:  # pylint:disable=broad-except
+                error = exc
+            with self.lock:
+                self.results[sequence] = (path, staged_path, error)
+
+    def submit(self, path, content, mode=None):
+        """Queue a file to be staged, blocks while the queue is full.
+
+        Return the sequence number of the submission.
+        """
+        sequence = self.sequence
+        self.sequence += 1
+        self.queue.put((sequence, path, content, mode))
+        return sequence
+
+    def join(self):
+        """Wait for all the files to be staged and return the results.
+
+        Results map each submission sequence number to the path, the staged
+        path, None if the file is unchanged, and the staging error.
+        """
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        return self.results
+
+
+class RenderPlan:
+    """Files rendered by generators, before they are written.
+
+    A plan maps the absolute path of each generated file to its rendered
+    content, in generation order. Nothing touches the filesystem until the
+    plan is written. Templates listed in skipped_templates are not rendered.
+    """
+
+    def __init__(self, writers=0):
+        self.files = {}
+        self.modes = {}
+        self.templates = {}
+        self.skipped_templates = set()
+        self.written = []
+        self.unchanged = []
+        self.writers = writers
+        self._pipeline = None
+        self._sequences = {}
+
+    def __getstate__(self):
+        # Plans are pickled back from batch worker processes, the writer
+        # threads stay in the process which rendered the plan
+        state = dict(self.__dict__)
+        state["_pipeline"] = None
+        state["_sequences"] = {}
+        return state
+
+    def __len__(self):
+        return len(self.files)
+
+    def __iter__(self):
+        return iter(self.files)
+
+    def __contains__(self, path):
+        return os.path.abspath(path) in self.files
+
+    def __getitem__(self, path):
+        return self.files[os.path.abspath(path)]
+
+    def items(self):
+        """Return the (path, content) pairs of the plan."""
+        return self.files.items()
+
+    def add(self, path, content, mode=None, template=None):
+        """Add a rendered file to the plan."""
+        path = os.path.abspath(path)
+        self.files[path] = content
+        if mode is not None:
+            self.modes[path] = mode
+        if template is not None:
+            self.templates[path] = template
+        if self.writers:
+            if self._pipeline is None:
+                self._pipeline = StagingPipeline(self.writers)
+            sequence = self._pipeline.submit(path, content, mode)
+            self._sequences[path] = sequence
+
+    def discard(self, path):
+        """Remove a file from the plan, if present."""
+        path = os.path.abspath(path)
+        self.files.pop(path, None)
+        self.modes.pop(path, None)
+        self.templates.pop(path, None)
+        self._sequences.pop(path, None)
+
+    def set_mode(self, path, mode):
+        """Set the permissions of a file of the plan once written."""
+        self.modes[os.path.abspath(path)] = mode
+
+    def write(self):
+        """Atomically write the files of the plan which content changed.
+
+        The written and unchanged paths are stored in the plan. With writer
+        threads, the files were staged while they were rendered and the
+        first staging error in the plan order is raised.
+        """
+        if self._pipeline is None:
+            self.written = write_files(self.files, self.modes)
+        else:
+            self.written = self._write_staged()
+        written = set(self.written)
+        self.unchanged = [path for path in self.files if path not in written]
+
+    def _join_staged(self):
+        """Return the staged paths of the files still in the plan.
+
+        Files discarded or added again are removed, as well as all staged
+        files when staging one of them failed.
+        """
+        results = self._pipeline.join()
+        self._pipeline = None
+        current = set(self._sequences.values())
+        staged = {}
+        error = None
+        for sequence in sorted(results):
+            path, staged_path, exc = results[sequence]
+            if sequence not in current:
+                if staged_path is not None:
+                    _remove(staged_path)
+                continue
+            if exc is not None and error is None:
+                error = exc
+            if staged_path is not None:
+                staged[path] = staged_path
+        if error is not None:
+            for staged_path in staged.values():
+                _remove(staged_path)
+            raise error
+        return staged
+
+    @timed("write")
+    def _write_staged(self):
+        staged = self._join_staged()
+        for path, staged_path in staged.items():
+            mode = self.modes.get(path)
+            if mode is not None:
+                os.chmod(staged_path, mode)
+        return _commit_staged(staged, self.files, self.modes)
+
+    def abort(self):
+        """Remove the files staged by writer threads, if any."""
+        if self._pipeline is None:
+            return
+        self._sequences.clear()
+        self._join_staged()
+
+    def summary(self):
+        """Return the number of written and unchanged files as a message."""
+        return (
+            f"{len(self.written)} files written, "
+            f"{len(self.unchanged)} unchanged"
+        )
+
+    def format(self):
+        """Return a printable representation of the plan with contents."""
+        return "\n".join(
+            f"==> {path} <==\n{content}" for path, content in self.items()
+        )
+
+
+def commit_plan(plan, dry_run=False, output_archive=None, riotbase=None):
+    """Write the files of a render plan, or only print them in dry run mode.
+
+    When an output archive is given, the files are written in the archive
+    instead. Return True when the files were written.
+    """
+    if dry_run:
+        click.echo(plan.format())
+        return False
+    if output_archive is not None:
+        count = write_archive([plan], output_archive, riotbase)
+        click.echo(f"{count} files archived in {output_archive}", err=True)
+        return False
+    plan.write()
+    click.echo(plan.summary())
+    return True
@@ -0,0 +1,21 @@
+"""Precompile the bundled templates before building a package.
+
+Usage: python -m riotgen.precompile [TARGET_DIR]
+"""
+
+import sys
+
+from riotgen.common import PRECOMPILED_TEMPLATE_DIR, compile_templates
+
+
+def main(argv=None):
+    """Entry point for the templates precompilation."""
+    if argv is None:
+        argv = sys.argv[1:]
+    target = argv[0] if argv else PRECOMPILED_TEMPLATE_DIR
+    compile_templates(target)
+    print(f"Templates precompiled in {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""RIOT code regeneration module."""
+
+import os
+
+import click
+
+from riotgen.api import GENERATORS
+from riotgen.common import get_template_hash, load_license
+from riotgen.errors import ParameterError, RiotgenError
+from riotgen.manifest import add_manifest, get_params_hash, read_manifest
+from riotgen.metrics import measure_command
+from riotgen.params import freeze_params
+from riotgen.plan import RenderPlan, commit_plan, content_hash, file_hash
+
+
+def _template_changed(entry):
+    try:
+        return get_template_hash(entry["template"]) != entry["template_hash"]
+    except OSError:
+        return True
+
+
+def render_regen(output_dir, force=False):
+    """Render again the files of a generated directory from its manifest.
+
+    When the parameters in the manifest didn't change, only the files of the
+    templates which changed, or which were outdated, are rendered. Files
+    modified since they were generated are left out of the plan, unless force
+    is True.
+    Return the render plan and the list of modified files kept.
+    """
+    output_dir = os.path.abspath(os.path.expanduser(output_dir))
+    manifest = read_manifest(output_dir)
+    command = manifest.get("command")
+    if command not in GENERATORS:
+        raise ParameterError(f"Unknown generator '{command}' in manifest")
+    params = manifest["params"]
+    riotbase = manifest["riotbase"]
+    if riotbase is not None:
+        riotbase = os.path.normpath(os.path.join(output_dir, riotbase))
+    files = manifest["files"]
+
+    plan = RenderPlan()
+    if get_params_hash(params) == manifest["params_hash"]:
+        plan.skipped_templates = {
+            entry["template"]
+            for entry in files.values()
+            if not entry.get("outdated") and not _template_changed(entry)
+        }
+    params = load_license(freeze_params(params), " * ")
+    GENERATORS[command]["render"](params, riotbase, output_dir, plan)
+
+    modified = []
+    for path in list(plan):
+        current_hash = file_hash(path)
+        if current_hash is None or force:
+            continue
+        entry = files.get(os.path.relpath(path, output_dir))
+        generated_hash = entry["hash"] if entry else None
+        if current_hash in (generated_hash, content_hash(plan[path])):
+            continue
+        modified.append(path)
+        plan.discard(path)
+
+    # Modified files kept are outdated, they are rendered again next time
+    kept_files = {}
+    for relpath, entry in files.items():
+        if os.path.normpath(os.path.join(output_dir, relpath)) in modified:
+            kept_files[relpath] = {**entry, "outdated": True}
+        elif entry["template"] in plan.skipped_templates:
+            kept_files[relpath] = entry
+    add_manifest(plan, command, params, riotbase, output_dir, kept_files)
+    return plan, modified
+
+
+@measure_command("regen")
+def generate_regen(directories, force=False, dry_run=False):
+    """Regenerate the code of directories generated by riotgen."""
+    failures = 0
+    for output_dir in directories:
+        try:
+            plan, modified = render_regen(output_dir, force)
+        except RiotgenError as exc:
+            failures += 1
+            click.echo(
+                click.style(f"{output_dir}: {exc}", fg="red"),
+                err=True,
+            )
+            continue
+        for path in modified:
+            click.echo(
+                click.style(
+                    f"{path} was modified, it's kept "
+                    "(use --force to overwrite)",
+                    fg="yellow",
+                ),
+                err=True,
+            )
+        if dry_run:
+            commit_plan(plan, dry_run)
+            continue
+        plan.write()
+        click.echo(f"{output_dir} regenerated ({plan.summary()})")
+
+    if failures:
+        raise RiotgenError(
+            f"{failures} of {len(directories)} directories failed "
+            "to regenerate"
+        )
@@ -0,0 +1,428 @@
+"""RIOTBASE index module.
+
+The boards, CPUs, packages, modules and features available in a RIOT
+checkout are indexed so that the generators parameters can be checked
+against them.
+
+The tree is walked with a pool of threads and the state of each directory is
+kept in the cache: only the directories and makefiles whose modification
+time changed are read again. The index itself is a sorted file of
+"key:name" lines, stored per git commit and searched in a memory map.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from riotgen.cache import evict_cache_files, get_version_cache_dir
+from riotgen.timing import timed
+from riotgen.utils import get_git_commit
+
+INDEX_KEYS = ("boards", "cpus", "packages", "modules", "features")
+
+# Directories walked recursively, pkg is only listed
+WALK_DIRS = ("boards", "cpu", "sys", "drivers")
+LIST_DIRS = ("pkg",)
+
+SCAN_MAX_WORKERS = 32
+
+# Cached index files and tree states, the least recently used are evicted
+INDEX_CACHE_MAX_ENTRIES = 32
+
+# Seconds the commit of a RIOTBASE is kept, its checkout may change while a
+# daemon is running
+COMMIT_TTL = 1.0
+
+# Boards selected by RIOT depending on the host
+BOARD_ALIASES = {"native": ("native32", "native64")}
+
+MODULE_DEFINITION = re.compile(r"^\s*MODULE\s*[:?]?=\s*(\S+)\s*$", re.M)
+PSEUDOMODULES_DEFINITION = re.compile(
+    r"^\s*PSEUDOMODULES\s*[:+?]?=\s*(.*)$", re.M
+)
+FEATURES_DEFINITION = re.compile(
+    r"^\s*FEATURES_PROVIDED\s*[:+?]?=\s*(.*)$", re.M
+)
+FEATURES_YAML_NAME = re.compile(r"^\s*-?\s*name:\s*(\S+)\s*$", re.M)
+
+_INDEXES = {}
+_COMMITS = {}
+
+
+class RiotbaseIndex:
+    """Sorted "key:name" lines, searched without being deserialized.
+
+    The buffer is a memory map of an index file, or bytes.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    def _find(self, entry):
+        """Return the offset of the first line greater or equal to entry."""
+        low, high = 0, len(self.buffer)
+        while low < high:
+            middle = (low + high) // 2
+            start = self.buffer.rfind(b"\n", 0, middle) + 1
+            end = self.buffer.find(b"\n", start)
+            if self.buffer[start:end] < entry:
+                low = end + 1
+            else:
+                high = start
+        return low
+
+    def contains(self, key, name):
+        """Return True if name is indexed for key."""
+        entry = f"{key}:{name}".encode()
+        start = self._find(entry)
+        end = self.buffer.find(b"\n", start)
+        return start < len(self.buffer) and self.buffer[start:end] == entry
+
+    def has_entries(self, key):
+        """Return True if at least one name is indexed for key."""
+        prefix = f"{key}:".encode()
+        start = self._find(prefix)
+        return self.buffer[start : start + len(prefix)] == prefix
+
+    def names(self, key):
+        """Return the sorted list of the names indexed for key."""
+        prefix = f"{key}:".encode()
+        names = []
+        start = self._find(prefix)
+        while self.buffer[start : start + len(prefix)] == prefix:
+            end = self.buffer.find(b"\n", start)
+            names.append(self.buffer[start + len(prefix) : end].decode())
+            start = end + 1
+        return names
+
+
+def _read(path):
+    try:
+        with open(path, errors="replace") as f_source:
+            return f_source.read()
+    except OSError:
+        return ""
+
+
+def _get_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _parse_values(pattern, content):
+    values = set()
+    for match in pattern.findall(content):
+        values.update(
+            value
+            for value in match.split("#")[0].split()
+            if "$" not in value and "%" not in value
+        )
+    return values
+
+
+def _is_makefile(name):
+    return name.startswith("Makefile") or name.endswith(".mk")
+
+
+def _parse_makefile(path):
+    """Return the modules and features defined in a makefile."""
+    content = _read(path)
+    modules = _parse_values(PSEUDOMODULES_DEFINITION, content)
+    if os.path.basename(path) == "Makefile":
+        module = MODULE_DEFINITION.search(content)
+        if module is not None and "$" not in module.group(1):
+            modules.add(module.group(1))
+        else:
+            modules.add(os.path.basename(os.path.dirname(path)))
+    return {
+        "modules": sorted(modules),
+        "features": sorted(_parse_values(FEATURES_DEFINITION, content)),
+    }
+
+
+def _scan_directory(riotbase, relpath, previous=None, recursive=True):
+    """Return the state of a directory, reusing its previous state.
+
+    The directory is only listed again when its modification time changed,
+    and makefiles are only read again when their modification time changed.
+    """
+    path = os.path.join(riotbase, relpath)
+    mtime = _get_mtime(path)
+    if mtime is None:
+        return None
+
+    if previous is not None and previous["mtime"] == mtime:
+        subdirs = previous["subdirs"]
+        makefiles = list(previous["files"])
+    else:
+        subdirs = []
+        makefiles = []
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            entries = []
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir():
+                subdirs.append(entry.name)
+            elif recursive and _is_makefile(entry.name):
+                makefiles.append(entry.name)
+        subdirs.sort()
+
+    files = {}
+    previous_files = previous["files"] if previous is not None else {}
+    for name in sorted(makefiles):
+        file_path = os.path.join(path, name)
+        file_mtime = _get_mtime(file_path)
+        if file_mtime is None:
+            continue
+        state = previous_files.get(name)
+        if state is None or state["mtime"] != file_mtime:
+            state = {"mtime": file_mtime, **_parse_makefile(file_path)}
+        files[name] = state
+    return {"mtime": mtime, "subdirs": subdirs, "files": files}
+
+
+def walk_riotbase(riotbase, previous_tree=None, max_workers=None):
+    """Walk a RIOTBASE directory with a pool of threads.
+
+    Return the state of all the walked directories by relative path.
+    """
+    previous_tree = previous_tree or {}
+    if max_workers is None:
+        max_workers = min(SCAN_MAX_WORKERS, (os.cpu_count() or 1) * 4)
+    tree = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        def submit(relpath, recursive):
+            future = executor.submit(
+                _scan_directory,
+                riotbase,
+                relpath,
+                previous_tree.get(relpath),
+                recursive,
+            )
+            futures[future] = (relpath, recursive)
+
+        futures = {}
+        for relpath in WALK_DIRS:
+            submit(relpath, True)
+        for relpath in LIST_DIRS:
+            submit(relpath, False)
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                relpath, recursive = futures.pop(future)
+                state = future.result()
+                if state is None:
+                    continue
+                tree[relpath] = state
+                if not recursive:
+                    continue
+                for name in state["subdirs"]:
+                    submit(f"{relpath}/{name}", True)
+    return tree
+
+
+def build_index(riotbase, tree):
+    """Return the index names by key from the state of a RIOTBASE tree."""
+    boards = set(tree.get("boards", {}).get("subdirs", ())) - {"common"}
+    cpus = set(tree.get("cpu", {}).get("subdirs", ())) - {"common"}
+    packages = set(tree.get("pkg", {}).get("subdirs", ()))
+    modules = set(packages)
+    features = set()
+    for state in tree.values():
+        for file_state in state["files"].values():
+            modules.update(file_state["modules"])
+            features.update(file_state["features"])
+    features.update(
+        FEATURES_YAML_NAME.findall(
+            _read(os.path.join(riotbase, "features.yaml"))
+        )
+    )
+    return {
+        "boards": sorted(boards),
+        "cpus": sorted(cpus),
+        "packages": sorted(packages),
+        "modules": sorted(modules),
+        "features": sorted(features),
+    }
+
+
+def scan_riotbase(riotbase, previous_tree=None):
+    """Scan a RIOTBASE directory and return its index and tree state.
+
+    The index maps each of INDEX_KEYS to a sorted list of names.
+    """
+    tree = walk_riotbase(riotbase, previous_tree)
+    return build_index(riotbase, tree), tree
+
+
+def serialize_index(index):
+    """Return the content of an index file."""
+    lines = sorted(
+        f"{key}:{name}\n" for key in INDEX_KEYS for name in index.get(key, ())
+    )
+    return "".join(lines).encode()
+
+
+def _get_index_dir():
+    return get_version_cache_dir("riotbase")
+
+
+def _write_cache_file(path, content):
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f_cache:
+            f_cache.write(content)
+        os.replace(tmp_path, path)
+    except OSError:
+        return False
+    return True
+
+
+def _touch(path):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _map_index(path):
+    try:
+        with open(path, "rb") as f_index:
+            if os.fstat(f_index.fileno()).st_size == 0:
+                return RiotbaseIndex(b"")
+            return RiotbaseIndex(
+                mmap.mmap(f_index.fileno(), 0, access=mmap.ACCESS_READ)
+            )
+    except (OSError, ValueError):
+        return None
+
+
+def _read_tree(path):
+    try:
+        with open(path) as f_tree:
+            return json.load(f_tree)
+    except (OSError, ValueError):
+        return None
+
+
+def get_riotbase_commit(riotbase):
+    """Return the git commit checked out in a RIOTBASE directory.
+
+    The commit is read again once it's older than COMMIT_TTL seconds, e.g.
+    for the requests of a long running daemon.
+    """
+    now = time.monotonic()
+    entry = _COMMITS.get(riotbase)
+    if entry is not None and now - entry[1] < COMMIT_TTL:
+        return entry[0]
+    commit = get_git_commit(riotbase)
+    _COMMITS[riotbase] = (commit, now)
+    return commit
+
+
+def reset_riotbase_commits():
+    """Forget the git commits of the RIOTBASE directories."""
+    _COMMITS.clear()
+
+
+def get_riotbase_index(riotbase):
+    """Return the index of a RIOTBASE directory.
+
+    The index of a git checkout is stored for its commit, so a commit is only
+    scanned once. Otherwise, the tree is scanned again, incrementally.
+    Nothing is stored for directories that aren't RIOT checkouts.
+    """
+    riotbase = os.path.abspath(os.path.expanduser(riotbase))
+    commit = get_riotbase_commit(riotbase)
+    key = (riotbase, commit)
+    if key in _INDEXES:
+        return _INDEXES[key]
+
+    index_dir = _get_index_dir()
+    trees_dir = os.path.join(index_dir, "trees")
+    path_hash = hashlib.sha256(riotbase.encode()).hexdigest()
+    name = commit if commit is not None else path_hash
+    index_path = os.path.join(index_dir, name + ".idx")
+    tree_path = os.path.join(trees_dir, path_hash + ".json")
+    index = _map_index(index_path) if commit is not None else None
+    if index is not None:
+        _touch(index_path)
+    else:
+        content, tree = scan_riotbase(riotbase, _read_tree(tree_path))
+        content = serialize_index(content)
+        index = RiotbaseIndex(content)
+        if index.has_entries("boards"):
+            _write_cache_file(tree_path, json.dumps(tree).encode())
+            if _write_cache_file(index_path, content):
+                index = _map_index(index_path) or index
+            evict_cache_files(index_dir, INDEX_CACHE_MAX_ENTRIES)
+            evict_cache_files(trees_dir, INDEX_CACHE_MAX_ENTRIES)
+
+    _INDEXES[key] = index
+    return index
+
+
+def _is_known(riotbase, index, key, value):
+    if index.contains(key, value):
+        return True
+    if key == "boards":
+        # Boards added since the commit was indexed, e.g. by riotgen itself
+        aliases = BOARD_ALIASES.get(value, ())
+        return any(index.contains(key, alias) for alias in aliases) or (
+            os.path.isdir(os.path.join(riotbase, "boards", value))
+        )
+    if key == "cpus":
+        return os.path.isdir(os.path.join(riotbase, "cpu", value))
+    if key == "packages":
+        return os.path.isdir(os.path.join(riotbase, "pkg", value))
+    return False
+
+
+@timed("riotbase")
+def check_riotbase_params(params, group, riotbase):
+    """Check parameters against the RIOTBASE index.
+
+    Return the list of warnings about unknown boards, CPUs, packages,
+    modules or features. Nothing is checked when RIOTBASE isn't a RIOT
+    checkout.
+    """
+    riotbase = os.path.abspath(os.path.expanduser(riotbase))
+    index = get_riotbase_index(riotbase)
+    if not index.has_entries("boards"):
+        return []
+
+    checks = [
+        ("modules", "modules", "module"),
+        ("packages", "packages", "package"),
+        ("features_required", "features", "feature"),
+        ("features_provided", "features", "feature"),
+    ]
+    if group == "application":
+        checks.append(("board", "boards", "board"))
+    elif group == "board":
+        checks.append(("cpu", "cpus", "CPU"))
+
+    warnings = []
+    for param, key, label in checks:
+        values = params[group].get(param)
+        if not values:
+            continue
+        if isinstance(values, str):
+            values = [values]
+        for value in values:
+            if not _is_known(riotbase, index, key, value):
+                warnings.append(f"Unknown {label} '{value}' in {riotbase}")
+    return warnings
@@ -0,0 +1,302 @@
+"""Generation daemon module.
+
+``riotgen serve`` keeps a process with warm template environments, license
+tables and RIOTBASE indexes listening on a Unix socket. Requests and
+responses are JSON objects, one per line. A request describes a single
+entity, like in batch config files:
+
+    {"command": "driver", "riotbase": "/opt/RIOT", "params": {...},
+     "global": {...}, "dry_run": false, "force": false}
+
+The parameters can also be read from a config file by the daemon, with
+"config" set to the absolute path of the file. The global parameters of the
+request are defaults for the ones of the config file, and the relative output
+directory of an application is resolved against "cwd" when it's set.
+
+The client only imports the generators when the daemon isn't running, to
+keep its startup time low.
+"""
+
+# pylint:disable=import-outside-toplevel
+
+import json
+import os
+import socket
+import socketserver
+import tempfile
+
+import click
+
+from riotgen.errors import OutputExistsError, ParameterError, RiotgenError
+
+SERVE_SOCKET_ENV = "RIOTGEN_SERVE_SOCKET"
+
+
+def get_socket_path():
+    """Return the path of the daemon Unix socket.
+
+    Sockets can't be created on network filesystems, so the socket is in the
+    runtime directory rather than in the cache directory.
+    """
+    socket_path = os.getenv(SERVE_SOCKET_ENV)
+    if socket_path:
+        return os.path.abspath(os.path.expanduser(socket_path))
+    base_dir = os.getenv("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(base_dir, f"riotgen-{os.getuid()}.sock")
+
+
+def _load_request_params(request, group):
+    global_params = dict(request.get("global") or {})
+    if request.get("config") is None:
+        return request.get("params") or {}, global_params
+    from riotgen.common import read_config_file
+
+    with open(request["config"]) as config:
+        params = read_config_file(config, group)
+    for name, value in (params.get("global") or {}).items():
+        if value or name not in global_params:
+            global_params[name] = value
+    return params.get(group) or {}, global_params
+
+
+def _resolve_request_path(request, path):
+    if request.get("cwd") is None:
+        return path
+    path = os.path.expanduser(path)
+    return os.path.abspath(os.path.join(request["cwd"], path))
+
+
+def _resolve_request_output_dir(request, entity):
+    """Return the entity and the output directory given by the client.
+
+    Like with the application command, the output directory given by the
+    client, or its working directory, may exist. The output_dir parameter of
+    the config file is only resolved against the working directory.
+    """
+    if request.get("output_dir"):
+        return entity, _resolve_request_path(request, request["output_dir"])
+    if isinstance(entity, dict) and entity.get("output_dir"):
+        output_dir = _resolve_request_path(request, entity["output_dir"])
+        return {**entity, "output_dir": output_dir}, None
+    return entity, request.get("cwd")
+
+
+def handle_request(request):
+    """Generate the entity described by a request and return the response.
+
+    In dry run mode, the response contains the rendered files, otherwise the
+    written and unchanged files.
+    """
+    from riotgen.api import GENERATORS, generate
+
+    try:
+        if not isinstance(request, dict):
+            raise ParameterError("request must be a JSON object")
+        command = request.get("command")
+        if command not in GENERATORS:
+            raise ParameterError(f"Unknown command '{command}'")
+        generator = GENERATORS[command]
+        entity, global_params = _load_request_params(
+            request, generator["group"]
+        )
+        entity, output_dir = _resolve_request_output_dir(request, entity)
+        dry_run = bool(request.get("dry_run"))
+        result = generate(
+            command,
+            entity,
+            request.get("riotbase"),
+            global_params,
+            output_dir=output_dir,
+            dry_run=dry_run,
+            force=bool(request.get("force")),
+        )
+    except OutputExistsError as exc:
+        return {
+            "status": "error",
+            "message": f"{exc}, use --force to overwrite",
+        }
+    except RiotgenError as exc:
+        return {"status": "error", "message": str(exc)}
+    except Exception as exc:  # pylint:disable=broad-except
+        return {"status": "error", "message": f"{type(exc).__name__}: {exc}"}
+
+    response = {
+        "status": "ok",
+        "output_dir": result["output_dir"],
+        "warnings": result["warnings"],
+    }
+    if dry_run:
+        response["files"] = result["files"]
+    else:
+        response["written"] = result["written"]
+        response["unchanged"] = result["unchanged"]
+        response["summary"] = (
+            f"{generator['label']} '{entity['name']}' generated in "
+            f"{result['output_dir']} ({len(result['written'])} files "
+            f"written, {len(result['unchanged'])} unchanged)"
+        )
+    return response
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """Handle the requests of a connection, one JSON object per line."""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as exc:
+                response = {"status": "error", "message": f"Bad JSON: {exc}"}
+            else:
+                response = handle_request(request)
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class GenerationServer(
+    socketserver.ThreadingMixIn, socketserver.UnixStreamServer
+):
+    """Unix socket server handling each connection in a thread."""
+
+    daemon_threads = True
+
+
+def _daemon_running(socket_path):
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+    except OSError:
+        return False
+    return True
+
+
+def _check_socket_owner(socket_path):
+    """Refuse a socket created by another user.
+
+    The default socket path in the temporary directory is predictable, it
+    could be created by another user to intercept the requests.
+    """
+    try:
+        owner = os.lstat(socket_path).st_uid
+    except OSError:
+        return
+    if owner != os.getuid():
+        raise RiotgenError(f"{socket_path} is owned by another user")
+
+
+def create_server(socket_path=None):
+    """Create the generation server with warm caches.
+
+    A stale socket of a stopped daemon is removed. The socket is only
+    accessible by the user running the daemon.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        raise RiotgenError("Unix sockets are not supported")
+    from riotgen.common import preload_templates
+
+    socket_path = socket_path or get_socket_path()
+    _check_socket_owner(socket_path)
+    if os.path.exists(socket_path):
+        if _daemon_running(socket_path):
+            raise RiotgenError(
+                f"riotgen daemon already running on {socket_path}"
+            )
+        os.remove(socket_path)
+
+    preload_templates()
+    # The socket is created with the permissions of the umask
+    umask = os.umask(0o177)
+    try:
+        return GenerationServer(socket_path, RequestHandler)
+    finally:
+        os.umask(umask)
+
+
+def serve(socket_path=None):
+    """Run the generation server until interrupted."""
+    server = create_server(socket_path)
+    click.echo(f"riotgen daemon listening on {server.server_address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(server.server_address)
+
+
+def send_request(request, socket_path=None):
+    """Send a request to the daemon and return its response.
+
+    Return None when the daemon isn't running.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    socket_path = socket_path or get_socket_path()
+    _check_socket_owner(socket_path)
+    try:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(socket_path)
+    except OSError:
+        client.close()
+        return None
+    with client, client.makefile("rwb") as stream:
+        stream.write(json.dumps(request).encode() + b"\n")
+        stream.flush()
+        line = stream.readline()
+    if not line:
+        raise RiotgenError("riotgen daemon closed the connection")
+    return json.loads(line)
+
+
+def _get_client_identity():
+    from riotgen.utils import get_usermail, get_username
+
+    identity = {
+        "author_name": get_username(),
+        "author_email": get_usermail(),
+        "organization": get_username(),
+    }
+    return {name: value for name, value in identity.items() if value}
+
+
+def generate_client(
+    command, config, riotbase, output_dir=None, force=False, dry_run=False
+):
+    """Generate an entity with the daemon, or in process if not running.
+
+    Paths are resolved and the author identity is read on the client side,
+    so that the result doesn't depend on the environment of the daemon.
+    """
+    if riotbase is not None:
+        riotbase = os.path.abspath(os.path.expanduser(riotbase))
+    request = {
+        "command": command,
+        "config": os.path.abspath(config),
+        "riotbase": riotbase,
+        "global": _get_client_identity(),
+        "cwd": os.getcwd(),
+        "force": force,
+        "dry_run": dry_run,
+    }
+    if output_dir is not None:
+        request["output_dir"] = os.path.abspath(os.path.expanduser(output_dir))
+    response = send_request(request)
+    if response is None:
+        response = handle_request(request)
+
+    if response["status"] != "ok":
+        raise RiotgenError(response["message"])
+    for warning in response["warnings"]:
+        click.echo(click.style(f"Warning: {warning}", fg="yellow"), err=True)
+    if dry_run:
+        from riotgen.plan import RenderPlan
+
+        plan = RenderPlan()
+        for path, content in response["files"].items():
+            plan.add(path, content)
+        click.echo(plan.format())
+        return
+    click.echo(response["summary"])
@@ -0,0 +1,10 @@
+"""Tests fixtures."""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_dir_isolation(tmp_path_factory, monkeypatch):
+    """Keep the tests from writing to the user cache directory."""
+    cache_dir = tmp_path_factory.mktemp("riotgen-cache")
+    monkeypatch.setenv("RIOTGEN_CACHE_DIR", str(cache_dir))
@@ -0,0 +1,128 @@
+"""Programmatic generation API tests."""
+
+import os
+import textwrap
+
+import pytest
+
+from riotgen.api import (
+    OutputExistsError,
+    ParameterError,
+    RiotgenError,
+    generate,
+)
+
+TEST_DATA_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "test_data"
+)
+
+MODULE_PARAMS = {
+    "name": "test",
+    "displayed_name": "Test",
+    "brief": "test brief description",
+    "ingroup": "sys",
+}
+
+GLOBAL_PARAMS = {
+    "author_name": "test_name",
+    "author_email": "test_email",
+    "organization": "test_orga",
+}
+
+
+def test_generate(tmpdir):
+    riotbase = tmpdir.mkdir("riotbase")
+    result = generate(
+        "module", MODULE_PARAMS, riotbase.strpath, GLOBAL_PARAMS, dry_run=True
+    )
+    module_dir = riotbase.join("sys", "test").strpath
+    assert result["output_dir"] == module_dir
+    assert result["written"] == []
+    assert os.path.join(module_dir, "test.c") in result["files"]
+    assert riotbase.listdir() == []
+
+    result = generate("module", MODULE_PARAMS, riotbase.strpath, GLOBAL_PARAMS)
+    assert sorted(result["written"]) == sorted(result["files"])
+    with open(os.path.join(module_dir, "test.c")) as f_module:
+        assert f_module.read() == result["files"][f_module.name]
+
+    with pytest.raises(OutputExistsError):
+        generate("module", MODULE_PARAMS, riotbase.strpath, GLOBAL_PARAMS)
+    result = generate(
+        "module", MODULE_PARAMS, riotbase.strpath, GLOBAL_PARAMS, force=True
+    )
+    assert result["written"] == []
+    assert sorted(result["unchanged"]) == sorted(result["files"])
+
+
+def test_generate_application_output_dir(tmpdir):
+    riotbase = tmpdir.mkdir("riotbase")
+    output_dir = tmpdir.join("app").strpath
+    params = {"name": "test", "brief": "Test application", "board": "native"}
+    result = generate(
+        "application",
+        params,
+        riotbase.strpath,
+        GLOBAL_PARAMS,
+        output_dir=output_dir,
+    )
+    assert result["output_dir"] == output_dir
+    assert os.path.exists(os.path.join(output_dir, "main.c"))
+
+    # Only the output_dir parameter is checked, like in batch config files
+    generate(
+        "application",
+        params,
+        riotbase.strpath,
+        GLOBAL_PARAMS,
+        output_dir=output_dir,
+    )
+    with pytest.raises(OutputExistsError):
+        generate(
+            "application",
+            {**params, "output_dir": output_dir},
+            riotbase.strpath,
+            GLOBAL_PARAMS,
+        )
+
+
+@pytest.mark.parametrize(
+    "command,params,riotbase,message",
+    [
+        ("unknown", {}, "riotbase", "Unknown command 'unknown'"),
+        ("module", [], "riotbase", "params must be a mapping"),
+        ("module", MODULE_PARAMS, None, "Missing riotbase directory"),
+        ("module", {"name": "test"}, "riotbase", "Missing displayed name"),
+        (
+            "application",
+            {"name": "test", "brief": "Test", "board": "native"},
+            "riotbase",
+            "Missing output dir",
+        ),
+    ],
+)
+def test_generate_errors(tmpdir, command, params, riotbase, message):
+    if riotbase is not None:
+        riotbase = tmpdir.mkdir(riotbase).strpath
+    with pytest.raises(ParameterError) as exc_info:
+        generate(command, params, riotbase, GLOBAL_PARAMS)
+    assert isinstance(exc_info.value, RiotgenError)
+    assert message in str(exc_info.value)
+
+
+README = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "README.rst"
+)
+
+
+@pytest.mark.skipif(not os.path.exists(README), reason="README not found")
+def test_readme_example(tmpdir):
+    """Test the Python API example of the README."""
+    with open(README) as f_readme:
+        readme = f_readme.read()
+    start = readme.index("    from riotgen.api import generate\n")
+    end = readme.index("\n\n", readme.index("    print(", start))
+    example = textwrap.dedent(readme[start:end])
+    riotbase = tmpdir.mkdir("riotbase")
+    exec(example.replace("/opt/RIOT", riotbase.strpath), {})
+    assert riotbase.join("drivers", "foo", "foo.c").exists()
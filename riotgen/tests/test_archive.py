@@ -0,0 +1,104 @@
+"""Archive output tests."""
+
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+from click.testing import CliRunner
+
+from riotgen.archive import get_archive_format, get_archive_root
+from riotgen.errors import ParameterError
+from riotgen.main import riotgen
+
+TEST_DATA_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "test_data"
+)
+
+
+def test_get_archive_format():
+    assert get_archive_format("out.tar.gz") == "tar"
+    assert get_archive_format("out.tgz") == "tar"
+    assert get_archive_format("out.zip") == "zip"
+    assert get_archive_format("-") == "tar"
+    with pytest.raises(ParameterError):
+        get_archive_format("out.tar")
+
+
+def test_get_archive_root(tmpdir):
+    riotbase = tmpdir.join("riotbase").strpath
+    paths = [
+        os.path.join(riotbase, "boards", "test", "Makefile"),
+        os.path.join(riotbase, "drivers", "include", "test.h"),
+    ]
+    assert get_archive_root(paths, riotbase) == riotbase
+    app_dir = tmpdir.join("app").strpath
+    paths = [
+        os.path.join(app_dir, "main.c"),
+        os.path.join(app_dir, "Makefile"),
+    ]
+    assert get_archive_root(paths, riotbase) == app_dir
+
+
+def test_command_test_output_archive(tmpdir):
+    """Test the generated files are only written in the archive."""
+    riotbase = tmpdir.mkdir("riotbase")
+    archive = tmpdir.join("test.tar.gz")
+    config_file = os.path.join(TEST_DATA_DIR, "test.yml")
+    result = CliRunner().invoke(
+        riotgen,
+        ["test", "-c", config_file, "-r", riotbase, "-o", archive.strpath],
+    )
+    assert result.exit_code == 0
+    assert riotbase.listdir() == []
+
+    with tarfile.open(archive.strpath) as tar:
+        members = {member.name: member for member in tar.getmembers()}
+        assert sorted(members) == [
+            "tests/test/.riotgen-manifest.json",
+            "tests/test/Makefile",
+            "tests/test/README.md",
+            "tests/test/main.c",
+            "tests/test/tests/01-run.py",
+        ]
+        assert members["tests/test/tests/01-run.py"].mode == 0o755
+        assert members["tests/test/main.c"].mode == 0o644
+        with open(os.path.join(TEST_DATA_DIR, "test", "main.c")) as f_main:
+            expected = f_main.read()
+        assert tar.extractfile("tests/test/main.c").read().decode() == expected
+
+
+def test_command_batch_output_archive_zip(tmpdir):
+    """Test all batch entities are written in a single zip archive."""
+    riotbase = tmpdir.mkdir("riotbase")
+    archive = tmpdir.join("batch.zip")
+    config_file = os.path.join(TEST_DATA_DIR, "batch.yml")
+    result = CliRunner().invoke(
+        riotgen,
+        ["batch", "-c", config_file, "-r", riotbase, "-o", archive.strpath],
+    )
+    assert result.exit_code == 0
+    assert riotbase.listdir() == []
+
+    with zipfile.ZipFile(archive.strpath) as zip_file:
+        names = zip_file.namelist()
+        assert "boards/test/include/board.h" in names
+        assert "drivers/include/test.h" in names
+        info = zip_file.getinfo("tests/test/tests/01-run.py")
+        assert (info.external_attr >> 16) & 0o777 == 0o755
+
+
+def test_command_output_archive_stdout(tmpdir):
+    """Test the archive is streamed to stdout."""
+    riotbase = tmpdir.mkdir("riotbase")
+    config_file = os.path.join(TEST_DATA_DIR, "driver.yml")
+    result = CliRunner().invoke(
+        riotgen, ["driver", "-c", config_file, "-r", riotbase, "-o", "-"]
+    )
+    assert result.exit_code == 0
+    assert riotbase.listdir() == []
+    assert "files archived in -" in result.stderr
+
+    with tarfile.open(fileobj=io.BytesIO(result.stdout_bytes)) as tar:
+        assert "drivers/test/test.c" in tar.getnames()
@@ -0,0 +1,184 @@
+"""Batch generator tests."""
+
+import io
+
+import pytest
+from mock import patch
+
+from riotgen.batch import generate_batch, load_batch, run_batch_jobs
+from riotgen.errors import ParameterError, RiotgenError
+from riotgen.params import Params
+from riotgen.plan import RenderPlan
+
+TEST_BATCH = """global:
+  author_name: test_name
+  author_email: test_email
+  organization: test_orga
+  license: BSD
+application:
+  - name: test app
+    brief: Test application
+    modules: xtimer,fmt
+    output_dir: {output_dir}
+board:
+  - name: test_board
+    displayed_name: Test
+    cpu: cpu_test
+    cpu_model: cpu_model_test
+"""
+
+
+def _config(content):
+    config = io.StringIO(content)
+    config.name = "batch.yml"
+    return config
+
+
+def test_load_batch(tmpdir):
+    """Test the load_batch function."""
+    riotbase = tmpdir.strpath
+    output_dir = tmpdir.join("app").strpath
+    jobs = load_batch(
+        _config(TEST_BATCH.format(output_dir=output_dir)), riotbase
+    )
+    assert [job[0] for job in jobs] == ["application", "board"]
+
+    command, params, job_output_dir = jobs[0]
+    assert job_output_dir == output_dir
+    assert params["application"]["name"] == "test_app"
+    assert params["application"]["board"] == "native"
+    assert isinstance(params, Params)
+    assert params["application"]["modules"] == ("fmt", "xtimer")
+    assert params["application"]["riotbase"] == riotbase
+    assert params["global"]["license"] == "BSD"
+    assert "license_header" in params["global"]
+
+    command, params, job_output_dir = jobs[1]
+    assert job_output_dir == tmpdir.join("boards", "test_board").strpath
+    assert params["global"]["license"] == "LGPL21"
+    assert params["board"]["features_provided"] == ()
+
+
+@pytest.mark.parametrize(
+    "content,error",
+    [
+        ("boards: []\n", "Unknown batch entities: boards"),
+        ("board: {name: test}\n", "board: a list of entities is expected"),
+        ("board:\n  - name: test\n", "board[0]: Missing displayed name"),
+        (
+            "application:\n  - {name: test, brief: test}\n",
+            "application[0]: Missing output dir",
+        ),
+        (
+            "module:\n"
+            "  - {name: test, displayed_name: test, brief: test}\n"
+            "  - {name: test, displayed_name: test, brief: test}\n",
+            "is generated twice",
+        ),
+    ],
+)
+def test_load_batch_errors(tmpdir, content, error):
+    """Test all errors are reported when loading an invalid batch."""
+    content = (
+        "global: {author_name: a, author_email: b, organization: c}\n"
+        + content
+    )
+    with pytest.raises(RiotgenError) as exc_info:
+        load_batch(_config(content), tmpdir.strpath)
+    assert error in str(exc_info.value)
+
+
+def test_load_batch_invalid(tmpdir):
+    """Test loading a batch which is not a mapping."""
+    with pytest.raises(ParameterError) as exc_info:
+        load_batch(_config("- board\n"), tmpdir.strpath)
+    assert "Invalid batch config file" in str(exc_info.value)
+
+
+def test_generate_batch(tmpdir):
+    """Test the generate_batch function."""
+    output_dir = tmpdir.join("app")
+    generate_batch(
+        _config(TEST_BATCH.format(output_dir=output_dir.strpath)),
+        tmpdir.strpath,
+    )
+    assert output_dir.join("main.c").exists()
+    assert tmpdir.join("boards", "test_board", "Kconfig").exists()
+
+    with pytest.raises(RiotgenError):
+        generate_batch(
+            _config(TEST_BATCH.format(output_dir=output_dir.strpath)),
+            tmpdir.strpath,
+        )
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_run_batch_jobs(tmpdir, jobs):
+    """Test errors are aggregated in the order of the batch jobs."""
+    output_file = tmpdir.join("app")
+    output_file.write("not a directory")
+    jobs_list = load_batch(
+        _config(TEST_BATCH.format(output_dir=output_file.strpath)),
+        tmpdir.strpath,
+        force=True,
+    )
+    results = run_batch_jobs(jobs_list, tmpdir.strpath, jobs=jobs)
+    assert len(results) == 2
+    assert results[0][0] is None
+    assert results[0][1].startswith("FileExistsError")
+    plan, error = results[1]
+    assert error is None
+    kconfig = tmpdir.join("boards", "test_board", "Kconfig")
+    assert kconfig.exists()
+    assert plan[kconfig.strpath] == kconfig.read()
+
+
+def test_run_batch_jobs_interrupted(tmpdir):
+    """Test staged files are removed when a batch job is interrupted."""
+    jobs_list = load_batch(
+        _config(TEST_BATCH.format(output_dir=tmpdir.join("app").strpath)),
+        tmpdir.strpath,
+    )
+    with (
+        patch.object(RenderPlan, "write", side_effect=KeyboardInterrupt),
+        patch.object(RenderPlan, "abort", autospec=True) as m_abort,
+    ):
+        with pytest.raises(KeyboardInterrupt):
+            run_batch_jobs(jobs_list, tmpdir.strpath)
+    assert m_abort.call_count == 1
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_run_batch_jobs_dry_run(tmpdir, jobs):
+    """Test nothing is written in dry run mode."""
+    riotbase = tmpdir.mkdir("riotbase")
+    output_dir = tmpdir.join("app")
+    jobs_list = load_batch(
+        _config(TEST_BATCH.format(output_dir=output_dir.strpath)),
+        riotbase.strpath,
+    )
+    results = run_batch_jobs(
+        jobs_list, riotbase.strpath, jobs=jobs, dry_run=True
+    )
+    assert [error for _, error in results] == [None, None]
+    assert output_dir.join("main.c").strpath in results[0][0]
+    assert riotbase.join("boards", "test_board", "Kconfig") in results[1][0]
+    assert not output_dir.exists()
+    assert riotbase.listdir() == []
+
+
+def test_generate_batch_failure(tmpdir, capsys):
+    """Test a failing batch job doesn't stop the others."""
+    output_file = tmpdir.join("app")
+    output_file.write("not a directory")
+    with pytest.raises(RiotgenError) as exc_info:
+        generate_batch(
+            _config(TEST_BATCH.format(output_dir=output_file.strpath)),
+            tmpdir.strpath,
+            force=True,
+            jobs=0,
+        )
+    assert "1 of 2 entities failed" in str(exc_info.value)
+    captured = capsys.readouterr()
+    assert "Application 'test_app' failed: FileExistsError" in captured.err
+    assert "Support for board 'test_board' generated in" in captured.out
@@ -0,0 +1,195 @@
+"""Cache tests."""
+
+import datetime
+import os
+
+import pytest
+from click.testing import CliRunner
+from mock import patch
+
+import riotgen.common as common
+from riotgen import __version__
+from riotgen.cache import (
+    BoundedBytecodeCache,
+    clear_cache,
+    get_bytecode_cache,
+    get_cache_dir,
+    get_cache_stats,
+    get_config_cache_key,
+    load_cached_config,
+)
+from riotgen.common import (
+    get_environment,
+    read_config_file,
+    reset_environments,
+)
+from riotgen.main import riotgen
+
+TEST_CONFIG = """board:
+  name: test
+  features_provided: periph_gpio,periph_uart
+"""
+
+
+@pytest.fixture
+def cache_dir(tmpdir, monkeypatch):
+    """A fixture enabling the cache in a temporary directory."""
+    monkeypatch.setenv("RIOTGEN_CACHE_DIR", tmpdir.strpath)
+    monkeypatch.setenv("RIOTGEN_BYTECODE_CACHE", "1")
+    # Precompiled templates bypass the bytecode cache
+    monkeypatch.setattr(
+        common, "PRECOMPILED_TEMPLATE_DIR", tmpdir.join("none").strpath
+    )
+    reset_environments()
+    yield tmpdir
+    reset_environments()
+
+
+def test_get_cache_dir(tmpdir, monkeypatch):
+    """Test the get_cache_dir function."""
+    monkeypatch.setenv("RIOTGEN_CACHE_DIR", tmpdir.strpath)
+    assert get_cache_dir() == tmpdir.strpath
+
+    monkeypatch.delenv("RIOTGEN_CACHE_DIR")
+    monkeypatch.setenv("XDG_CACHE_HOME", tmpdir.strpath)
+    assert get_cache_dir() == os.path.join(tmpdir.strpath, "riotgen")
+
+
+def test_bytecode_cache_disabled(monkeypatch):
+    """Test the bytecode cache is opt-in."""
+    monkeypatch.delenv("RIOTGEN_BYTECODE_CACHE", raising=False)
+    assert get_bytecode_cache() is None
+
+
+def test_bytecode_cache(cache_dir):
+    """Test templates bytecode is stored in the cache directory."""
+    bytecode_cache = get_bytecode_cache()
+    assert isinstance(bytecode_cache, BoundedBytecodeCache)
+    expected_dir = cache_dir.join(__version__, "templates").strpath
+    assert bytecode_cache.directory == expected_dir
+
+    env = get_environment()
+    assert isinstance(env.bytecode_cache, BoundedBytecodeCache)
+    env.get_template("common/header-licence.j2")
+    assert len(os.listdir(bytecode_cache.directory)) == 1
+
+    # A fresh environment loads the template from the cache
+    reset_environments()
+    template = get_environment().get_template("common/header-licence.j2")
+    context = {"global": {"license": "BSD", "year": 2025, "organization": "o"}}
+    assert "Copyright (C) 2025 o" in template.render(**context)
+    assert len(os.listdir(bytecode_cache.directory)) == 1
+
+
+def test_bytecode_cache_eviction(cache_dir):
+    """Test the bytecode cache size stays bounded."""
+    bytecode_cache = get_bytecode_cache()
+    env = get_environment()
+    env.get_template("common/header-licence.j2")
+    env.get_template("common/header-headerfile.j2")
+    assert len(os.listdir(bytecode_cache.directory)) == 2
+
+    bytecode_cache.max_size = 1
+    bytecode_cache.evict()
+    assert os.listdir(bytecode_cache.directory) == []
+
+
+def test_config_cache(cache_dir, monkeypatch):
+    """Test parsed config files are cached by content hash."""
+    monkeypatch.setenv("RIOTGEN_CONFIG_CACHE", "1")
+    config_file = cache_dir.join("config.yml")
+    config_file.write(TEST_CONFIG)
+    with open(config_file.strpath) as f_config:
+        expected = read_config_file(f_config, "board")
+    assert sorted(expected["board"]["features_provided"]) == [
+        "periph_gpio",
+        "periph_uart",
+    ]
+    configs_dir = cache_dir.join(__version__, "configs")
+    assert len(configs_dir.listdir("*.config.json")) == 1
+
+    with patch("riotgen.common.is_ini_config") as m_sniff:
+        with open(config_file.strpath) as f_config:
+            assert read_config_file(f_config, "board") == expected
+        m_sniff.assert_not_called()
+
+    # The same content parsed for other commands isn't normalized the same
+    with open(config_file.strpath) as f_config:
+        params = read_config_file(f_config)
+    assert params["board"]["features_provided"] == "periph_gpio,periph_uart"
+    assert len(configs_dir.listdir("*.config.json")) == 2
+
+    stats = get_cache_stats()["configs"]
+    assert stats["enabled"] is True
+    assert stats["entries"] == 2
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+
+
+def test_config_cache_disabled(cache_dir, monkeypatch):
+    """Test the config cache is opt-in."""
+    monkeypatch.delenv("RIOTGEN_CONFIG_CACHE", raising=False)
+    config_file = cache_dir.join("config.yml")
+    config_file.write(TEST_CONFIG)
+    with open(config_file.strpath) as f_config:
+        read_config_file(f_config, "board")
+    assert not cache_dir.join(__version__, "configs").exists()
+
+
+def test_cache_command(cache_dir, monkeypatch):
+    """Test the cache stats and clear commands."""
+    monkeypatch.setenv("RIOTGEN_CONFIG_CACHE", "1")
+    get_environment().get_template("common/header-licence.j2")
+    config_file = cache_dir.join("config.yml")
+    config_file.write(TEST_CONFIG)
+    with open(config_file.strpath) as f_config:
+        read_config_file(f_config, "board")
+
+    runner = CliRunner()
+    result = runner.invoke(riotgen, ["cache", "stats"])
+    assert result.exit_code == 0
+    assert f"Cache directory: {cache_dir.strpath}" in result.output
+    assert "Templates: enabled, 1 entries" in result.output
+    assert "Configs: enabled, 1 entries" in result.output
+    assert "0 hits, 1 misses" in result.output
+
+    result = runner.invoke(riotgen, ["cache", "clear"])
+    assert result.exit_code == 0
+    assert not cache_dir.join(__version__).exists()
+    result = runner.invoke(riotgen, ["cache", "stats"])
+    assert "Configs: enabled, 0 entries, 0.0 KiB" in result.output
+
+
+def test_cache_clear_shared_dir(cache_dir):
+    """Test only the riotgen data of a shared cache directory is removed."""
+    cache_dir.join("other_tool", "data").write("data", ensure=True)
+    cache_dir.join("1.0", "other").write("data", ensure=True)
+    cache_dir.join(__version__, "riotbase", "index.idx").write(
+        "boards:native\n", ensure=True
+    )
+    clear_cache()
+    assert not cache_dir.join(__version__).exists()
+    assert cache_dir.join("other_tool", "data").check()
+    assert cache_dir.join("1.0", "other").check()
+
+
+def test_config_cache_untrusted(cache_dir, monkeypatch):
+    """Test config cache entries are only loaded from JSON files."""
+    monkeypatch.setenv("RIOTGEN_CONFIG_CACHE", "1")
+    config_file = cache_dir.join("config.yml")
+    config_file.write("board:\n  name: test\n  date: 2025-01-01\n")
+    with open(config_file.strpath) as f_config:
+        params = read_config_file(f_config, "board")
+    assert params["board"]["date"] == datetime.date(2025, 1, 1)
+    configs_dir = cache_dir.join(__version__, "configs")
+    assert not configs_dir.exists()
+
+    key = get_config_cache_key("content")
+    configs_dir.join(key + ".config.json").write("not json", ensure=True)
+    assert load_cached_config(key) is None
+
+    # Entries written by other users are ignored
+    configs_dir.join(key + ".config.json").write('{"board": {}}')
+    assert load_cached_config(key) == {"board": {}}
+    monkeypatch.setattr(os, "getuid", lambda: os.stat(cache_dir).st_uid + 1)
+    assert load_cached_config(key) is None
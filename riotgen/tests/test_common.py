@@ -2,9 +2,11 @@
 
 import datetime
 import os
+import shutil
 
 import pytest
-from click import BadParameter, MissingParameter
+import yaml
+from jinja2 import ChoiceLoader, FileSystemLoader
 from mock import patch
 
 import riotgen.common as common
@@ -14,13 +16,22 @@ from riotgen.common import (
     check_global_params,
     check_params,
     check_riotbase,
+    compile_templates,
+    get_environment,
+    get_license_header,
+    is_ini_config,
+    load_license,
+    precompiled_templates_available,
     prompt_global_params,
     prompt_params,
     prompt_params_list,
     read_config_file,
+    register_license,
     render_file,
     render_source,
+    reset_environments,
 )
+from riotgen.errors import MissingParameterError, ParameterError
 from riotgen.utils import parse_list_option
 
 TEST_CONFIG = """[global]
@@ -98,17 +109,60 @@ def test_invalid_config_file(tmpdir):
     with open(filename, "w") as f_config:
         f_config.write("[invalid_content]\n-")
 
-    with pytest.raises(BadParameter):
+    with pytest.raises(ParameterError):
+        with open(filename) as f_config:
+            read_config_file(f_config)
+
+
+def test_invalid_yaml_config_file(tmpdir):
+    """Test YAML syntax errors are reported as bad parameters."""
+    filename = tmpdir.join("config.yml")
+    filename.write("global:\n  name: [test\n")
+    with pytest.raises(ParameterError) as exc_info:
+        with open(filename) as f_config:
+            read_config_file(f_config)
+    assert str(filename) in str(exc_info.value)
+
+
+def test_is_ini_config():
+    assert is_ini_config(TEST_CONFIG) is True
+    assert is_ini_config("# comment\n\n[global]\nname=test\n") is True
+    assert is_ini_config(TEST_YAML) is False
+    assert is_ini_config("[a, b]\n") is False
+    assert is_ini_config("") is False
+
+
+def test_read_multi_document_config(tmpdir):
+    """Test the documents of a YAML config are merged."""
+    filename = tmpdir.join("config.yml")
+    filename.write(
+        "global:\n  name: test\nboard:\n  - name: board1\n"
+        "---\nglobal:\n  year: 2025\nboard:\n  - name: board2\n"
+        "---\n"
+    )
+    with patch("yaml.load_all", wraps=yaml.load_all) as m_load_all:
+        with open(filename) as f_config:
+            config = read_config_file(f_config)
+    assert m_load_all.call_args.kwargs["Loader"] is getattr(
+        yaml, "CSafeLoader", yaml.SafeLoader
+    )
+    assert config == {
+        "global": {"name": "test", "year": 2025},
+        "board": [{"name": "board1"}, {"name": "board2"}],
+    }
+
+    filename.write("- item\n---\nkey: value\n")
+    with pytest.raises(ParameterError):
         with open(filename) as f_config:
             read_config_file(f_config)
 
 
 def test_check_riotbase():
     """Test the check_riotbase function."""
-    with pytest.raises(MissingParameter):
+    with pytest.raises(MissingParameterError):
         check_riotbase(None)
 
-    with pytest.raises(MissingParameter):
+    with pytest.raises(MissingParameterError):
         check_riotbase("")
 
     check_riotbase("test")
@@ -116,10 +170,10 @@ def test_check_riotbase():
 
 def test_check_param():
     """Test the _check_param function."""
-    with pytest.raises(MissingParameter):
+    with pytest.raises(MissingParameterError):
         _check_param({}, "test")
 
-    with pytest.raises(MissingParameter):
+    with pytest.raises(MissingParameterError):
         _check_param({"test": ""}, "test")
 
     _check_param({"test": "test"}, "test")
@@ -127,7 +181,7 @@ def test_check_param():
 
 def test_check_params():
     """Test the _check_params function."""
-    with pytest.raises(BadParameter):
+    with pytest.raises(ParameterError):
         check_params({}, ["test"], "test")
 
     # Regular test: all params in descriptor are set in the params
@@ -165,7 +219,7 @@ def test_check_params():
             "kwargs": {},
         },
     }
-    with pytest.raises(MissingParameter):
+    with pytest.raises(MissingParameterError):
         check_params(params, params_descriptor, "test")
 
 
@@ -367,3 +421,114 @@ def test_render_source(tmpdir):
         expected_content = f_expected.read()
 
     assert dest_content == expected_content
+
+
+def test_get_environment():
+    """Test the get_environment function."""
+    template_dir = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "test_data"
+    )
+    reset_environments()
+    env = get_environment()
+    assert get_environment() is env
+    assert get_environment(common.TEMPLATE_BASE_DIR) is env
+    assert env.trim_blocks is True
+    assert env.globals["zip"] is zip
+
+    template_name = "common/header-licence.j2"
+    template = env.get_template(template_name)
+    assert get_environment().get_template(template_name) is template
+
+    test_env = get_environment(template_dir)
+    assert test_env is not env
+    assert get_environment(template_dir, trim_blocks=False) is not test_env
+
+    reset_environments()
+    assert get_environment() is not env
+
+
+def test_compile_templates(tmpdir, monkeypatch):
+    """Test the bundled templates can be precompiled and loaded."""
+    template_dir = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "test_data"
+    )
+    compiled_dir = tmpdir.join("compiled").strpath
+    monkeypatch.setattr(common, "PRECOMPILED_TEMPLATE_DIR", compiled_dir)
+    assert precompiled_templates_available() is False
+
+    compile_templates()
+    assert precompiled_templates_available() is True
+    assert len(os.listdir(compiled_dir)) > 1
+
+    reset_environments()
+    env = get_environment()
+    assert isinstance(env.loader, ChoiceLoader)
+    context = {"global": {"license": "MIT", "year": 2025, "organization": "o"}}
+    template = env.get_template("common/header-licence.j2")
+    assert template.filename.startswith(compiled_dir)
+    assert " * Copyright (C) 2025 o" in template.render(**context)
+
+    # Custom template directories are always loaded from the sources
+    assert isinstance(get_environment(template_dir).loader, FileSystemLoader)
+
+    # Templates compiled for another version are ignored
+    with open(os.path.join(compiled_dir, "VERSION"), "w") as f_stamp:
+        f_stamp.write("0.0.0\n")
+    assert precompiled_templates_available() is False
+    reset_environments()
+    assert isinstance(get_environment().loader, FileSystemLoader)
+    reset_environments()
+
+
+def test_compile_templates_edited(tmpdir, monkeypatch):
+    """Test precompiled templates are ignored once a template is edited."""
+    template_dir = tmpdir.join("templates")
+    shutil.copytree(common.TEMPLATE_BASE_DIR, template_dir.strpath)
+    compiled_dir = tmpdir.join("compiled").strpath
+    monkeypatch.setattr(common, "TEMPLATE_BASE_DIR", template_dir.strpath)
+    monkeypatch.setattr(common, "PRECOMPILED_TEMPLATE_DIR", compiled_dir)
+    compile_templates()
+    assert precompiled_templates_available() is True
+
+    driver_c = template_dir.join("driver", "driver.c.j2")
+    driver_c.write("/* edited */\n", mode="a")
+    assert precompiled_templates_available() is False
+
+    reset_environments()
+    env = get_environment()
+    assert isinstance(env.loader, FileSystemLoader)
+    template = env.get_template("driver/driver.c.j2")
+    assert template.filename == driver_c.strpath
+    reset_environments()
+
+
+def test_license_header(tmpdir, monkeypatch):
+    """Test license files are read once and custom ones can be registered."""
+    monkeypatch.setattr(common, "LICENSES", list(common.LICENSES))
+    monkeypatch.setattr(common, "_LICENSE_FILES", {})
+    monkeypatch.setattr(common, "_LICENSE_TEXTS", {})
+    monkeypatch.setattr(common, "_LICENSE_HEADERS", {})
+
+    with patch("builtins.open", wraps=open) as m_open:
+        header = get_license_header("MIT", " * ")
+        assert get_license_header("MIT", "# ").startswith("# ")
+        assert get_license_header("MIT", "// ").startswith("// ")
+        assert get_license_header("MIT", " * ") == header
+        assert m_open.call_count == 1
+    assert header.startswith(" * ")
+
+    with pytest.raises(ParameterError):
+        get_license_header("Custom", " * ")
+
+    license_file = tmpdir.join("custom.txt")
+    license_file.write("Custom license\n")
+    register_license("Custom", license_file.strpath)
+    assert "Custom" in common.LICENSES
+    params = {"global": {"license": "Custom"}}
+    load_license(params, "# ")
+    assert params["global"]["license_header"] == "# Custom license\n"
+
+    license_file.write("Other license\n")
+    register_license("Custom", license_file.strpath)
+    load_license(params, "# ")
+    assert params["global"]["license_header"] == "# Other license\n"
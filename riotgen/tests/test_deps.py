@@ -0,0 +1,144 @@
+"""Dependency resolver tests."""
+
+import os
+
+import pytest
+from click.testing import CliRunner
+
+import riotgen.deps as deps
+import riotgen.riotbase as riotbase_index
+from riotgen.deps import (
+    build_dependency_graph,
+    get_board_features,
+    resolve_application_dependencies,
+    resolve_dependencies,
+)
+from riotgen.errors import ParameterError
+from riotgen.main import riotgen
+
+TEST_DATA_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "test_data"
+)
+
+RIOTBASE_FILES = {
+    "sys/Makefile.dep": (
+        "ifneq (,$(filter xtimer,$(USEMODULE)))\n"
+        "  USEMODULE += ztimer ztimer_usec\n"
+        "endif\n"
+        "\n"
+        "ifneq (,$(filter fmt,$(USEMODULE)))\n"
+        "  ifeq (native,$(BOARD))\n"
+        "    USEMODULE += native_only\n"
+        "  endif\n"
+        "endif\n"
+        "USEMODULE += always\n"
+    ),
+    "sys/ztimer/Makefile.dep": (
+        "FEATURES_REQUIRED += periph_timer\n"
+        "ifneq (,$(filter ztimer_rtt,$(USEMODULE)))\n"
+        "  FEATURES_REQUIRED += periph_rtt\n"
+        "else\n"
+        "  USEMODULE += ignored\n"
+        "endif\n"
+    ),
+    "pkg/yxml/Makefile.dep": "USEMODULE += yxml_contrib\n",
+    "boards/board_test/Makefile.features": (
+        "CPU = cpu_test\n"
+        "FEATURES_PROVIDED += periph_gpio\n"
+        "include $(RIOTBOARD)/common/test/Makefile.features\n"
+    ),
+    "boards/common/test/Makefile.features": "FEATURES_PROVIDED += periph_uart\n",
+    "cpu/cpu_test/Makefile.features": "FEATURES_PROVIDED += periph_timer\n",
+}
+
+
+@pytest.fixture
+def riotbase(tmpdir, monkeypatch):
+    """A fake RIOT checkout with an empty cache."""
+    monkeypatch.setenv("RIOTGEN_CACHE_DIR", tmpdir.join("cache").strpath)
+    monkeypatch.setattr(deps, "_GRAPHS", {})
+    monkeypatch.setattr(deps, "_BOARD_FEATURES", {})
+    monkeypatch.setattr(riotbase_index, "_COMMITS", {})
+    riotbase = tmpdir.mkdir("RIOT")
+    for path, content in RIOTBASE_FILES.items():
+        riotbase.join(path).write(content, ensure=True)
+    return riotbase
+
+
+def test_build_dependency_graph(riotbase):
+    graph = build_dependency_graph(riotbase.strpath)
+    assert graph == {
+        "xtimer": {"modules": ["ztimer", "ztimer_usec"], "features": []},
+        "ztimer": {"modules": [], "features": ["periph_timer"]},
+        "ztimer_rtt": {"modules": [], "features": ["periph_rtt"]},
+        "yxml": {"modules": ["yxml_contrib"], "features": []},
+    }
+
+
+def test_resolve_dependencies(riotbase):
+    graph = build_dependency_graph(riotbase.strpath)
+    modules, features, required_by = resolve_dependencies(
+        graph, ["xtimer", "fmt"]
+    )
+    assert modules == ["fmt", "xtimer", "ztimer", "ztimer_usec"]
+    assert features == ["periph_timer"]
+    assert required_by == {"periph_timer": "ztimer"}
+
+
+def test_get_board_features(riotbase):
+    assert get_board_features(riotbase.strpath, "board_test") == {
+        "periph_gpio",
+        "periph_timer",
+        "periph_uart",
+    }
+    assert get_board_features(riotbase.strpath, "unknown") is None
+
+
+def test_resolve_application_dependencies(riotbase):
+    params = {
+        "application": {
+            "board": "board_test",
+            "modules": ["xtimer"],
+            "packages": ["yxml"],
+            "features_required": ["periph_gpio"],
+        }
+    }
+    assert resolve_application_dependencies(
+        params, "application", riotbase.strpath
+    ) == {
+        "modules": ["xtimer", "yxml", "yxml_contrib", "ztimer", "ztimer_usec"],
+        "features": ["periph_gpio", "periph_timer"],
+    }
+
+    params["application"]["modules"].append("ztimer_rtt")
+    with pytest.raises(ParameterError) as exc_info:
+        resolve_application_dependencies(
+            params, "application", riotbase.strpath
+        )
+    assert "Board 'board_test'" in str(exc_info.value)
+    assert "periph_rtt (required by ztimer_rtt)" in str(exc_info.value)
+
+
+def test_command_application_resolve_deps(riotbase, tmpdir):
+    output_dir = tmpdir.mkdir("application")
+    config_file = os.path.join(TEST_DATA_DIR, "application.cfg")
+    result = CliRunner().invoke(
+        riotgen,
+        [
+            "application",
+            "-c",
+            config_file,
+            "-d",
+            output_dir.strpath,
+            "-r",
+            riotbase.strpath,
+            "--resolve-deps",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    makefile = output_dir.join("Makefile").read()
+    assert (
+        "# modules: fmt xtimer yxml yxml_contrib ztimer ztimer_usec\n"
+        in makefile
+    )
+    assert "# features: periph_gpio periph_timer\n" in makefile
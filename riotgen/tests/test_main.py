@@ -1,7 +1,9 @@
 """Main generator tests."""
 
 import os
+import subprocess
 import sys
+import textwrap
 
 import pytest
 from click.testing import CliRunner
@@ -24,19 +26,30 @@ from riotgen.pkg import PKG_FILES
 HELP_OUTPUT = """Usage: riotgen [OPTIONS] COMMAND [ARGS]...
 
 Options:
-  --version  Show the version and exit.
-  --help     Show this message and exit.
+  --version              Show the version and exit.
+  --profile              Print the time spent in each phase of the run
+  --profile-output FILE  Also write cProfile statistics to a file
+  --metrics-output FILE  Write the run metrics to a JSON lines or a .prom file
+  --help                 Show this message and exit.
 
 Commands:
   application  Bootstrap a RIOT application
+  batch        Bootstrap RIOT code from a batch configuration file
   board        Bootstrap a RIOT board support
+  cache        Manage the riotgen persistent cache
+  client       Bootstrap RIOT code with the riotgen daemon
   driver       Bootstrap a RIOT driver module
   example      Bootstrap a RIOT example application
   module       Bootstrap a RIOT system module
   pkg          Bootstrap a RIOT external package
+  regen        Regenerate RIOT code whose templates or parameters changed
+  serve        Run a riotgen daemon with warm caches
   test         Bootstrap a RIOT test application
 """
 
+README = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "README.rst"
+)
 
 MISSING_PARAMETER_MSG = "Missing --interactive and/or --config options."
 
@@ -50,14 +63,22 @@ COMMANDS = [
     "test",
 ]
 COMMAND_FUNCS = [
-    "riotgen.main.generate_application",
-    "riotgen.main.generate_board",
-    "riotgen.main.generate_driver",
-    "riotgen.main.generate_example",
-    "riotgen.main.generate_module",
-    "riotgen.main.generate_pkg",
-    "riotgen.main.generate_test",
+    "riotgen.application.generate_application",
+    "riotgen.board.generate_board",
+    "riotgen.driver.generate_driver",
+    "riotgen.example.generate_example",
+    "riotgen.module.generate_module",
+    "riotgen.pkg.generate_pkg",
+    "riotgen.test.generate_test",
 ]
+RESOLVE_DEPS_COMMANDS = ["application", "example", "test"]
+
+
+def _expected_kwargs(command, **kwargs):
+    kwargs = {"dry_run": False, "output_archive": None, **kwargs}
+    if command in RESOLVE_DEPS_COMMANDS:
+        kwargs.setdefault("resolve_deps", False)
+    return kwargs
 
 
 def _check_generated_files(files, expected_dir, generated_dir, name):
@@ -92,6 +113,27 @@ def test_help():
     assert result.output == HELP_OUTPUT
 
 
+@pytest.mark.skipif(not os.path.exists(README), reason="README not found")
+def test_readme_help():
+    """Check the help output in the README is up to date."""
+    with open(README) as f_readme:
+        readme = f_readme.read()
+    help_output = textwrap.indent(HELP_OUTPUT, "    ")
+    assert f"    riotgen --help\n{help_output}" in readme
+
+
+def test_lazy_imports():
+    """Check generator modules, jinja2 and yaml are not loaded at startup."""
+    code = (
+        "import sys; import riotgen.main; "
+        "print(' '.join(sorted(sys.modules)))"
+    )
+    modules = subprocess.check_output([sys.executable, "-c", code]).decode()
+    modules = modules.split()
+    for module in ["jinja2", "yaml", "riotgen.common", "riotgen.driver"]:
+        assert module not in modules
+
+
 def test_version():
     runner = CliRunner()
     result = runner.invoke(riotgen, ["--version"])
@@ -121,9 +163,13 @@ def test_command_interactive(command, func, options, expected_args):
         runner.invoke(riotgen, [command] + options)
         m_command.assert_called_once()
         if command == "application":
-            m_command.assert_called_with(os.getcwd(), *expected_args)
+            m_command.assert_called_with(
+                os.getcwd(), *expected_args, **_expected_kwargs(command)
+            )
         else:
-            m_command.assert_called_with(*expected_args)
+            m_command.assert_called_with(
+                *expected_args, **_expected_kwargs(command)
+            )
 
 
 @pytest.mark.parametrize("command,func", list(zip(COMMANDS, COMMAND_FUNCS)))
@@ -155,9 +201,71 @@ def test_command_riotbase(command, func, tmpdir):
 
 def test_command_application_output_dir(tmpdir):
     runner = CliRunner()
-    with patch("riotgen.main.generate_application") as m_command:
+    with patch("riotgen.application.generate_application") as m_command:
         runner.invoke(riotgen, ["application", "-d", tmpdir.strpath])
-        m_command.assert_called_with(tmpdir.strpath, False, None, None)
+        m_command.assert_called_with(
+            tmpdir.strpath,
+            False,
+            None,
+            None,
+            **_expected_kwargs("application"),
+        )
+
+
+@pytest.mark.parametrize("command,func", list(zip(COMMANDS, COMMAND_FUNCS)))
+def test_command_dry_run(command, func):
+    runner = CliRunner()
+    with patch(func) as m_command:
+        runner.invoke(riotgen, [command, "--dry-run"])
+        m_command.assert_called_once()
+        assert m_command.call_args.kwargs == _expected_kwargs(
+            command, dry_run=True
+        )
+
+
+@pytest.mark.parametrize("command,func", list(zip(COMMANDS, COMMAND_FUNCS)))
+def test_command_output_archive(command, func):
+    runner = CliRunner()
+    with patch(func) as m_command:
+        runner.invoke(riotgen, [command, "-o", "out.tar.gz"])
+        m_command.assert_called_once()
+        assert m_command.call_args.kwargs["output_archive"] == "out.tar.gz"
+
+    with patch(func) as m_command:
+        result = runner.invoke(riotgen, [command, "-o", "out.rar"])
+        assert result.exit_code != 0
+        assert "Unsupported archive 'out.rar'" in result.output
+        m_command.assert_not_called()
+
+
+@pytest.mark.parametrize("command", RESOLVE_DEPS_COMMANDS)
+def test_command_resolve_deps(command):
+    func = COMMAND_FUNCS[COMMANDS.index(command)]
+    with patch(func) as m_command:
+        CliRunner().invoke(riotgen, [command, "--resolve-deps"])
+        m_command.assert_called_once()
+        assert m_command.call_args.kwargs["resolve_deps"] is True
+
+
+def test_command_generate_driver_dry_run(tmpdir):
+    runner = CliRunner()
+    test_data_dir = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "test_data"
+    )
+    config_file = os.path.join(test_data_dir, "driver.yml")
+    riotbase = tmpdir.mkdir("riotbase")
+    result = runner.invoke(
+        riotgen, ["driver", "-c", config_file, "-r", riotbase, "-n"]
+    )
+
+    assert result.exit_code == 0
+    assert riotbase.listdir() == []
+    driver_dir = riotbase.join("drivers", "test")
+    assert f"==> {driver_dir.join('test.c').strpath} <==" in result.output
+    assert f"==> {driver_dir.join('Kconfig').strpath} <==" in result.output
+    with open(os.path.join(test_data_dir, "driver", "driver.c")) as f_driver:
+        assert f_driver.read() in result.output
+    assert "with success!" not in result.output
 
 
 def test_command_generate_application_from_config(tmpdir):
@@ -280,6 +388,7 @@ def test_command_generate_board_from_config(tmpdir):
     )
 
     assert result.exit_code == 0
+    assert "0 files written, 9 unchanged" in result.output
 
     msg = f"Support for board '{name}' generated in {board_dir.strpath} with success!"
     assert msg in result.output
@@ -479,3 +588,91 @@ def test_command_generate_test_from_config(tmpdir):
 
     msg = f"Test '{name}' generated in {output_dir.strpath} with success!"
     assert msg in result.output
+
+
+def test_command_generate_batch_from_config(tmpdir):
+    name = "test"
+    runner = CliRunner()
+    test_data_dir = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "test_data"
+    )
+    config_file = os.path.join(test_data_dir, "batch.yml")
+
+    tmpdir.mkdir("riotbase")
+    riotbase = tmpdir.join("riotbase")
+    result = runner.invoke(
+        riotgen, ["batch", "-c", config_file, "-r", riotbase]
+    )
+
+    assert result.exit_code == 0
+
+    board_dir = riotbase.join("boards", name)
+    expected_dir = os.path.join(test_data_dir, "board")
+    _check_generated_files(BOARD_FILES, expected_dir, board_dir, name)
+    _check_generated_files(
+        BOARD_INCLUDE_FILES, expected_dir, board_dir.join("include"), name
+    )
+    _check_generated_files({"Kconfig": None}, expected_dir, board_dir, name)
+
+    driver_dir = riotbase.join("drivers", name)
+    expected_dir = os.path.join(test_data_dir, "driver")
+    _check_generated_files(DRIVER_FILES, expected_dir, driver_dir, name)
+    _check_generated_files(
+        DRIVER_INCLUDE_FILES,
+        expected_dir,
+        riotbase.join("drivers", "include"),
+        name,
+    )
+    _check_generated_files(
+        DRIVER_INTERNAL_INCLUDE_FILES,
+        expected_dir,
+        driver_dir.join("include"),
+        name,
+    )
+
+    example_dir = riotbase.join("examples", name)
+    expected_dir = os.path.join(test_data_dir, "example")
+    _check_generated_files(APPLICATION_FILES, expected_dir, example_dir, name)
+
+    module_dir = riotbase.join("sys", name)
+    expected_dir = os.path.join(test_data_dir, "module")
+    _check_generated_files(MODULE_FILES, expected_dir, module_dir, name)
+    _check_generated_files(
+        MODULE_INCLUDE_FILES,
+        expected_dir,
+        riotbase.join("sys", "include"),
+        name,
+    )
+
+    pkg_dir = riotbase.join("pkg", name)
+    expected_dir = os.path.join(test_data_dir, "pkg")
+    _check_generated_files(PKG_FILES, expected_dir, pkg_dir, name)
+
+    test_dir = riotbase.join("tests", name)
+    expected_dir = os.path.join(test_data_dir, "test")
+    _check_generated_files(APPLICATION_FILES, expected_dir, test_dir, name)
+    _check_generated_files(
+        {"01-run.py": None}, expected_dir, test_dir.join("tests"), name
+    )
+
+    assert (
+        f"Driver '{name}' generated in {driver_dir.strpath}" in result.output
+    )
+    assert f"Test '{name}' generated in {test_dir.strpath}" in result.output
+    assert "6 entities generated with success!" in result.output
+
+    # Existing directories are not overwritten without --force
+    result = runner.invoke(
+        riotgen, ["batch", "-c", config_file, "-r", riotbase]
+    )
+    assert result.exit_code != 0
+    assert f"{board_dir.strpath} directory already exists" in result.output
+
+    result = runner.invoke(
+        riotgen,
+        ["batch", "-c", config_file, "-r", riotbase, "--force", "-j", "2"],
+    )
+    assert result.exit_code == 0
+    expected_dir = os.path.join(test_data_dir, "pkg")
+    _check_generated_files(PKG_FILES, expected_dir, pkg_dir, name)
+    assert "6 entities generated with success!" in result.output
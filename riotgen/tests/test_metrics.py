@@ -0,0 +1,107 @@
+"""Run metrics tests."""
+
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from riotgen.main import riotgen
+from riotgen.metrics import (
+    format_prometheus,
+    measure_command,
+    measure_render,
+    metrics_enabled,
+    record_cache,
+    record_write,
+    start_metrics,
+    stop_metrics,
+)
+
+TEST_DATA_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "test_data"
+)
+
+
+@measure_command("test")
+def _failing_command():
+    raise ValueError("failure")
+
+
+def test_metrics():
+    assert not metrics_enabled()
+    with measure_render("test/main.c.j2"):
+        pass
+    record_write(1, 10)
+    assert stop_metrics() is None
+
+    start_metrics()
+    with measure_render("test/main.c.j2"):
+        pass
+    record_write(2, 10)
+    record_cache("configs", True)
+    record_cache("configs", False)
+    record_cache("configs", False)
+    with pytest.raises(ValueError):
+        _failing_command()
+    metrics = stop_metrics()
+    assert not metrics_enabled()
+    assert metrics["command"] == "test"
+    assert metrics["status"] == "ValueError"
+    assert metrics["files_rendered"] == 1
+    assert metrics["files_written"] == 2
+    assert metrics["bytes_written"] == 10
+    assert metrics["templates"]["test/main.c.j2"]["renders"] == 1
+    assert metrics["caches"] == {"configs": {"hits": 1, "misses": 2}}
+    assert metrics["duration_seconds"] >= 0
+
+
+def test_format_prometheus():
+    start_metrics("driver")
+    with measure_render('driver/"driver".c.j2'):
+        pass
+    record_cache("templates", True)
+    metrics = stop_metrics()
+    lines = format_prometheus(metrics).splitlines()
+    assert "# TYPE riotgen_run_duration_seconds gauge" in lines
+    assert (
+        'riotgen_files_rendered{command="driver",status="ok",'
+        f'version="{metrics["version"]}"}} 1'
+    ) in lines
+    assert (
+        'riotgen_template_renders{template="driver/\\"driver\\".c.j2"} 1'
+        in (lines)
+    )
+    assert 'riotgen_cache_hits{cache="templates"} 1' in lines
+    assert 'riotgen_cache_misses{cache="templates"} 0' in lines
+
+
+@pytest.mark.parametrize("filename", ["metrics.jsonl", "riotgen.prom"])
+def test_command_metrics_output(tmpdir, filename):
+    riotbase = tmpdir.mkdir("riotbase")
+    metrics_output = tmpdir.join(filename)
+    config_file = os.path.join(TEST_DATA_DIR, "driver.yml")
+    for _ in range(2):
+        result = CliRunner().invoke(
+            riotgen,
+            ["--metrics-output", metrics_output.strpath]
+            + ["driver", "-c", config_file, "-r", riotbase.strpath],
+        )
+    assert not metrics_enabled()
+    content = metrics_output.read()
+    if filename.endswith(".prom"):
+        assert 'command="driver",status="Abort"' in content
+        return
+
+    first, second = [json.loads(line) for line in content.splitlines()]
+    assert first["command"] == "driver"
+    assert first["status"] == "ok"
+    assert first["files_rendered"] == 8
+    # The manifest isn't rendered from a template
+    assert first["files_written"] == 9
+    assert first["bytes_written"] > 0
+    assert "driver/driver.c.j2" in first["templates"]
+    # The driver directory exists and overwriting it isn't confirmed
+    assert result.exit_code != 0
+    assert second["status"] == "Abort"
+    assert second["files_written"] == 0
@@ -0,0 +1,135 @@
+"""Parameters model tests."""
+
+import pickle
+import sys
+
+import pytest
+
+import riotgen.params as params_module
+from riotgen.board import Board
+from riotgen.common import get_environment, load_license
+from riotgen.params import (
+    Global,
+    Params,
+    freeze_params,
+    replace_params,
+    thaw_params,
+)
+
+PARAMS = {
+    "global": {"license": "MIT", "year": 2025, "organization": "o"},
+    "board": {
+        "name": "test",
+        "cpu": "cpu_test",
+        "features_provided": ["periph_gpio"],
+        "unknown": "dropped",
+    },
+}
+
+
+def test_freeze_params():
+    """Test dicts of parameters are frozen in records."""
+    params = freeze_params(PARAMS)
+    assert isinstance(params, Params)
+    assert isinstance(params["global"], Global)
+    assert isinstance(params["board"], Board)
+    assert freeze_params(params) is params
+
+    assert params["board"]["name"] == "test"
+    assert params["board"].cpu == "cpu_test"
+    assert params["board"]["features_provided"] == ("periph_gpio",)
+    assert "unknown" not in params["board"]
+    assert "cpu_model" not in params["board"]
+    assert params["board"].get("cpu_model") is None
+    with pytest.raises(KeyError):
+        params["board"]["cpu_model"]  # pylint:disable=pointless-statement
+    assert list(params) == ["global", "board"]
+
+    with pytest.raises(AttributeError):
+        params["board"].name = "other"
+    with pytest.raises(TypeError):
+        params["board"]["name"] = "other"
+
+
+def test_freeze_params_nested():
+    """Test nested dicts and lists are frozen too."""
+    dependencies = {"modules": ["xtimer"], "features": [["periph_gpio"]]}
+    params = freeze_params(
+        {"application": {"name": "test", "dependencies": dependencies}}
+    )
+    frozen = params["application"]["dependencies"]
+    assert frozen == {"modules": ("xtimer",), "features": (("periph_gpio",),)}
+    with pytest.raises(TypeError):
+        frozen["modules"] = ["other"]
+    dependencies["modules"].append("other")
+    assert frozen["modules"] == ("xtimer",)
+    assert thaw_params(params)["application"]["dependencies"] == {
+        "modules": ["xtimer"],
+        "features": [["periph_gpio"]],
+    }
+
+    unpickled = pickle.loads(pickle.dumps(params))
+    assert unpickled == params
+    with pytest.raises(TypeError):
+        unpickled["application"]["dependencies"]["modules"] = ()
+
+
+def test_freeze_params_models(monkeypatch):
+    """Test the records of groups not imported yet are created."""
+    monkeypatch.setattr(params_module, "PARAMS_MODELS", {"global": Global})
+    monkeypatch.delitem(sys.modules, "riotgen.pkg")
+    params = freeze_params(
+        {"pkg": {"name": "test"}, "global": {}, "other": {"name": "test"}}
+    )
+    assert type(params["pkg"]).__name__ == "Pkg"
+    assert params["pkg"]["name"] == "test"
+    assert "other" not in params
+
+
+def test_thaw_params():
+    """Test records are converted back to nested dicts."""
+    params = thaw_params(freeze_params(PARAMS))
+    expected = {
+        "global": PARAMS["global"],
+        "board": {
+            "name": "test",
+            "cpu": "cpu_test",
+            "features_provided": ["periph_gpio"],
+        },
+    }
+    assert params == expected
+    assert freeze_params(PARAMS) == freeze_params(expected)
+
+
+def test_replace_params():
+    """Test records are copied and dicts are updated in place."""
+    params = freeze_params(PARAMS)
+    new_params = replace_params(params, "board", cpu="other_cpu")
+    assert new_params["board"]["cpu"] == "other_cpu"
+    assert params["board"]["cpu"] == "cpu_test"
+    assert new_params["global"] is params["global"]
+
+    new_params = load_license(params, "# ")
+    assert new_params["global"]["license_header"].startswith("# ")
+    assert "license_header" not in params["global"]
+
+    dict_params = {"board": {"name": "test"}}
+    assert replace_params(dict_params, "board", cpu="c") is dict_params
+    assert dict_params["board"]["cpu"] == "c"
+
+
+def test_params_pickle():
+    """Test records are sent to worker processes."""
+    params = freeze_params(PARAMS)
+    unpickled = pickle.loads(pickle.dumps(params))
+    assert unpickled == params
+    assert isinstance(unpickled["board"], Board)
+
+
+def test_params_template():
+    """Test templates use records like dicts."""
+    template = get_environment().from_string(
+        "{{ board.name }} {{ board.features_provided|length }}"
+        "{% if board.cpu_model is defined %} {{ board.cpu_model }}{% endif %}"
+    )
+    assert template.render(**freeze_params(PARAMS)) == "test 1"
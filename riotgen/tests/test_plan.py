@@ -0,0 +1,229 @@
+"""Render plan tests."""
+
+import copy
+import os
+import pickle
+import stat
+import sys
+import warnings
+
+import pytest
+from mock import patch
+
+from riotgen.board import render_board
+from riotgen.common import render_source
+from riotgen.plan import RenderPlan, _get_umask, commit_plan, write_file
+
+TEMPLATE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "test_data"
+)
+
+BOARD_PARAMS = {
+    "global": {
+        "license": "LGPL21",
+        "year": 2025,
+        "author_name": "test_name",
+        "author_email": "test_email",
+        "organization": "test_orga",
+    },
+    "board": {
+        "name": "test",
+        "displayed_name": "Test",
+        "cpu": "cpu_test",
+        "cpu_model": "cpu_model_test",
+        "features_provided": ["periph_gpio"],
+    },
+}
+
+
+@pytest.mark.parametrize("writers", [0, 2])
+def test_render_plan(tmpdir, writers):
+    """Test the RenderPlan class."""
+    plan = RenderPlan(writers)
+    dest = tmpdir.join("subdir", "file")
+    plan.add(dest.strpath, "content")
+    assert len(plan) == 1
+    assert dest.strpath in plan
+    assert plan[dest.strpath] == "content"
+    assert list(plan) == [dest.strpath]
+    assert not dest.exists()
+
+    plan.write()
+    assert dest.read() == "content"
+    assert plan.written == [dest.strpath]
+    assert plan.unchanged == []
+    assert plan.summary() == "1 files written, 0 unchanged"
+
+
+def test_write_file_unchanged(tmpdir):
+    """Test files are only written when their content changed."""
+    dest = tmpdir.join("file")
+    assert write_file(dest.strpath, "content") is True
+    os.utime(dest.strpath, (0, 0))
+    assert write_file(dest.strpath, "content") is False
+    assert os.stat(dest.strpath).st_mtime == 0
+    assert write_file(dest.strpath, "new content") is True
+    assert dest.read() == "new content"
+    assert os.stat(dest.strpath).st_mtime != 0
+
+    plan = RenderPlan()
+    plan.add(dest.strpath, "new content")
+    plan.add(tmpdir.join("other").strpath, "other")
+    plan.write()
+    assert plan.written == [tmpdir.join("other").strpath]
+    assert plan.unchanged == [dest.strpath]
+
+
+@pytest.mark.skipif(
+    sys.platform.startswith("win"), reason="doesn't work on windows"
+)
+@pytest.mark.parametrize("writers", [0, 2])
+def test_render_plan_mode(tmpdir, writers):
+    """Test file permissions are applied when writing the plan."""
+    plan = RenderPlan(writers)
+    dest = tmpdir.join("script.py")
+    plan.add(dest.strpath, "#!/usr/bin/env python3\n")
+    plan.set_mode(dest.strpath, 0o755)
+    plan.write()
+    assert stat.S_IMODE(os.stat(dest.strpath).st_mode) == 0o755
+
+
+@pytest.mark.parametrize("writers", [0, 2])
+def test_render_plan_atomic(tmpdir, writers):
+    """Test nothing is written when a file of the plan can't be staged."""
+    dest = tmpdir.join("file")
+    dest.write("old content")
+    tmpdir.join("not_a_dir").write("")
+    plan = RenderPlan(writers)
+    plan.add(dest.strpath, "new content")
+    plan.add(tmpdir.join("not_a_dir", "other").strpath, "other")
+    with pytest.raises(OSError):
+        plan.write()
+    assert dest.read() == "old content"
+    assert sorted(path.basename for path in tmpdir.listdir()) == [
+        "file",
+        "not_a_dir",
+    ]
+
+
+def test_render_plan_pipeline(tmpdir):
+    """Test files staged by writer threads follow the plan changes."""
+    plan = RenderPlan(writers=2)
+    for index in range(40):
+        plan.add(tmpdir.join(f"file{index}").strpath, f"content {index}")
+    plan.add(tmpdir.join("file0").strpath, "new content")
+    plan.discard(tmpdir.join("file1").strpath)
+    plan.write()
+    assert len(plan.written) == 39
+    assert tmpdir.join("file0").read() == "new content"
+    assert sorted(path.basename for path in tmpdir.listdir()) == sorted(
+        f"file{index}" for index in range(40) if index != 1
+    )
+
+    # Nothing is left behind by an aborted plan
+    plan = RenderPlan(writers=2)
+    plan.add(tmpdir.join("aborted").strpath, "content")
+    plan.abort()
+    assert not tmpdir.join("aborted").exists()
+    assert len(tmpdir.listdir()) == 39
+
+
+def test_render_plan_pipeline_errors(tmpdir):
+    """Test the first staging error in the plan order is raised."""
+    tmpdir.join("first").write("")
+    tmpdir.join("second").write("")
+    plan = RenderPlan(writers=2)
+    plan.add(tmpdir.join("file").strpath, "content")
+    plan.add(tmpdir.join("first", "file").strpath, "content")
+    plan.add(tmpdir.join("second", "file").strpath, "content")
+    with pytest.raises(OSError) as exc_info:
+        plan.write()
+    assert "first" in str(exc_info.value)
+    assert sorted(path.basename for path in tmpdir.listdir()) == [
+        "first",
+        "second",
+    ]
+
+
+def test_render_plan_pickle(tmpdir):
+    """Test plans with writer threads can be sent back from workers."""
+    plan = RenderPlan(writers=2)
+    plan.add(tmpdir.join("file").strpath, "content")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        unpickled = pickle.loads(pickle.dumps(plan))
+    plan.write()
+    assert unpickled.files == plan.files
+    assert pickle.loads(pickle.dumps(plan)).written == plan.written
+
+
+@pytest.mark.skipif(
+    sys.platform.startswith("win"), reason="doesn't work on windows"
+)
+def test_write_file_keeps_mode(tmpdir):
+    """Test replaced files keep their permissions."""
+    dest = tmpdir.join("script.py")
+    dest.write("old content")
+    os.chmod(dest.strpath, 0o750)
+    assert write_file(dest.strpath, "new content") is True
+    assert stat.S_IMODE(os.stat(dest.strpath).st_mode) == 0o750
+
+    umask = os.umask(0o022)
+    _get_umask.cache_clear()
+    try:
+        new_file = tmpdir.join("new")
+        write_file(new_file.strpath, "content")
+    finally:
+        os.umask(umask)
+        _get_umask.cache_clear()
+    assert stat.S_IMODE(os.stat(new_file.strpath).st_mode) == 0o644
+
+
+def test_render_source_plan(tmpdir):
+    """Test render_source only fills the plan when one is given."""
+    plan = RenderPlan()
+    context = {
+        "global": {"test": "test"},
+        "test_template": {"tests": ["test1", "test2", "test3"]},
+    }
+    output_dir = tmpdir.join("output")
+    with patch("riotgen.common.TEMPLATE_BASE_DIR", TEMPLATE_DIR):
+        render_source(
+            context,
+            "test_template",
+            {"template": None},
+            output_dir.strpath,
+            plan,
+        )
+
+    assert not output_dir.exists()
+    with open(os.path.join(TEMPLATE_DIR, "expected")) as f_expected:
+        assert plan[output_dir.join("template").strpath] == f_expected.read()
+
+
+def test_render_board_plan(tmpdir, capsys):
+    """Test a generator renders all its files in the plan."""
+    plan = RenderPlan()
+    board_dir = tmpdir.join("boards", "test")
+    params = copy.deepcopy(BOARD_PARAMS)
+    render_board(params, tmpdir.strpath, board_dir.strpath, plan)
+    assert tmpdir.listdir() == []
+    files = [os.path.relpath(path, board_dir.strpath) for path in plan]
+    assert sorted(files) == [
+        "Kconfig",
+        "Makefile",
+        "Makefile.dep",
+        "Makefile.features",
+        "Makefile.include",
+        "doc.md",
+        os.path.join("include", "board.h"),
+        os.path.join("include", "periph_conf.h"),
+    ]
+
+    assert commit_plan(plan, dry_run=True) is False
+    output = capsys.readouterr().out
+    assert f"==> {board_dir.join('Kconfig').strpath} <==" in output
+    assert tmpdir.listdir() == []
+
+    assert commit_plan(plan) is True
+    assert board_dir.join("Kconfig").read() == plan[board_dir.join("Kconfig")]
@@ -0,0 +1,144 @@
+"""Manifest and regen tests."""
+
+import copy
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from riotgen.api import render_job
+from riotgen.errors import ParameterError, RiotgenError
+from riotgen.main import riotgen
+from riotgen.manifest import MANIFEST_FILE, get_params_hash, read_manifest
+from riotgen.regen import generate_regen, render_regen
+
+BOARD_PARAMS = {
+    "global": {
+        "license": "LGPL21",
+        "year": 2025,
+        "author_name": "test_name",
+        "author_email": "test_email",
+        "organization": "test_orga",
+    },
+    "board": {
+        "name": "test",
+        "displayed_name": "Test",
+        "cpu": "cpu_test",
+        "cpu_model": "cpu_model_test",
+        "features_provided": ["periph_gpio"],
+    },
+}
+
+
+@pytest.fixture
+def board_dir(tmpdir):
+    """Generate a board in a temporary RIOTBASE."""
+    board_dir = tmpdir.join("boards", "test")
+    job = ("board", copy.deepcopy(BOARD_PARAMS), board_dir.strpath)
+    render_job(job, tmpdir.strpath).write()
+    return board_dir
+
+
+def _write_manifest(board_dir, manifest):
+    board_dir.join(MANIFEST_FILE).write(json.dumps(manifest))
+
+
+def test_manifest(board_dir):
+    """Test the manifest written with the generated files."""
+    manifest = read_manifest(board_dir.strpath)
+    assert manifest["command"] == "board"
+    assert manifest["riotbase"] == os.path.join("..", "..")
+    assert "license_header" not in manifest["params"]["global"]
+    assert manifest["params_hash"] == get_params_hash(manifest["params"])
+    assert len(manifest["files"]) == 8
+    entry = manifest["files"][os.path.join("include", "board.h")]
+    assert entry["template"] == "board/board.h.j2"
+    assert len(entry["hash"]) == 64
+
+
+def test_manifest_missing(tmpdir):
+    """Test regen fails on directories without manifest."""
+    with pytest.raises(ParameterError) as exc_info:
+        read_manifest(tmpdir.strpath)
+    assert "No riotgen manifest found" in str(exc_info.value)
+
+    with pytest.raises(RiotgenError) as exc_info:
+        generate_regen([tmpdir.strpath])
+    assert str(exc_info.value) == ("1 of 1 directories failed to regenerate")
+
+
+def test_regen_unchanged(board_dir):
+    """Test nothing is rendered when templates and params didn't change."""
+    plan, modified = render_regen(board_dir.strpath)
+    assert list(plan) == [board_dir.join(MANIFEST_FILE).strpath]
+    assert modified == []
+
+
+def test_regen_template_changed(board_dir):
+    """Test only the files of changed templates are rendered."""
+    manifest = read_manifest(board_dir.strpath)
+    manifest["files"]["Makefile"]["template_hash"] = "outdated"
+    _write_manifest(board_dir, manifest)
+    board_dir.join("Makefile").remove()
+
+    plan, modified = render_regen(board_dir.strpath)
+    assert list(plan) == [
+        board_dir.join("Makefile").strpath,
+        board_dir.join(MANIFEST_FILE).strpath,
+    ]
+    assert modified == []
+    plan.write()
+    assert len(read_manifest(board_dir.strpath)["files"]) == 8
+    assert board_dir.join("Makefile").exists()
+
+
+def test_regen_params_changed(board_dir):
+    """Test all files are rendered when the parameters changed."""
+    manifest = read_manifest(board_dir.strpath)
+    manifest["params"]["board"]["cpu_model"] = "other_cpu_model"
+    _write_manifest(board_dir, manifest)
+
+    plan, _ = render_regen(board_dir.strpath)
+    assert len(plan) == 9
+    assert "other_cpu_model" in plan[board_dir.join("Makefile.features")]
+    assert (
+        " * This file is subject" in plan[board_dir.join("include", "board.h")]
+    )
+
+
+def test_regen_modified_file(board_dir, capsys):
+    """Test files edited by users are kept, unless forced."""
+    manifest = read_manifest(board_dir.strpath)
+    manifest["params"]["board"]["cpu_model"] = "other_cpu_model"
+    _write_manifest(board_dir, manifest)
+    features = board_dir.join("Makefile.features")
+    features.write("user content\n")
+
+    generate_regen([board_dir.strpath])
+    captured = capsys.readouterr()
+    assert f"{features.strpath} was modified" in captured.err
+    assert "4 files written, 4 unchanged" in captured.out
+    assert features.read() == "user content\n"
+
+    # The modified file is still detected on the next run
+    _, modified = render_regen(board_dir.strpath)
+    assert modified == [features.strpath]
+
+    generate_regen([board_dir.strpath], force=True)
+    assert "other_cpu_model" in features.read()
+    _, modified = render_regen(board_dir.strpath)
+    assert modified == []
+
+
+def test_regen_command(board_dir):
+    """Test the regen command line."""
+    runner = CliRunner()
+    result = runner.invoke(riotgen, ["regen", board_dir.strpath])
+    assert result.exit_code == 0
+    assert f"{board_dir.strpath} regenerated" in result.output
+    assert "0 files written, 1 unchanged" in result.output
+
+    result = runner.invoke(riotgen, ["regen", "-n", board_dir.strpath])
+    assert result.exit_code == 0
+    assert f"==> {board_dir.join(MANIFEST_FILE).strpath} <==" in result.output
@@ -0,0 +1,226 @@
+"""RIOTBASE index tests."""
+
+import os
+import subprocess
+
+import pytest
+from mock import patch
+
+import riotgen.riotbase as riotbase_index
+from riotgen.riotbase import (
+    RiotbaseIndex,
+    check_riotbase_params,
+    get_riotbase_index,
+    reset_riotbase_commits,
+    scan_riotbase,
+    serialize_index,
+)
+
+RIOTBASE_FILES = {
+    "boards/common/init/Makefile": "",
+    "boards/native64/Makefile": "MODULE = board\n",
+    "boards/native64/Makefile.features": (
+        "FEATURES_PROVIDED += periph_gpio periph_uart\n"
+        "FEATURES_PROVIDED += periph_$(CPU)\n"
+    ),
+    "cpu/native/Makefile.features": "FEATURES_PROVIDED += cpu_native\n",
+    "pkg/lwip/Makefile": "",
+    "sys/xtimer/Makefile": "",
+    "sys/ztimer/Makefile": "PSEUDOMODULES += ztimer_usec ztimer_msec\n",
+    "drivers/sensor/Makefile": "MODULE = sensor_driver\n",
+    "features.yaml": "groups:\n  - features:\n      - name: arch_32bit\n",
+}
+
+
+@pytest.fixture
+def riotbase(tmpdir, monkeypatch):
+    """A fake RIOT checkout with an empty cache."""
+    monkeypatch.setenv("RIOTGEN_CACHE_DIR", tmpdir.join("cache").strpath)
+    monkeypatch.setattr(riotbase_index, "_INDEXES", {})
+    monkeypatch.setattr(riotbase_index, "_COMMITS", {})
+    riotbase = tmpdir.mkdir("RIOT")
+    for path, content in RIOTBASE_FILES.items():
+        riotbase.join(path).write(content, ensure=True)
+    return riotbase
+
+
+def test_scan_riotbase(riotbase):
+    """Test the content of a RIOTBASE index."""
+    index, _ = scan_riotbase(riotbase.strpath)
+    assert index["boards"] == ["native64"]
+    assert index["cpus"] == ["native"]
+    assert index["packages"] == ["lwip"]
+    assert index["modules"] == [
+        "board",
+        "init",
+        "lwip",
+        "sensor_driver",
+        "xtimer",
+        "ztimer",
+        "ztimer_msec",
+        "ztimer_usec",
+    ]
+    assert index["features"] == [
+        "arch_32bit",
+        "cpu_native",
+        "periph_gpio",
+        "periph_uart",
+    ]
+
+
+def test_scan_riotbase_incremental(riotbase):
+    """Test only changed directories and makefiles are read again."""
+    _, tree = scan_riotbase(riotbase.strpath)
+    assert sorted(tree["sys"]["subdirs"]) == ["xtimer", "ztimer"]
+
+    with (
+        patch(
+            "riotgen.riotbase._parse_makefile",
+            wraps=riotbase_index._parse_makefile,
+        ) as m_parse,
+        patch("os.scandir", wraps=os.scandir) as m_scandir,
+    ):
+        index, tree = scan_riotbase(riotbase.strpath, tree)
+        assert m_parse.call_count == 0
+        assert m_scandir.call_count == 0
+
+        makefile = riotbase.join("sys", "xtimer", "Makefile")
+        makefile.write("MODULE = xtimer_new\n")
+        mtime = tree["sys/xtimer"]["files"]["Makefile"]["mtime"]
+        os.utime(makefile.strpath, ns=(mtime + 10**9, mtime + 10**9))
+        sys_dir = riotbase.join("sys")
+        riotbase.join("sys", "evtimer", "Makefile").write("", ensure=True)
+        mtime = tree["sys"]["mtime"]
+        os.utime(sys_dir.strpath, ns=(mtime + 10**9, mtime + 10**9))
+        index, tree = scan_riotbase(riotbase.strpath, tree)
+        assert m_parse.call_count == 2
+        assert sorted(call.args[0] for call in m_scandir.call_args_list) == [
+            os.path.join(riotbase.strpath, "sys"),
+            os.path.join(riotbase.strpath, "sys", "evtimer"),
+        ]
+    assert "xtimer_new" in index["modules"]
+    assert "xtimer" not in index["modules"]
+    assert "evtimer" in index["modules"]
+
+
+def test_riotbase_index_lookup():
+    """Test lookups in a serialized index."""
+    index = RiotbaseIndex(
+        serialize_index(
+            {
+                "boards": ["native64", "nrf52dk"],
+                "modules": ["xtimer", "ztimer", "ztimer_msec"],
+            }
+        )
+    )
+    assert index.contains("boards", "native64")
+    assert index.contains("modules", "ztimer_msec")
+    assert not index.contains("modules", "ztimer_usec")
+    assert not index.contains("boards", "xtimer")
+    assert not index.contains("packages", "lwip")
+    assert index.has_entries("boards")
+    assert not index.has_entries("cpus")
+    assert index.names("modules") == ["xtimer", "ztimer", "ztimer_msec"]
+    assert index.names("features") == []
+    assert not RiotbaseIndex(b"").has_entries("boards")
+
+
+def test_check_riotbase_params(riotbase):
+    """Test unknown parameters are reported."""
+    params = {
+        "application": {
+            "board": "native",
+            "modules": ["xtimer", "unknown_module"],
+            "packages": ["lwip"],
+            "features_required": ["periph_gpio"],
+        }
+    }
+    warnings = check_riotbase_params(params, "application", riotbase.strpath)
+    assert warnings == [
+        f"Unknown module 'unknown_module' in {riotbase.strpath}"
+    ]
+
+    params = {"board": {"cpu": "stm32", "features_provided": ["periph_i2c"]}}
+    warnings = check_riotbase_params(params, "board", riotbase.strpath)
+    assert warnings == [
+        f"Unknown feature 'periph_i2c' in {riotbase.strpath}",
+        f"Unknown CPU 'stm32' in {riotbase.strpath}",
+    ]
+
+    # Boards created after indexing are found
+    riotbase.mkdir("boards", "new_board")
+    params = {"application": {"board": "new_board"}}
+    assert check_riotbase_params(params, "application", riotbase.strpath) == []
+
+    # Directories which aren't RIOT checkouts aren't checked
+    params = {"application": {"board": "unknown"}}
+    other_dir = riotbase.dirpath().mkdir("other")
+    assert (
+        check_riotbase_params(params, "application", other_dir.strpath) == []
+    )
+
+
+def test_riotbase_index_not_stored(riotbase):
+    """Test nothing is stored for directories which aren't RIOT checkouts."""
+    other_dir = riotbase.dirpath().mkdir("other")
+    index = get_riotbase_index(other_dir.strpath)
+    assert not index.has_entries("boards")
+    assert not riotbase.dirpath().join("cache").check()
+
+    get_riotbase_index(riotbase.strpath)
+    assert riotbase.dirpath().join("cache").check()
+
+
+def test_riotbase_index_eviction(riotbase, monkeypatch):
+    """Test the least recently used indexes are evicted."""
+    monkeypatch.setattr(riotbase_index, "INDEX_CACHE_MAX_ENTRIES", 2)
+    for name in ("RIOT1", "RIOT2", "RIOT3"):
+        riotbase.copy(riotbase.dirpath().join(name))
+        get_riotbase_index(riotbase.dirpath().join(name).strpath)
+    index_dir = riotbase_index._get_index_dir()
+    index_files = [name for name in os.listdir(index_dir) if ".idx" in name]
+    assert len(index_files) == 2
+    assert len(os.listdir(os.path.join(index_dir, "trees"))) == 2
+
+
+def test_riotbase_index_cache(riotbase, monkeypatch):
+    """Test a RIOTBASE is only scanned once per git commit."""
+    git = ["git", "-C", riotbase.strpath]
+    subprocess.check_call(git + ["init", "-q"])
+    subprocess.check_call(git + ["add", "."])
+    subprocess.check_call(
+        git
+        + ["-c", "user.name=test", "-c", "user.email=test@test"]
+        + ["commit", "-q", "-m", "init"]
+    )
+
+    with patch(
+        "riotgen.riotbase.scan_riotbase", wraps=scan_riotbase
+    ) as m_scan:
+        index = get_riotbase_index(riotbase.strpath)
+        assert index.names("boards") == ["native64"]
+        assert get_riotbase_index(riotbase.strpath) is index
+        monkeypatch.setattr(riotbase_index, "_INDEXES", {})
+        cached_index = get_riotbase_index(riotbase.strpath)
+        assert cached_index.names("modules") == index.names("modules")
+        assert m_scan.call_count == 1
+
+
+def test_riotbase_commit_once(riotbase, monkeypatch):
+    """Test the commit of a RIOTBASE is only read again once outdated."""
+    params = {"application": {"board": "native64", "modules": ["xtimer"]}}
+    with patch(
+        "riotgen.riotbase.get_git_commit", return_value=None
+    ) as m_commit:
+        for _ in range(3):
+            check_riotbase_params(params, "application", riotbase.strpath)
+        assert m_commit.call_count == 1
+
+        reset_riotbase_commits()
+        check_riotbase_params(params, "application", riotbase.strpath)
+        assert m_commit.call_count == 2
+
+        monkeypatch.setattr(riotbase_index, "COMMIT_TTL", 0)
+        for _ in range(2):
+            check_riotbase_params(params, "application", riotbase.strpath)
+        assert m_commit.call_count == 4
@@ -0,0 +1,232 @@
+"""Generation daemon tests."""
+
+import os
+import stat
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from click.testing import CliRunner
+
+import riotgen as riotgen_package
+from riotgen.errors import RiotgenError
+from riotgen.main import riotgen
+from riotgen.serve import create_server, handle_request, send_request
+
+TEST_DATA_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "test_data"
+)
+
+DRIVER_PARAMS = {
+    "name": "test",
+    "displayed_name": "Test",
+    "brief": "test brief description",
+    "ingroup": "misc",
+}
+
+GLOBAL_PARAMS = {
+    "author_name": "test_name",
+    "author_email": "test_email",
+    "organization": "test_orga",
+}
+
+
+@pytest.fixture
+def socket_path(tmpdir, monkeypatch):
+    """Path of the daemon socket for a test."""
+    socket_path = tmpdir.join("riotgen.sock").strpath
+    monkeypatch.setenv("RIOTGEN_SERVE_SOCKET", socket_path)
+    return socket_path
+
+
+@pytest.fixture
+def server(socket_path):
+    """A running daemon."""
+    server = create_server(socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_handle_request(tmpdir):
+    riotbase = tmpdir.mkdir("riotbase")
+    request = {
+        "command": "driver",
+        "riotbase": riotbase.strpath,
+        "params": DRIVER_PARAMS,
+        "global": GLOBAL_PARAMS,
+        "dry_run": True,
+    }
+    response = handle_request(request)
+    assert response["status"] == "ok"
+    driver_c = riotbase.join("drivers", "test", "test.c").strpath
+    with open(os.path.join(TEST_DATA_DIR, "driver", "driver.c")) as f_driver:
+        assert response["files"][driver_c] == f_driver.read()
+    assert riotbase.listdir() == []
+
+    response = handle_request(dict(request, dry_run=False))
+    assert response["status"] == "ok"
+    assert driver_c in response["written"]
+    assert os.path.exists(driver_c)
+
+    response = handle_request(dict(request, dry_run=False))
+    assert response["status"] == "error"
+    assert "use --force to overwrite" in response["message"]
+
+    response = handle_request(dict(request, command="unknown"))
+    assert response == {
+        "status": "error",
+        "message": "Unknown command 'unknown'",
+    }
+
+
+def test_send_request(server, tmpdir):
+    riotbase = tmpdir.mkdir("riotbase")
+    response = send_request(
+        {
+            "command": "driver",
+            "riotbase": riotbase.strpath,
+            "config": os.path.join(TEST_DATA_DIR, "driver.yml"),
+            "dry_run": True,
+        }
+    )
+    assert response["status"] == "ok"
+    assert riotbase.join("drivers", "test", "test.c").strpath in (
+        response["files"]
+    )
+
+    with pytest.raises(Exception, match="already running"):
+        create_server(server.server_address)
+
+
+def test_send_request_not_running(socket_path):
+    assert send_request({"command": "driver"}) is None
+
+
+def test_server_socket_permissions(server):
+    assert stat.S_IMODE(os.stat(server.server_address).st_mode) == 0o600
+
+
+def test_socket_other_user(server, monkeypatch):
+    uid = os.getuid()
+    monkeypatch.setattr(os, "getuid", lambda: uid + 1)
+    with pytest.raises(RiotgenError, match="owned by another user"):
+        send_request({"command": "driver"})
+    with pytest.raises(RiotgenError, match="owned by another user"):
+        create_server(server.server_address)
+
+
+@pytest.mark.parametrize("running", [True, False])
+def test_command_client(running, socket_path, tmpdir, request):
+    if running:
+        request.getfixturevalue("server")
+    riotbase = tmpdir.mkdir("riotbase")
+    config_file = os.path.join(TEST_DATA_DIR, "driver.yml")
+    result = CliRunner().invoke(
+        riotgen, ["client", "driver", "-c", config_file, "-r", riotbase]
+    )
+    assert result.exit_code == 0, result.output
+    driver_dir = riotbase.join("drivers", "test")
+    assert f"Driver 'test' generated in {driver_dir}" in result.output
+    assert driver_dir.join("test.c").check()
+
+    result = CliRunner().invoke(
+        riotgen, ["client", "driver", "-c", config_file, "-r", riotbase]
+    )
+    assert result.exit_code != 0
+    assert "already exists" in result.output
+
+
+@pytest.fixture
+def daemon_process(socket_path, tmpdir):
+    """A daemon running in another process and another directory."""
+    daemon_dir = tmpdir.mkdir("daemon")
+    package_dir = os.path.dirname(os.path.dirname(riotgen_package.__file__))
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(
+            filter(None, [package_dir, os.getenv("PYTHONPATH")])
+        ),
+        RIOTGEN_AUTHOR_NAME="daemon_name",
+        RIOTGEN_AUTHOR_EMAIL="daemon_email",
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-c", "from riotgen.main import riotgen; riotgen()"]
+        + ["serve"],
+        cwd=daemon_dir.strpath,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while send_request({}, socket_path) is None:
+        assert process.poll() is None, "riotgen daemon failed to start"
+        assert time.monotonic() < deadline, "riotgen daemon didn't start"
+        time.sleep(0.05)
+    yield daemon_dir
+    process.terminate()
+    process.wait()
+
+
+def test_command_client_cwd(daemon_process, tmpdir, monkeypatch):
+    riotbase = tmpdir.mkdir("riotbase")
+    client_dir = tmpdir.mkdir("client")
+    config_file = client_dir.join("application.yml")
+    config_file.write(
+        "global:\n"
+        "  license: LGPL21\n"
+        "application:\n"
+        "  name: test\n"
+        "  brief: Test application\n"
+        "  board: native\n"
+        "  output_dir: ./out\n"
+    )
+    monkeypatch.chdir(client_dir)
+    monkeypatch.setenv("RIOTGEN_AUTHOR_NAME", "client_name")
+    monkeypatch.setenv("RIOTGEN_AUTHOR_EMAIL", "client_email")
+
+    command = ["client", "application", "-c", "application.yml"]
+    command += ["-r", riotbase.strpath]
+    result = CliRunner().invoke(riotgen, command)
+    assert result.exit_code == 0, result.output
+    assert client_dir.join("out", "main.c").check()
+    assert daemon_process.listdir() == []
+    main_c = client_dir.join("out", "main.c").read()
+    assert "client_name <client_email>" in main_c
+    assert "daemon" not in main_c
+
+    result = CliRunner().invoke(riotgen, command + ["-d", "app"])
+    assert result.exit_code == 0, result.output
+    assert client_dir.join("app", "main.c").check()
+
+
+@pytest.mark.parametrize("running", [True, False])
+def test_command_client_application_cwd(
+    running, socket_path, tmpdir, monkeypatch, request
+):
+    if running:
+        request.getfixturevalue("server")
+    riotbase = tmpdir.mkdir("riotbase")
+    client_dir = tmpdir.mkdir("client")
+    client_dir.join("application.yml").write(
+        "application:\n"
+        "  name: test\n"
+        "  brief: Test application\n"
+        "  board: native\n"
+    )
+    monkeypatch.chdir(client_dir)
+    monkeypatch.setenv("RIOTGEN_AUTHOR_NAME", "client_name")
+    monkeypatch.setenv("RIOTGEN_AUTHOR_EMAIL", "client_email")
+
+    # Like the application command, the existing current directory is used
+    command = ["client", "application", "-c", "application.yml"]
+    command += ["-r", riotbase.strpath]
+    result = CliRunner().invoke(riotgen, command)
+    assert result.exit_code == 0, result.output
+    assert client_dir.join("main.c").check()
+    result = CliRunner().invoke(riotgen, command)
+    assert result.exit_code == 0, result.output
@@ -0,0 +1,73 @@
+"""Run profiling tests."""
+
+import os
+import pstats
+
+from click.testing import CliRunner
+
+from riotgen.main import riotgen
+from riotgen.timing import (
+    format_timings,
+    phase,
+    start_timing,
+    stop_timing,
+    timed,
+    timing_enabled,
+)
+
+TEST_DATA_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "test_data"
+)
+
+
+@timed("render")
+def _render():
+    with phase("templates"):
+        pass
+
+
+def test_timing():
+    assert not timing_enabled()
+    _render()
+    start_timing()
+    assert timing_enabled()
+    _render()
+    _render()
+    timings = stop_timing()
+    assert not timing_enabled()
+    assert sorted(timings) == ["render", "templates"]
+    assert timings["render"][0] == 2
+    assert timings["templates"][0] == 2
+    assert all(wall >= 0 for _, wall, _ in timings.values())
+    assert stop_timing() == {}
+
+
+def test_format_timings():
+    table = format_timings(
+        {"write": [1, 0.002, 0.001], "config": [2, 0.001, 0.001]}, 0.01, 0.005
+    )
+    assert table.splitlines() == [
+        "Phase       Calls  Wall (ms)   CPU (ms)",
+        "config          2        1.0        1.0",
+        "write           1        2.0        1.0",
+        "other                    7.0        3.0",
+        "total                   10.0        5.0",
+    ]
+
+
+def test_command_profile(tmpdir):
+    riotbase = tmpdir.mkdir("riotbase")
+    profile_output = tmpdir.join("riotgen.prof")
+    config_file = os.path.join(TEST_DATA_DIR, "driver.yml")
+    result = CliRunner().invoke(
+        riotgen,
+        ["--profile-output", profile_output.strpath]
+        + ["driver", "-c", config_file, "-r", riotbase.strpath],
+    )
+    assert result.exit_code == 0, result.output
+    phases = [line.split()[0] for line in result.stderr.splitlines()]
+    for name in ("config", "check", "render", "write", "total"):
+        assert name in phases
+    assert f"Profile written to {profile_output}" in result.stderr
+    assert pstats.Stats(profile_output.strpath).total_calls > 0
+    assert not timing_enabled()
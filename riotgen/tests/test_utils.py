@@ -2,17 +2,41 @@
 
 import subprocess
 
+import pytest
 from mock import patch
 
-from riotgen.utils import clone_repository, get_usermail, get_username
+from riotgen.utils import (
+    _get_git_configs,
+    clone_repository,
+    get_usermail,
+    get_username,
+)
+
+GIT_CONFIG_LIST = b"user.name\nname\0user.email\nemail\0core.bare\0"
+
+
+@pytest.fixture(autouse=True)
+def git_config(monkeypatch):
+    """Clear the git config cache and environment overrides."""
+    for env_var in (
+        "RIOTGEN_AUTHOR_NAME",
+        "RIOTGEN_AUTHOR_EMAIL",
+        "GIT_AUTHOR_NAME",
+        "GIT_AUTHOR_EMAIL",
+    ):
+        monkeypatch.delenv(env_var, raising=False)
+    _get_git_configs.cache_clear()
+    yield
+    _get_git_configs.cache_clear()
 
 
 @patch("subprocess.check_output")
 def test_get_usermail(m_check):
     """Test the get_usermail function."""
-    m_check.return_value = b"email\n"
+    m_check.return_value = GIT_CONFIG_LIST
     assert get_usermail() == "email"
 
+    _get_git_configs.cache_clear()
     m_check.side_effect = subprocess.CalledProcessError(42, "test")
     assert get_usermail() == ""
 
@@ -20,12 +44,40 @@ def test_get_usermail(m_check):
 @patch("subprocess.check_output")
 def test_get_username(m_check):
     """Test the get_username function."""
-    m_check.return_value = b"name\n"
+    m_check.return_value = GIT_CONFIG_LIST
     assert get_username() == "name"
 
+    _get_git_configs.cache_clear()
     m_check.side_effect = subprocess.CalledProcessError(42, "test")
     assert get_username() == ""
 
+    _get_git_configs.cache_clear()
+    m_check.side_effect = FileNotFoundError()
+    assert get_username() == ""
+
+
+@patch("subprocess.check_output")
+def test_git_config_cached(m_check):
+    """Test git is only called once per process."""
+    m_check.return_value = GIT_CONFIG_LIST
+    assert get_username() == "name"
+    assert get_usermail() == "email"
+    assert get_username() == "name"
+    m_check.assert_called_once_with(["git", "config", "--list", "--null"])
+
+
+@patch("subprocess.check_output")
+def test_git_config_environment(m_check, monkeypatch):
+    """Test the git identity can be set from the environment."""
+    monkeypatch.setenv("GIT_AUTHOR_NAME", "git_name")
+    monkeypatch.setenv("RIOTGEN_AUTHOR_EMAIL", "riotgen_email")
+    assert get_username() == "git_name"
+    assert get_usermail() == "riotgen_email"
+
+    monkeypatch.setenv("RIOTGEN_AUTHOR_NAME", "riotgen_name")
+    assert get_username() == "riotgen_name"
+    assert m_check.call_count == 0
+
 
 @patch("subprocess.check_call")
 def test_clone_repository(m_check):
@@ -0,0 +1,159 @@
+"""Run profiling module.
+
+The phases of a run are timed with the phase context manager or the timed
+decorator. The time of a phase excludes the time of the phases nested in it,
+e.g. template loading isn't counted in rendering. Timing is disabled unless
+started, a disabled phase only costs a global lookup.
+
+Phases running in batch worker processes aren't timed.
+"""
+
+import contextlib
+import functools
+import threading
+import time
+
+import click
+
+PHASES = [
+    "config",
+    "prompt",
+    "check",
+    "git",
+    "license",
+    "riotbase",
+    "templates",
+    "render",
+    "write",
+]
+
+_TIMINGS = None
+_LOCK = threading.Lock()
+_LOCAL = threading.local()
+
+
+def timing_enabled():
+    """Return True if the phases are being timed."""
+    return _TIMINGS is not None
+
+
+@contextlib.contextmanager
+def _timed_phase(name):
+    stack = getattr(_LOCAL, "stack", None)
+    if stack is None:
+        stack = _LOCAL.stack = []
+    # [wall time, CPU time] of the nested phases
+    children = [0.0, 0.0]
+    stack.append(children)
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - start_wall
+        cpu = time.process_time() - start_cpu
+        stack.pop()
+        if stack:
+            stack[-1][0] += wall
+            stack[-1][1] += cpu
+        with _LOCK:
+            if _TIMINGS is not None:
+                timing = _TIMINGS.setdefault(name, [0, 0.0, 0.0])
+                timing[0] += 1
+                timing[1] += wall - children[0]
+                timing[2] += cpu - children[1]
+
+
+_DISABLED_PHASE = contextlib.nullcontext()
+
+
+def phase(name):
+    """Return a context manager timing a phase of the run."""
+    if _TIMINGS is None:
+        return _DISABLED_PHASE
+    return _timed_phase(name)
+
+
+def timed(name):
+    """Decorate a function so that its calls are timed as a phase."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _TIMINGS is None:
+                return func(*args, **kwargs)
+            with _timed_phase(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def start_timing():
+    """Start timing the phases, dropping the previous timings."""
+    global _TIMINGS  # pylint:disable=global-statement
+    _TIMINGS = {}
+    return time.perf_counter(), time.process_time()
+
+
+def stop_timing():
+    """Stop timing the phases and return the timings.
+
+    Timings map each phase to its number of calls, wall time and CPU time.
+    """
+    global _TIMINGS  # pylint:disable=global-statement
+    timings, _TIMINGS = _TIMINGS, None
+    return timings or {}
+
+
+def format_timings(timings, total_wall, total_cpu):
+    """Return the table of the phases timings, in milliseconds."""
+    lines = [f"{'Phase':<10} {'Calls':>6} {'Wall (ms)':>10} {'CPU (ms)':>10}"]
+    names = [name for name in PHASES if name in timings]
+    names += sorted(name for name in timings if name not in PHASES)
+    for name in names:
+        calls, wall, cpu = timings[name]
+        lines.append(
+            f"{name:<10} {calls:>6} {wall * 1000:>10.1f} {cpu * 1000:>10.1f}"
+        )
+    other_wall = total_wall - sum(timing[1] for timing in timings.values())
+    other_cpu = total_cpu - sum(timing[2] for timing in timings.values())
+    lines.append(
+        f"{'other':<10} {'':>6} {other_wall * 1000:>10.1f} "
+        f"{other_cpu * 1000:>10.1f}"
+    )
+    lines.append(
+        f"{'total':<10} {'':>6} {total_wall * 1000:>10.1f} "
+        f"{total_cpu * 1000:>10.1f}"
+    )
+    return "\n".join(lines)
+
+
+def start_profiling(profile_output=None):
+    """Start timing the run, and profiling it if profile_output is given.
+
+    Return the function stopping the profiling, printing the timings table
+    and writing the profiler statistics to profile_output.
+    """
+    profiler = None
+    if profile_output is not None:
+        import cProfile  # pylint:disable=import-outside-toplevel
+
+        profiler = cProfile.Profile()
+    start_wall, start_cpu = start_timing()
+    if profiler is not None:
+        profiler.enable()
+
+    def stop():
+        if profiler is not None:
+            profiler.disable()
+        total_wall = time.perf_counter() - start_wall
+        total_cpu = time.process_time() - start_cpu
+        timings = stop_timing()
+        click.echo(format_timings(timings, total_wall, total_cpu), err=True)
+        if profiler is not None:
+            profiler.dump_stats(profile_output)
+            click.echo(f"Profile written to {profile_output}", err=True)
+
+    return stop
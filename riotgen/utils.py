@@ -1,7 +1,17 @@
 """Utility functions"""
 
+import functools
+import os
 import shlex
 import subprocess
+from typing import Optional
+
+from riotgen.timing import timed
+
+GIT_CONFIG_ENV = {
+    "user.name": ("RIOTGEN_AUTHOR_NAME", "GIT_AUTHOR_NAME"),
+    "user.email": ("RIOTGEN_AUTHOR_EMAIL", "GIT_AUTHOR_EMAIL"),
+}
 
 
 def parse_list_option(opt: list | str) -> list[str]:
@@ -24,23 +34,48 @@ def parse_list_option(opt: list | str) -> list[str]:
     return sorted(opt.split(","))
 
 
-def _get_git_config(config: str) -> str:
-    cmd = f"git config --get {config}"
+def _parse_git_config_list(output: str) -> dict[str, str]:
+    """Parse the output of 'git config --list --null'.
+
+    >>> _parse_git_config_list("user.name\\nname\\0core.bare\\0")
+    {'user.name': 'name', 'core.bare': ''}
+    """
+    configs = {}
+    for entry in output.split("\0"):
+        if not entry:
+            continue
+        key, _, value = entry.partition("\n")
+        configs[key] = value
+    return configs
+
+
+@functools.lru_cache(maxsize=None)
+@timed("git")
+def _get_git_configs() -> dict[str, str]:
+    """Read the whole git config once per process."""
+    cmd = "git config --list --null"
     try:
-        config = subprocess.check_output(shlex.split(cmd)).decode()[:-1]
-    except subprocess.CalledProcessError:
-        config = ""
+        output = subprocess.check_output(shlex.split(cmd)).decode()
+    except (OSError, subprocess.CalledProcessError):
+        return {}
 
-    return config
+    return _parse_git_config_list(output)
+
+
+def _get_git_config(config: str) -> str:
+    for env_var in GIT_CONFIG_ENV.get(config, ()):
+        if os.getenv(env_var):
+            return os.getenv(env_var)
+    return _get_git_configs().get(config, "")
 
 
 def get_username() -> str:
-    """Get the user name from git config."""
+    """Get the user name from the environment or git config."""
     return _get_git_config("user.name")
 
 
 def get_usermail() -> str:
-    """Get the user email from git config."""
+    """Get the user email from the environment or git config."""
     return _get_git_config("user.email")
 
 
@@ -48,3 +83,22 @@ def clone_repository(url: str, version: str, dest: str) -> int:
     """Clone a git repository."""
     cmd = f"git clone --depth=1 -b {version} {url} {dest}"
     return subprocess.check_call(shlex.split(cmd))
+
+
+def get_git_commit(path: str) -> Optional[str]:
+    """Return the commit checked out in the git repository at path.
+
+    None is returned if path isn't the top level directory of a git
+    repository.
+    """
+    cmd = f"git -C {shlex.quote(path)} rev-parse --show-toplevel HEAD"
+    try:
+        output = subprocess.check_output(
+            shlex.split(cmd), stderr=subprocess.DEVNULL
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    lines = output.decode().splitlines()
+    if len(lines) != 2 or os.path.realpath(lines[0]) != os.path.realpath(path):
+        return None
+    return lines[1]